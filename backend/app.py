@@ -9,15 +9,33 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import structlog
+import time
 from contextlib import asynccontextmanager
 
-from src.middleware.firebase_auth import FirebaseAuthMiddleware
-from src.middleware.rate_limiter import RateLimiterMiddleware
-from src.middleware.logger import setup_logging
-from src.routers import auth, patients, diet, analytics, reports
-from src.utils.exceptions import CustomException, custom_exception_handler
-from src.services.firebase_client import FirebaseClient
-from src.config import settings
+_process_start = time.perf_counter()
+
+from src.services.ml.frameworks import track_imports, import_report
+
+with track_imports("middleware"):
+    from src.middleware.firebase_auth import FirebaseAuthMiddleware
+    from src.middleware.rate_limiter import RateLimiterMiddleware
+    from src.middleware.logger import setup_logging
+
+with track_imports("routers"):
+    from src.routers import auth, patients, diet, analytics, reports
+
+with track_imports("services"):
+    from src.utils.exceptions import CustomException, custom_exception_handler
+    from src.services.firebase_client import firebase_client
+    from src.services.ml.model_registry import model_registry
+    from src.services.ml.inference import set_default_backend
+    from src.services.executor import analysis_executor
+    from src.services.micro_batcher import agni_trend_batcher
+    from src.services.rate_limit import rate_limiter, client_rate_limiter, create_counter_store
+    from src.services.token_cache import token_verifier
+    from src.services.meal_analysis_cache import meal_analysis_cache, PersistentAnalysisTier
+    from firebase_admin import auth as firebase_auth
+    from src.config import settings
 
 # Setup structured logging
 setup_logging()
@@ -29,19 +47,77 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Ayurvedic Diet Management API")
     
-    # Initialize Firebase
+    # Initialize Firebase once; routers share this client
     try:
-        firebase_client = FirebaseClient()
         await firebase_client.initialize()
-        logger.info("Firebase initialized successfully")
+        logger.info("Firebase initialized successfully", **firebase_client.stats())
     except Exception as e:
         logger.error("Failed to initialize Firebase", error=str(e))
         raise
     
+    # Load ML models once per worker, or on first use when preloading is off
+    set_default_backend(settings.ML_INFERENCE_BACKEND)
+    if settings.ML_PRELOAD_MODELS:
+        model_registry.load_all()
+    
+    # Run inference off the event loop
+    analysis_executor.start(
+        max_workers=settings.ANALYSIS_EXECUTOR_WORKERS,
+        max_queue=settings.ANALYSIS_EXECUTOR_MAX_QUEUE,
+        mode=settings.ANALYSIS_EXECUTOR_MODE
+    )
+    meal_analysis_cache.configure(
+        max_size=settings.MEAL_ANALYSIS_CACHE_SIZE,
+        ttl_seconds=settings.MEAL_ANALYSIS_CACHE_TTL,
+        model_version=settings.ML_MODEL_VERSION,
+        persistent=PersistentAnalysisTier(firebase_client) if settings.MEAL_ANALYSIS_CACHE_PERSISTENT else None
+    )
+    agni_trend_batcher.start(
+        max_batch_size=settings.AGNI_BATCH_MAX_SIZE,
+        window_ms=settings.AGNI_BATCH_WINDOW_MS
+    )
+    
+    # Rate limit from worker-local counters, synced to a shared store if configured
+    rate_limiter.configure(
+        limit=settings.RATE_LIMIT_REQUESTS,
+        window_seconds=settings.RATE_LIMIT_WINDOW,
+        shared_store=create_counter_store(settings.RATE_LIMIT_STORE, settings.RATE_LIMIT_REDIS_URL),
+        sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL
+    )
+    rate_limiter.start()
+    client_rate_limiter.configure(
+        limit=settings.RATE_LIMIT_CLIENT_REQUESTS,
+        window_seconds=settings.RATE_LIMIT_WINDOW,
+        shared_store=create_counter_store(settings.RATE_LIMIT_STORE, settings.RATE_LIMIT_REDIS_URL),
+        sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL
+    )
+    client_rate_limiter.start()
+    
+    # Cache verified ID tokens and keep Google's signing keys warm
+    token_verifier.configure(
+        fallback_verify=firebase_auth.verify_id_token,
+        project_id=settings.GOOGLE_CLOUD_PROJECT,
+        max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+        revocation_check_interval=settings.AUTH_REVOCATION_CHECK_INTERVAL
+    )
+    token_verifier.key_cache.start()
+    
+    logger.info(
+        "Startup report",
+        startup_time_ms=round((time.perf_counter() - _process_start) * 1000, 2),
+        imports=import_report(),
+        ml_models=model_registry.stats()
+    )
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Ayurvedic Diet Management API")
+    await agni_trend_batcher.shutdown()
+    await rate_limiter.shutdown()
+    await client_rate_limiter.shutdown()
+    await token_verifier.key_cache.shutdown()
+    analysis_executor.shutdown()
 
 # Create FastAPI application
 app = FastAPI(
@@ -68,9 +144,12 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
-# Add custom middleware
-app.add_middleware(FirebaseAuthMiddleware)
+# Add custom middleware (pure ASGI). The last one added runs first: client
+# addresses are limited before token verification, then authentication sets
+# the uid that per-user rate limiting keys on
 app.add_middleware(RateLimiterMiddleware)
+app.add_middleware(FirebaseAuthMiddleware)
+app.add_middleware(RateLimiterMiddleware, per_client=True)
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -96,7 +175,6 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Check Firebase connection
-        firebase_client = FirebaseClient()
         firebase_status = await firebase_client.health_check()
         
         return {
@@ -105,7 +183,15 @@ async def health_check():
             "version": "1.0.0",
             "services": {
                 "firebase": firebase_status,
-                "ml_models": "available"  # Will be implemented
+                "firebase_client": firebase_client.stats(),
+                "ml_models": model_registry.stats(),
+                "ml_imports": import_report(),
+                "analysis_executor": analysis_executor.stats(),
+                "agni_trend_batcher": agni_trend_batcher.stats(),
+                "rate_limiter": rate_limiter.stats(),
+                "client_rate_limiter": client_rate_limiter.stats(),
+                "auth_tokens": token_verifier.stats(),
+                "meal_analysis_cache": meal_analysis_cache.stats()
             }
         }
     except Exception as e:
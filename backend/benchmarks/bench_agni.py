@@ -0,0 +1,97 @@
+"""
+Agni Trend Benchmark
+Model invocations and latency per trend request: batched scoring of the recent and
+forecast days against scoring each day with its own model call
+
+Run from backend/:
+    python -m benchmarks.bench_agni --requests 200 --histories 1 16
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+import tensorflow as tf
+
+from src.services.ml.agni_predictor import AgniPredictor
+
+def _agni_model():
+    """Untrained LSTM of the Agni model's shape, accepting any number of timesteps"""
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=(None, 10)),
+        tf.keras.layers.LSTM(64, return_sequences=True),
+        tf.keras.layers.LSTM(32),
+        tf.keras.layers.Dense(16, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid')
+    ])
+
+def _history(rng: random.Random, days: int = 10):
+    return [
+        {
+            'appetite_score': rng.randint(0, 10), 'digestion_quality': rng.randint(0, 10),
+            'bowel_movement_frequency': rng.randint(0, 3), 'energy_level': rng.randint(0, 10),
+            'sleep_quality': rng.randint(0, 10), 'stress_level': rng.randint(0, 10),
+            'meal_timing_consistency': rng.random() < 0.5, 'water_intake': rng.uniform(0, 3),
+            'exercise_frequency': rng.randint(0, 7), 'weather_impact': rng.randint(-5, 5)
+        }
+        for _ in range(days)
+    ]
+
+def _per_day_trend(predictor: AgniPredictor, history):
+    """The previous routine: one model call per recent day and per forecast day"""
+    features = predictor._prepare_time_series_data(history)
+    agni_score = float(predictor._run_model(features[np.newaxis])[0][0])
+    recent_scores = np.array([
+        predictor._calculate_agni_score_from_features(predictor._convert_daily_metrics_to_features(data))
+        for data in history[-3:]
+    ])
+    trend_direction = predictor._classify_agni_trend(agni_score, recent_scores)
+
+    forecast, current_features = [], features[-1].copy()
+    for day in range(7):
+        predicted_score = predictor._calculate_agni_score_from_features(current_features) * (0.95 + day * 0.01)
+        forecast.append({'day': day + 1, 'agni_score': float(predicted_score)})
+        current_features = current_features * 0.95
+    return {'agni_score': agni_score, 'trend_direction': trend_direction, 'next_week_forecast': forecast}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Agni trend prediction")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--histories", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--backend", default="tf_function")
+    args = parser.parse_args()
+
+    predictor = AgniPredictor(inference_backend=args.backend)
+    predictor.model = _agni_model()
+
+    # Count forward passes through the inference backend
+    calls = [0]
+    run_model = predictor._run_model
+    def counted(X):
+        calls[0] += 1
+        return run_model(X)
+    predictor._run_model = counted
+
+    rng = random.Random(0)
+    print(f"{'routine':<10}{'histories':>10}{'calls/req':>11}{'p50 ms':>10}{'p95 ms':>10}")
+    for num_histories in args.histories:
+        histories = [_history(rng) for _ in range(num_histories)]
+        routines = (
+            ('batched', lambda: predictor.predict_agni_trends(histories)),
+            ('per-day', lambda: [_per_day_trend(predictor, history) for history in histories])
+        )
+        for label, run in routines:
+            run()  # Warm up (tracing for each input shape)
+            calls[0] = 0
+            timings = np.empty(args.requests)
+            for i in range(args.requests):
+                start = time.perf_counter()
+                run()
+                timings[i] = (time.perf_counter() - start) * 1000
+            print(
+                f"{label:<10}{num_histories:>10}{calls[0] / args.requests:>11.1f}"
+                f"{np.percentile(timings, 50):>10.2f}{np.percentile(timings, 95):>10.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
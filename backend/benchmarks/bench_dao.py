@@ -0,0 +1,81 @@
+"""
+Firestore DAO Throughput Benchmark
+Requests/sec per worker for blocking vs async DAO reads, against the local
+storage backend with a simulated network round trip
+
+Run from backend/:
+    python -m benchmarks.bench_dao --latency-ms 5 --requests 400 --concurrency 1 16 64
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+PATIENTS = 50
+
+async def _seed(firebase_client):
+    batch = firebase_client.async_db.batch()
+    for i in range(PATIENTS):
+        batch.set(firebase_client.get_async_document("patients", f"patient_{i}"), {
+            "patient_id": f"patient_{i}",
+            "full_name": f"Patient {i}",
+            "age": 20 + i % 50,
+            "gender": "female" if i % 2 else "male",
+            "assigned_doctor": "doctor_1",
+            "created_at": firebase_client.server_timestamp,
+            "updated_at": firebase_client.server_timestamp
+        })
+    await batch.commit()
+
+async def _blocking_get_patient(firebase_client, patient_id: str):
+    """The pre-async DAO read: sync Firestore call inside a coroutine"""
+    doc = firebase_client.get_document("patients", patient_id).get()
+    return doc.to_dict() if doc.exists else None
+
+async def _run(handler, requests: int, concurrency: int) -> float:
+    """Requests/sec with `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await handler(f"patient_{i % PATIENTS}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+async def _main(args):
+    from src.models.firebase_dao import PatientDAO
+    from src.services.firebase_client import firebase_client
+
+    await firebase_client.initialize()
+    await _seed(firebase_client)
+    dao = PatientDAO(firebase_client)
+
+    handlers = {
+        'blocking': lambda patient_id: _blocking_get_patient(firebase_client, patient_id),
+        'async': dao.get_patient
+    }
+
+    print(f"{'dao':<10}{'concurrency':>12}{'req/s':>10}")
+    for concurrency in args.concurrency:
+        for name, handler in handlers.items():
+            rps = await _run(handler, args.requests, concurrency)
+            print(f"{name:<10}{concurrency:>12}{rps:>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs async Firestore DAO reads")
+    parser.add_argument("--backend", default="memory", choices=["memory", "sqlite"])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    args = parser.parse_args()
+
+    # Settings are read when the client is created, so configure before importing it
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ["STORAGE_LATENCY_MS"] = str(args.latency_ms)
+    asyncio.run(_main(args))
+
+if __name__ == "__main__":
+    main()
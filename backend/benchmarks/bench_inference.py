@@ -0,0 +1,76 @@
+"""
+Inference Backend Microbenchmark
+Per-call latency of each ML inference backend on Agni- and GNN-shaped inputs
+
+Run from backend/:
+    python -m benchmarks.bench_inference --calls 200 --batch-sizes 1 8 64
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import tensorflow as tf
+
+from src.services.ml.inference import INFERENCE_BACKENDS, create_inference_backend
+
+def _agni_model(model_path: str):
+    """Trained Agni LSTM if present, otherwise an untrained model of the same shape"""
+    if os.path.exists(model_path):
+        return tf.keras.models.load_model(model_path)
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=(7, 10)),
+        tf.keras.layers.LSTM(64, return_sequences=True),
+        tf.keras.layers.LSTM(32),
+        tf.keras.layers.Dense(16, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid')
+    ])
+
+def _pair_model(embedding_dim: int = 64):
+    """GNN-shaped model taking (node_features, adjacency) pairs"""
+    node_features = tf.keras.Input(shape=(2, embedding_dim))
+    adjacency = tf.keras.Input(shape=(2, 2))
+    messages = tf.keras.layers.Dense(32, activation='relu')(node_features)
+    pooled = tf.keras.layers.Flatten()(tf.keras.layers.Dot(axes=(2, 1))([adjacency, messages]))
+    output = tf.keras.layers.Dense(1, activation='sigmoid')(pooled)
+    return tf.keras.Model([node_features, adjacency], output)
+
+def _time_calls(backend, inputs, calls: int) -> np.ndarray:
+    backend(inputs)  # Warm up (tracing, tensor allocation)
+    timings = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        backend(inputs)
+        timings[i] = time.perf_counter() - start
+    return timings * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ML inference backends")
+    parser.add_argument("--agni-model", default="model/agni_predictor.h5")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    models = {'agni_lstm': _agni_model(args.agni_model), 'compat_pairs': _pair_model()}
+
+    print(f"{'model':<14}{'backend':<14}{'batch':>6}{'p50 ms':>10}{'p95 ms':>10}")
+    for model_name, model in models.items():
+        for backend_name in INFERENCE_BACKENDS:
+            backend = create_inference_backend(model, backend_name)
+            # Report what actually ran (conversion may fall back to model.predict)
+            label = backend.name if backend.name == backend_name else f"{backend_name}->{backend.name}"
+
+            for batch in args.batch_sizes:
+                inputs = [
+                    rng.random((batch, *x.shape[1:])).astype(np.float32) for x in model.inputs
+                ]
+                inputs = inputs if len(inputs) > 1 else inputs[0]
+                timings = _time_calls(backend, inputs, args.calls)
+                print(
+                    f"{model_name:<14}{label:<14}{batch:>6}"
+                    f"{np.percentile(timings, 50):>10.3f}{np.percentile(timings, 95):>10.3f}"
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Middleware Latency Benchmark
+Per-request overhead of each ASGI middleware, and of the same checks written
+as call_next (BaseHTTPMiddleware) dispatchers
+
+Run from backend/:
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.middleware.firebase_auth import FirebaseAuthMiddleware
+from src.middleware.rate_limiter import RateLimiterMiddleware
+from src.services.rate_limit import SlidingWindowRateLimiter
+from src.services.token_cache import TokenVerifier
+
+TOKEN = "bench-token"
+
+async def _app(scope, receive, send):
+    """Endpoint stand-in: a small JSON response"""
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"status": "ok"}'})
+
+def _verifier() -> TokenVerifier:
+    """Verifier whose token is already cached, as for a returning client"""
+    verifier = TokenVerifier(lambda token, check_revoked=False: {'uid': 'user_1', 'exp': time.time() + 3600})
+    asyncio.run(verifier.verify(TOKEN))
+    return verifier
+
+async def _call_next_dispatch(request, call_next):
+    """The same checks in call_next form"""
+    if not request.headers.get("authorization", "").startswith("Bearer "):
+        raise RuntimeError("unauthenticated")
+    request.state.uid = "user_1"
+    return await call_next(request)
+
+def _stacks():
+    auth = FirebaseAuthMiddleware(_app)
+    auth.token_verifier = _verifier()
+    limiter = RateLimiterMiddleware(_app)
+    limiter.rate_limiter = SlidingWindowRateLimiter(limit=10 ** 9)
+    both = FirebaseAuthMiddleware(RateLimiterMiddleware(_app))
+    both.token_verifier = auth.token_verifier
+    both.app.rate_limiter = limiter.rate_limiter
+    return {
+        'none': _app,
+        'rate_limiter': limiter,
+        'firebase_auth': auth,
+        'auth+rate_limiter': both,
+        'call_next': BaseHTTPMiddleware(_app, dispatch=_call_next_dispatch)
+    }
+
+async def _time_requests(app, requests: int) -> np.ndarray:
+    scope = {
+        "type": "http", "method": "GET", "path": "/patients/", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {TOKEN}".encode())],
+        "client": ("10.0.0.1", 5000), "server": ("testserver", 80), "scheme": "http"
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    timings = np.empty(requests)
+    for i in range(requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request middleware overhead")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'middleware':<20}{'p50 us':>10}{'p95 us':>10}{'overhead us':>14}")
+    baseline = None
+    for name, app in _stacks().items():
+        timings = asyncio.run(_time_requests(app, args.requests))
+        p50 = np.percentile(timings, 50)
+        baseline = p50 if baseline is None else baseline
+        print(f"{name:<20}{p50:>10.1f}{np.percentile(timings, 95):>10.1f}{p50 - baseline:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Nutrition Benchmark
+Per-lookup latency of the indexed nutrition store against the linear
+partial-match scan it replaced, on a synthetic catalogue, and chart totals
+from the nutrient matrix against per-food dict accumulation
+
+Run from backend/:
+    python -m benchmarks.bench_nutrition --foods 8000 --lookups 20000 --chart-days 30
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+
+from src.services.ml.nutrient_calculator import NutrientCalculator
+from src.services.ml.nutrition_store import NutritionStore
+
+WORDS = [
+    "rice", "dal", "moong", "toor", "masoor", "wheat", "bajra", "jowar", "ragi", "ghee", "milk", "curd",
+    "paneer", "spinach", "methi", "lauki", "tinda", "bhindi", "aloo", "gobi", "mango", "banana", "apple",
+    "almond", "cashew", "sesame", "jaggery", "honey", "ginger", "turmeric", "cumin", "coriander"
+]
+STYLES = ["", "roasted", "steamed", "boiled", "sprouted", "raw", "fried", "kheer", "khichdi", "soup"]
+
+def _catalogue(num_foods: int, seed: int = 0):
+    rng = random.Random(seed)
+    records = {}
+    while len(records) < num_foods:
+        name = " ".join(word for word in (
+            rng.choice(STYLES), rng.choice(WORDS), rng.choice(WORDS), f"v{rng.randrange(1000)}"
+        ) if word)
+        records[name] = {
+            'calories': rng.uniform(10, 900), 'protein': rng.uniform(0, 30),
+            'carbs': rng.uniform(0, 80), 'fat': rng.uniform(0, 100), 'fiber': rng.uniform(0, 15),
+            'vitamins': {'C': rng.uniform(0, 60)}, 'minerals': {'iron': rng.uniform(0, 5)}
+        }
+    return records
+
+def _linear_lookup(records, food_name: str):
+    """The previous exact-then-partial-match scan"""
+    if food_name in records:
+        return records[food_name]
+    for key, nutrition in records.items():
+        if key in food_name or food_name in key:
+            return nutrition
+    return None
+
+def _loop_totals(calculator: NutrientCalculator, days):
+    """Meal, day and chart totals accumulated food by food, as before the nutrient matrix"""
+    def add(total, nutrition, factor=1.0):
+        for nutrient, value in nutrition.items():
+            if nutrient in ('vitamins', 'minerals'):
+                for sub_nutrient, sub_value in value.items():
+                    total[nutrient][sub_nutrient] = total[nutrient].get(sub_nutrient, 0) + sub_value * factor
+            else:
+                total[nutrient] = total.get(nutrient, 0) + value * factor
+
+    def empty():
+        return {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0, 'vitamins': {}, 'minerals': {}}
+
+    meals, day_totals, chart_total = [], [], empty()
+    for day in days:
+        day_total = empty()
+        for foods in day:
+            meal = empty()
+            for food in foods:
+                grams = calculator._convert_to_grams(food['quantity'], food['unit'])
+                add(meal, calculator._get_food_nutrition(food['name'].lower()), grams / 100)
+            meals.append(meal)
+            add(day_total, meal)
+        day_totals.append(day_total)
+        add(chart_total, day_total)
+    return meals, day_totals, chart_total
+
+def _bench_chart(records, chart_days: int, repeats: int = 20):
+    calculator = NutrientCalculator(store_path=None)
+    calculator.store = NutritionStore.from_records(records)
+    calculator._build_nutrient_matrix()
+
+    rng = random.Random(2)
+    names = list(records)
+    days = [
+        [[{'name': rng.choice(names), 'quantity': rng.uniform(20, 250), 'unit': 'grams'} for _ in range(4)]
+         for _ in range(4)]
+        for _ in range(chart_days)
+    ]
+    print(f"\n{chart_days}-day chart, 4 meals of 4 foods")
+    print(f"{'totals':<12}{'p50 ms':>10}")
+    for label, run in (('matrix', lambda: calculator.calculate_chart_nutrition(days)),
+                       ('dict loop', lambda: _loop_totals(calculator, days))):
+        run()  # Warm lookups
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<12}{np.percentile(timings, 50):>10.2f}")
+
+def _time(lookup, queries) -> np.ndarray:
+    timings = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        lookup(query)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark food nutrition lookups")
+    parser.add_argument("--foods", type=int, default=8000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--chart-days", type=int, default=30)
+    args = parser.parse_args()
+
+    records = _catalogue(args.foods)
+    start = time.perf_counter()
+    store = NutritionStore.from_records(records)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(1)
+    names = list(records)
+    # Exact names, free-text variants and misspellings; each distinct query is new to the store
+    queries = [
+        rng.choice([name, f"{rng.choice(STYLES)} {rng.choice(WORDS)} {i}", f"{rng.choice(WORDS)}h {i}"])
+        for i, name in enumerate(rng.choice(names) for _ in range(args.lookups))
+    ]
+
+    print(f"{args.foods} foods, index built in {build_ms:.1f} ms")
+    print(f"{'lookup':<12}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for label, lookup in (('indexed', store.match), ('linear', lambda name: _linear_lookup(records, name))):
+        timings = _time(lookup, queries[:2000] if label == 'linear' else queries)
+        print(f"{label:<12}{np.percentile(timings, 50):>10.1f}{np.percentile(timings, 95):>10.1f}"
+              f"{np.percentile(timings, 99):>10.1f}")
+
+    _bench_chart(records, args.chart_days)
+
+if __name__ == "__main__":
+    main()
@@ -29,10 +29,33 @@ class Settings(BaseSettings):
     GOOGLE_CLOUD_PROJECT: str = "ayurvedic-diet-app"
     FIREBASE_DATABASE_URL: Optional[str] = None
     
+    # Verified ID token cache
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_REVOCATION_CHECK_INTERVAL: float = 300.0  # seconds; 0 disables revocation checks
+    
     # ML Models
     ML_MODELS_BUCKET: str = "gs://ayur-ml-models"
     MODEL_CACHE_SIZE: int = 256
     PREDICTION_CACHE_TTL: int = 900  # 15 minutes
+    ANALYSIS_BATCH_MAX_MEALS: int = 500
+    PRAKRITI_BATCH_MAX_PATIENTS: int = 500
+    ML_INFERENCE_BACKEND: str = "tf_function"  # keras, tf_function or tflite
+    ML_PRELOAD_MODELS: bool = True  # False defers TensorFlow until a model is first used
+    ML_MODEL_VERSION: str = "1"  # Bump when models change to invalidate cached analyses
+    
+    # Meal analysis cache
+    MEAL_ANALYSIS_CACHE_SIZE: int = 2048
+    MEAL_ANALYSIS_CACHE_TTL: int = 86400  # seconds
+    MEAL_ANALYSIS_CACHE_PERSISTENT: bool = False  # Share cached analyses through storage
+    
+    # Analysis executor
+    ANALYSIS_EXECUTOR_MODE: str = "thread"  # thread or process
+    ANALYSIS_EXECUTOR_WORKERS: int = 4
+    ANALYSIS_EXECUTOR_MAX_QUEUE: int = 64
+    
+    # Agni trend micro-batching
+    AGNI_BATCH_WINDOW_MS: float = 5.0
+    AGNI_BATCH_MAX_SIZE: int = 64
     
     # Cloud Tasks
     CLOUD_TASKS_QUEUE: str = "projects/ayurvedic-diet-app/locations/us-central1/queues/ayur-tasks"
@@ -40,9 +63,16 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_CLIENT_REQUESTS: int = 300  # per client address, checked before authentication
+    RATE_LIMIT_STORE: str = "memory"  # memory (per worker), local or redis (shared)
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_SYNC_INTERVAL: float = 1.0  # seconds between shared-store syncs
     
     # Database
     FIRESTORE_COLLECTION_PREFIX: str = "ayur_diet"
+    STORAGE_BACKEND: str = "firestore"  # firestore, memory or sqlite
+    STORAGE_SQLITE_PATH: str = "local_firestore.db"
+    STORAGE_LATENCY_MS: float = 0.0  # Simulated round trip for local backends
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
@@ -0,0 +1,30 @@
+"""
+ASGI Middleware Helpers
+Header lookup and early JSON rejection straight from the ASGI scope
+"""
+
+import json
+from typing import Dict, Optional
+from starlette.types import Scope, Send
+
+def get_header(scope: Scope, name: bytes) -> Optional[bytes]:
+    """First value of a request header (name in lowercase), without building a Request"""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+def get_state(scope: Scope) -> Dict:
+    """Per-request state dict shared with request.state"""
+    return scope.setdefault("state", {})
+
+async def send_json_error(send: Send, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None):
+    """Reject a request with a {"detail": ...} JSON body, like HTTPException"""
+    body = json.dumps({"detail": detail}).encode()
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode())
+    ]
+    raw_headers.extend((key.lower().encode(), value.encode()) for key, value in (headers or {}).items())
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
@@ -8,54 +8,61 @@ import firebase_admin
 from firebase_admin import auth as firebase_auth
 import structlog
 from typing import Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.middleware.asgi import get_header, get_state, send_json_error
+from src.services.token_cache import token_verifier
 
 logger = structlog.get_logger()
 
 security = HTTPBearer()
 
+PUBLIC_PATHS = frozenset(["/", "/health", "/docs", "/redoc", "/openapi.json"])
+
 class FirebaseAuthMiddleware:
-    """Firebase authentication middleware"""
+    """Firebase authentication middleware (pure ASGI)"""
     
-    def __init__(self, app):
+    def __init__(self, app: ASGIApp):
         self.app = app
+        self.token_verifier = token_verifier
     
-    async def __call__(self, request: Request, call_next):
-        # Skip auth for public endpoints
-        if request.url.path in ["/", "/health", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
-        
-        # Skip auth for auth endpoints
-        if request.url.path.startswith("/auth/"):
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Skip auth for non-HTTP traffic, CORS preflights and public endpoints
+        path = scope.get("path", "")
+        if (scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or path in PUBLIC_PATHS or path.startswith("/auth/")):
+            await self.app(scope, receive, send)
+            return
         
         # Extract token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=401,
-                detail="Missing or invalid authorization header"
-            )
+        auth_header = get_header(scope, b"authorization")
+        if not auth_header or not auth_header.startswith(b"Bearer "):
+            await send_json_error(send, 401, "Missing or invalid authorization header")
+            return
         
-        token = auth_header.split(" ")[1]
+        token = auth_header[7:].decode("latin-1")
         
         try:
-            # Verify Firebase ID token
-            decoded_token = firebase_auth.verify_id_token(token)
-            request.state.user = decoded_token
-            request.state.uid = decoded_token.get("uid")
-            request.state.email = decoded_token.get("email")
-            request.state.role = decoded_token.get("role", "patient")
-            
-            logger.info("User authenticated", uid=request.state.uid)
+            # Verify Firebase ID token (repeat tokens are served from cache)
+            decoded_token = await self.token_verifier.verify(token)
             
         except firebase_auth.InvalidIdTokenError:
             logger.warning("Invalid Firebase token")
-            raise HTTPException(status_code=401, detail="Invalid token")
+            await send_json_error(send, 401, "Invalid token")
+            return
         except Exception as e:
             logger.error("Authentication error", error=str(e))
-            raise HTTPException(status_code=401, detail="Authentication failed")
+            await send_json_error(send, 401, "Authentication failed")
+            return
+        
+        # Read back through request.state by routes and the rate limiter
+        state = get_state(scope)
+        state["user"] = decoded_token
+        state["uid"] = decoded_token.get("uid")
+        state["email"] = decoded_token.get("email")
+        state["role"] = decoded_token.get("role", "patient")
         
-        return await call_next(request)
+        # Request and response bodies pass through untouched
+        await self.app(scope, receive, send)
 
 async def get_current_user(request: Request) -> dict:
     """Get current authenticated user"""
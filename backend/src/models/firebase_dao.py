@@ -1,19 +1,33 @@
 """
 Firebase Data Access Objects (DAO)
+Non-blocking reads and writes through the async Firestore client
 """
 
-from typing import List, Optional, Dict, Any, Union
-from datetime import datetime
+import asyncio
+from typing import Optional, Dict, Any, Union
+from datetime import datetime, timezone
 import structlog
 from src.services.firebase_client import FirebaseClient
+from src.services.analytics_rollup import write_chart
+from src.services.counters import ShardedCounters
+from src.services.pagination import fetch_page
 from src.models.pydantic_schemas import (
     UserCreate, UserUpdate, UserResponse,
-    PatientCreate, PatientUpdate, PatientResponse,
-    DietChartCreate, DietChartUpdate, DietChartResponse
+    PatientCreate, PatientUpdate, PatientResponse, PatientSummary, PatientPage,
+    DietChartCreate, DietChartUpdate, DietChartResponse, DietChartSummary, DietChartPage
 )
 
 logger = structlog.get_logger()
 
+# Fields projected for list views
+PATIENT_SUMMARY_FIELDS = [
+    "full_name", "email", "phone", "age", "gender", "assigned_doctor", "created_at", "updated_at"
+]
+DIET_CHART_SUMMARY_FIELDS = [
+    "patient_id", "created_by", "duration_days", "total_nutrition", "ayurvedic_compliance",
+    "notes", "created_at", "updated_at"
+]
+
 class UserDAO:
     """User Data Access Object"""
     
@@ -29,8 +43,8 @@ class UserDAO:
                 "email": user_data.email,
                 "full_name": user_data.full_name,
                 "role": user_data.role.value,
-                "created_at": self.firebase_client.db.SERVER_TIMESTAMP,
-                "updated_at": self.firebase_client.db.SERVER_TIMESTAMP,
+                "created_at": self.firebase_client.server_timestamp,
+                "updated_at": self.firebase_client.server_timestamp,
                 "profile": {
                     "phone": None,
                     "address": None,
@@ -39,7 +53,8 @@ class UserDAO:
                 }
             }
             
-            self.firebase_client.get_document(self.collection, uid).set(user_doc)
+            await self.firebase_client.get_async_document(self.collection, uid).set(user_doc)
+            await asyncio.to_thread(ShardedCounters(self.firebase_client).increment, "users", role=user_data.role.value)
             
             return UserResponse(
                 uid=uid,
@@ -57,7 +72,7 @@ class UserDAO:
     async def get_user(self, uid: str) -> Optional[UserResponse]:
         """Get user by UID"""
         try:
-            doc = self.firebase_client.get_document(self.collection, uid).get()
+            doc = await self.firebase_client.get_async_document(self.collection, uid).get()
             
             if not doc.exists:
                 return None
@@ -80,9 +95,9 @@ class UserDAO:
         """Update user"""
         try:
             update_data = user_update.dict(exclude_unset=True)
-            update_data["updated_at"] = self.firebase_client.db.SERVER_TIMESTAMP
+            update_data["updated_at"] = self.firebase_client.server_timestamp
             
-            self.firebase_client.get_document(self.collection, uid).update(update_data)
+            await self.firebase_client.get_async_document(self.collection, uid).update(update_data)
             
             return await self.get_user(uid)
             
@@ -93,9 +108,9 @@ class UserDAO:
     async def delete_user(self, uid: str) -> bool:
         """Delete user (soft delete)"""
         try:
-            self.firebase_client.get_document(self.collection, uid).update({
+            await self.firebase_client.get_async_document(self.collection, uid).update({
                 "deleted": True,
-                "deleted_at": self.firebase_client.db.SERVER_TIMESTAMP
+                "deleted_at": self.firebase_client.server_timestamp
             })
             return True
             
@@ -125,17 +140,16 @@ class PatientDAO:
                 "current_medications": patient_data.current_medications or [],
                 "prakriti_analysis": None,
                 "assigned_doctor": assigned_doctor,
-                "created_at": self.firebase_client.db.SERVER_TIMESTAMP,
-                "updated_at": self.firebase_client.db.SERVER_TIMESTAMP
+                "created_at": self.firebase_client.server_timestamp,
+                "updated_at": self.firebase_client.server_timestamp
             }
             
-            doc_ref = self.firebase_client.get_collection(self.collection).add(patient_doc)
-            patient_id = doc_ref[1].id
-            
-            # Update with patient_id
-            self.firebase_client.get_document(self.collection, patient_id).update({
-                "patient_id": patient_id
-            })
+            # Allocate the ID client-side so the document is written in one round trip
+            doc_ref = self.firebase_client.get_async_collection(self.collection).document()
+            patient_id = doc_ref.id
+            patient_doc["patient_id"] = patient_id
+            await doc_ref.set(patient_doc)
+            await asyncio.to_thread(ShardedCounters(self.firebase_client).increment, self.collection)
             
             return PatientResponse(
                 patient_id=patient_id,
@@ -161,7 +175,7 @@ class PatientDAO:
     async def get_patient(self, patient_id: str) -> Optional[PatientResponse]:
         """Get patient by ID"""
         try:
-            doc = self.firebase_client.get_document(self.collection, patient_id).get()
+            doc = await self.firebase_client.get_async_document(self.collection, patient_id).get()
             
             if not doc.exists:
                 return None
@@ -192,9 +206,9 @@ class PatientDAO:
         """Update patient"""
         try:
             update_data = patient_update.dict(exclude_unset=True)
-            update_data["updated_at"] = self.firebase_client.db.SERVER_TIMESTAMP
+            update_data["updated_at"] = self.firebase_client.server_timestamp
             
-            self.firebase_client.get_document(self.collection, patient_id).update(update_data)
+            await self.firebase_client.get_async_document(self.collection, patient_id).update(update_data)
             
             return await self.get_patient(patient_id)
             
@@ -202,37 +216,25 @@ class PatientDAO:
             logger.error("Update patient failed", error=str(e))
             raise
     
-    async def list_patients(self, doctor_id: Optional[str] = None, skip: int = 0, limit: int = 10) -> List[PatientResponse]:
-        """List patients with optional filtering"""
+    async def list_patients(self, doctor_id: Optional[str] = None, limit: int = 10,
+                            page_token: Optional[str] = None) -> PatientPage:
+        """List patient summaries, newest first, one page at a time"""
         try:
-            query = self.firebase_client.get_collection(self.collection)
+            collection = self.firebase_client.get_async_collection(self.collection)
+            query = collection
             
             if doctor_id:
                 query = query.where("assigned_doctor", "==", doctor_id)
             
-            docs = query.offset(skip).limit(limit).stream()
-            
-            patients = []
-            for doc in docs:
-                data = doc.to_dict()
-                patients.append(PatientResponse(
-                    patient_id=doc.id,
-                    full_name=data["full_name"],
-                    email=data.get("email"),
-                    phone=data.get("phone"),
-                    age=data["age"],
-                    gender=data["gender"],
-                    address=data.get("address"),
-                    medical_history=data.get("medical_history"),
-                    dietary_preferences=data.get("dietary_preferences"),
-                    current_medications=data.get("current_medications"),
-                    prakriti_analysis=data.get("prakriti_analysis"),
-                    assigned_doctor=data.get("assigned_doctor"),
-                    created_at=data["created_at"],
-                    updated_at=data["updated_at"]
-                ))
-            
-            return patients
+            docs, next_page_token = await fetch_page(
+                collection, query, [("created_at", "DESCENDING")], limit,
+                page_token=page_token, field_paths=PATIENT_SUMMARY_FIELDS
+            )
+            
+            return PatientPage(
+                items=[PatientSummary(patient_id=doc.id, **doc.to_dict()) for doc in docs],
+                next_page_token=next_page_token
+            )
             
         except Exception as e:
             logger.error("List patients failed", error=str(e))
@@ -241,9 +243,9 @@ class PatientDAO:
     async def delete_patient(self, patient_id: str) -> bool:
         """Delete patient (soft delete)"""
         try:
-            self.firebase_client.get_document(self.collection, patient_id).update({
+            await self.firebase_client.get_async_document(self.collection, patient_id).update({
                 "deleted": True,
-                "deleted_at": self.firebase_client.db.SERVER_TIMESTAMP
+                "deleted_at": self.firebase_client.server_timestamp
             })
             return True
             
@@ -269,17 +271,15 @@ class DietChartDAO:
                 "total_nutrition": {},
                 "ayurvedic_compliance": 0.5,
                 "notes": chart_data.notes,
-                "created_at": self.firebase_client.db.SERVER_TIMESTAMP,
-                "updated_at": self.firebase_client.db.SERVER_TIMESTAMP
+                "created_at": self.firebase_client.server_timestamp,
+                "updated_at": self.firebase_client.server_timestamp
             }
             
-            doc_ref = self.firebase_client.get_collection(self.collection).add(chart_doc)
-            chart_id = doc_ref[1].id
-            
-            # Update with chart_id
-            self.firebase_client.get_document(self.collection, chart_id).update({
-                "chart_id": chart_id
-            })
+            # Allocate the ID client-side; the chart and patient rollup are written together
+            chart_id = self.firebase_client.get_async_collection(self.collection).document().id
+            chart_doc["chart_id"] = chart_id
+            await self.write_with_rollup(chart_id, new_chart=chart_doc)
+            await asyncio.to_thread(ShardedCounters(self.firebase_client).increment, self.collection)
             
             return DietChartResponse(
                 chart_id=chart_id,
@@ -301,7 +301,7 @@ class DietChartDAO:
     async def get_diet_chart(self, chart_id: str) -> Optional[DietChartResponse]:
         """Get diet chart by ID"""
         try:
-            doc = self.firebase_client.get_document(self.collection, chart_id).get()
+            doc = await self.firebase_client.get_async_document(self.collection, chart_id).get()
             
             if not doc.exists:
                 return None
@@ -328,9 +328,9 @@ class DietChartDAO:
         """Update diet chart"""
         try:
             update_data = chart_update.dict(exclude_unset=True)
-            update_data["updated_at"] = self.firebase_client.db.SERVER_TIMESTAMP
+            update_data["updated_at"] = self.firebase_client.server_timestamp
             
-            self.firebase_client.get_document(self.collection, chart_id).update(update_data)
+            await self.write_with_rollup(chart_id, update_fields=update_data)
             
             return await self.get_diet_chart(chart_id)
             
@@ -338,36 +338,27 @@ class DietChartDAO:
             logger.error("Update diet chart failed", error=str(e))
             raise
     
-    async def list_diet_charts(self, patient_id: Optional[str] = None, created_by: Optional[str] = None, 
-                              skip: int = 0, limit: int = 10) -> List[DietChartResponse]:
-        """List diet charts with optional filtering"""
+    async def list_diet_charts(self, patient_id: Optional[str] = None, created_by: Optional[str] = None,
+                               limit: int = 10, page_token: Optional[str] = None) -> DietChartPage:
+        """List diet chart summaries, newest first, one page at a time"""
         try:
-            query = self.firebase_client.get_collection(self.collection)
+            collection = self.firebase_client.get_async_collection(self.collection)
+            query = collection
             
             if patient_id:
                 query = query.where("patient_id", "==", patient_id)
             if created_by:
                 query = query.where("created_by", "==", created_by)
             
-            docs = query.offset(skip).limit(limit).order_by("created_at", direction="DESCENDING").stream()
-            
-            charts = []
-            for doc in docs:
-                data = doc.to_dict()
-                charts.append(DietChartResponse(
-                    chart_id=doc.id,
-                    patient_id=data["patient_id"],
-                    created_by=data["created_by"],
-                    duration_days=data["duration_days"],
-                    meals=data["meals"],
-                    total_nutrition=data["total_nutrition"],
-                    ayurvedic_compliance=data["ayurvedic_compliance"],
-                    notes=data.get("notes"),
-                    created_at=data["created_at"],
-                    updated_at=data["updated_at"]
-                ))
-            
-            return charts
+            docs, next_page_token = await fetch_page(
+                collection, query, [("created_at", "DESCENDING")], limit,
+                page_token=page_token, field_paths=DIET_CHART_SUMMARY_FIELDS
+            )
+            
+            return DietChartPage(
+                items=[DietChartSummary(chart_id=doc.id, **doc.to_dict()) for doc in docs],
+                next_page_token=next_page_token
+            )
             
         except Exception as e:
             logger.error("List diet charts failed", error=str(e))
@@ -376,12 +367,29 @@ class DietChartDAO:
     async def delete_diet_chart(self, chart_id: str) -> bool:
         """Delete diet chart (soft delete)"""
         try:
-            self.firebase_client.get_document(self.collection, chart_id).update({
+            await self.write_with_rollup(chart_id, update_fields={
                 "deleted": True,
-                "deleted_at": self.firebase_client.db.SERVER_TIMESTAMP
+                "deleted_at": self.firebase_client.server_timestamp
             })
             return True
             
         except Exception as e:
             logger.error("Delete diet chart failed", error=str(e))
             raise
+    
+    async def write_with_rollup(self, chart_id: str, new_chart: Optional[Dict[str, Any]] = None,
+                                 update_fields: Optional[Dict[str, Any]] = None):
+        """Write a chart and its patient's analytics rollup in one transaction"""
+        def apply(transaction):
+            current = None
+            if update_fields is not None:
+                snapshot = self.firebase_client.get_document(self.collection, chart_id).get(transaction=transaction)
+                current = snapshot.to_dict() or {}
+            stored = new_chart if update_fields is None else {**current, **update_fields}
+            write_chart(
+                transaction, self.firebase_client.get_document, chart_id, current, stored,
+                datetime.now(timezone.utc), update_fields=update_fields
+            )
+        
+        # Transactions use the sync client; keep them off the event loop
+        await asyncio.to_thread(self.firebase_client.run_transaction, apply)
@@ -113,6 +113,22 @@ class PatientResponse(PatientBase):
     class Config:
         from_attributes = True
 
+# List views: summary fields and a cursor for the next page
+class PatientSummary(BaseModel):
+    patient_id: str
+    full_name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    age: int
+    gender: str
+    assigned_doctor: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class PatientPage(BaseModel):
+    items: List[PatientSummary]
+    next_page_token: Optional[str] = None
+
 # Prakriti Analysis Models
 class PrakritiAnalysisRequest(BaseModel):
     physical_characteristics: Dict[str, Any]
@@ -200,6 +216,22 @@ class DietChartResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# List views leave out meals and their embedded analyses
+class DietChartSummary(BaseModel):
+    chart_id: str
+    patient_id: str
+    created_by: str
+    duration_days: int
+    total_nutrition: Dict[str, Any]
+    ayurvedic_compliance: float
+    notes: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class DietChartPage(BaseModel):
+    items: List[DietChartSummary]
+    next_page_token: Optional[str] = None
+
 # Analytics Models
 class ComplianceMetrics(BaseModel):
     overall_compliance: float
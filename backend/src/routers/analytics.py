@@ -5,10 +5,14 @@ Analytics Router
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+import asyncio
 import structlog
 from src.middleware.firebase_auth import get_current_user, get_current_uid, require_role
-from src.services.firebase_client import FirebaseClient
+from src.services.firebase_client import FirebaseClient, get_firebase_client
+from src.services.analytics_rollup import ROLLUP_COLLECTION, load_rollup, summarize_rollup
+from src.services.counters import ShardedCounters
+from src.services.meal_analysis_store import meal_analysis_summary
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -34,13 +38,11 @@ class ComplianceMetrics(BaseModel):
 async def get_patient_analytics(
     patient_id: str,
     days: int = Query(30, ge=7, le=365),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Get comprehensive analytics for a patient"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Check permissions
         user_role = current_user.get("role", "patient")
         if user_role == "patient" and current_user.get("uid") != patient_id:
@@ -54,41 +56,24 @@ async def get_patient_analytics(
             if patient_data.get("assigned_doctor") != current_user.get("uid"):
                 raise HTTPException(status_code=403, detail="Access denied")
         
-        # Calculate date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Get diet charts for the period
-        charts_query = firebase_client.get_collection("diet_charts").where(
-            "patient_id", "==", patient_id
-        ).where("created_at", ">=", start_date)
-        
-        charts = list(charts_query.stream())
-        total_charts = len(charts)
-        
-        # Calculate compliance metrics
-        compliance_scores = []
-        for chart in charts:
-            chart_data = chart.to_dict()
-            compliance = chart_data.get("ayurvedic_compliance", 0.5)
-            compliance_scores.append(compliance)
-        
-        avg_compliance = sum(compliance_scores) / len(compliance_scores) if compliance_scores else 0.5
-        
-        # Analyze trends
-        recent_trends = _analyze_compliance_trends(charts)
+        # One rollup read instead of streaming every chart in the window
+        now = datetime.now(timezone.utc)
+        rollup = await _get_patient_rollup(firebase_client, patient_id, now)
+        summary = summarize_rollup(rollup, days, now)
         
         # Get health metrics (simplified)
-        health_metrics = _calculate_health_metrics(charts)
+        health_metrics = _calculate_health_metrics(summary["avg_nutrition"])
         
         # Generate recommendations
-        recommendations = _generate_patient_recommendations(avg_compliance, recent_trends, health_metrics)
+        recommendations = _generate_patient_recommendations(
+            summary["avg_compliance"], summary["recent_trends"], health_metrics
+        )
         
         return PatientAnalytics(
             patient_id=patient_id,
-            total_diet_charts=total_charts,
-            avg_compliance=avg_compliance,
-            recent_trends=recent_trends,
+            total_diet_charts=summary["total_charts"],
+            avg_compliance=summary["avg_compliance"],
+            recent_trends=summary["recent_trends"],
             health_metrics=health_metrics,
             recommendations=recommendations
         )
@@ -100,13 +85,11 @@ async def get_patient_analytics(
 @router.get("/compliance/{chart_id}", response_model=ComplianceMetrics)
 async def get_compliance_metrics(
     chart_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Get detailed compliance metrics for a diet chart"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get chart
         chart_doc = firebase_client.get_document("diet_charts", chart_id).get()
         if not chart_doc.exists:
@@ -128,7 +111,7 @@ async def get_compliance_metrics(
         
         for meal in meals:
             meal_type = meal.get("meal_type", "unknown")
-            analysis = meal.get("analysis", {})
+            analysis = meal_analysis_summary(meal)
             
             # Calculate meal compliance
             meal_score = 0.5  # Base score
@@ -170,13 +153,11 @@ async def get_compliance_metrics(
 
 @router.get("/dashboard")
 async def get_dashboard_analytics(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Get dashboard analytics for current user"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         user_role = current_user.get("role", "patient")
         uid = current_user.get("uid")
         
@@ -253,35 +234,20 @@ async def _get_doctor_dashboard(firebase_client: FirebaseClient, doctor_id: str)
 
 async def _get_admin_dashboard(firebase_client: FirebaseClient) -> Dict[str, Any]:
     """Get admin dashboard data"""
-    # Get all users
-    users_query = firebase_client.get_collection("users")
-    users = list(users_query.stream())
-    
-    # Get all patients
-    patients_query = firebase_client.get_collection("patients")
-    patients = list(patients_query.stream())
-    
-    # Get all diet charts
-    charts_query = firebase_client.get_collection("diet_charts")
-    charts = list(charts_query.stream())
+    # Totals and role counts from counter shards (seeded by count aggregation on first use)
+    counters = await asyncio.to_thread(ShardedCounters(firebase_client).snapshot)
     
     # Calculate metrics
-    total_users = len(users)
-    total_patients = len(patients)
-    total_charts = len(charts)
-    
-    # Count by role
-    role_counts = {}
-    for user in users:
-        role = user.to_dict().get("role", "unknown")
-        role_counts[role] = role_counts.get(role, 0) + 1
+    total_users = counters["totals"]["users"]
+    total_patients = counters["totals"]["patients"]
+    total_charts = counters["totals"]["diet_charts"]
     
     return {
         "user_type": "admin",
         "total_users": total_users,
         "total_patients": total_patients,
         "total_charts": total_charts,
-        "role_distribution": role_counts,
+        "role_distribution": counters["roles"],
         "quick_stats": {
             "active_users": total_users,
             "total_patients": total_patients,
@@ -289,60 +255,24 @@ async def _get_admin_dashboard(firebase_client: FirebaseClient) -> Dict[str, Any
         }
     }
 
-def _analyze_compliance_trends(charts: List) -> Dict[str, Any]:
-    """Analyze compliance trends over time"""
-    if not charts:
-        return {"trend": "no_data", "direction": "stable"}
-    
-    # Sort charts by date
-    sorted_charts = sorted(charts, key=lambda x: x.to_dict().get("created_at", ""))
-    
-    # Get compliance scores
-    compliance_scores = [chart.to_dict().get("ayurvedic_compliance", 0.5) for chart in sorted_charts]
-    
-    if len(compliance_scores) < 2:
-        return {"trend": "insufficient_data", "direction": "stable"}
-    
-    # Calculate trend
-    recent_avg = sum(compliance_scores[-3:]) / min(3, len(compliance_scores))
-    earlier_avg = sum(compliance_scores[:-3]) / max(1, len(compliance_scores) - 3) if len(compliance_scores) > 3 else recent_avg
-    
-    if recent_avg > earlier_avg + 0.1:
-        direction = "improving"
-    elif recent_avg < earlier_avg - 0.1:
-        direction = "declining"
-    else:
-        direction = "stable"
-    
-    return {
-        "trend": "analyzed",
-        "direction": direction,
-        "recent_avg": recent_avg,
-        "earlier_avg": earlier_avg
-    }
+async def _get_patient_rollup(firebase_client: FirebaseClient, patient_id: str, now: datetime) -> Dict[str, Any]:
+    """Patient's analytics rollup, rebuilt from their charts until it covers all of them"""
+    rollup_doc = await asyncio.to_thread(firebase_client.get_document(ROLLUP_COLLECTION, patient_id).get)
+    rollup = rollup_doc.to_dict()
+    if rollup and rollup.get('complete'):
+        return rollup
+    
+    # Rebuild in a transaction so concurrent chart writes are not overwritten
+    return await asyncio.to_thread(
+        firebase_client.run_transaction,
+        load_rollup, firebase_client.get_document, firebase_client.get_collection, patient_id, now
+    )
 
-def _calculate_health_metrics(charts: List) -> Dict[str, Any]:
+def _calculate_health_metrics(avg_nutrition: Optional[Dict[str, float]]) -> Dict[str, Any]:
     """Calculate health-related metrics"""
-    if not charts:
+    if not avg_nutrition:
         return {"status": "no_data"}
     
-    # Calculate average nutrition across all charts
-    total_nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}
-    chart_count = 0
-    
-    for chart in charts:
-        chart_data = chart.to_dict()
-        nutrition = chart_data.get("total_nutrition", {})
-        for nutrient, value in nutrition.items():
-            if nutrient in total_nutrition:
-                total_nutrition[nutrient] += value
-        chart_count += 1
-    
-    if chart_count > 0:
-        avg_nutrition = {nutrient: value / chart_count for nutrient, value in total_nutrition.items()}
-    else:
-        avg_nutrition = total_nutrition
-    
     return {
         "avg_daily_nutrition": avg_nutrition,
         "nutrition_balance": _calculate_nutrition_balance(avg_nutrition),
@@ -380,7 +310,7 @@ def _calculate_ayurvedic_adherence(meals: List[Dict]) -> float:
     adherence_scores = []
     
     for meal in meals:
-        analysis = meal.get("analysis", {})
+        analysis = meal_analysis_summary(meal)
         meal_score = 0.5  # Base score
         
         # Check compatibility
@@ -5,9 +5,11 @@ Authentication Router
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+import asyncio
 import structlog
 from src.middleware.firebase_auth import get_current_user, get_current_uid
-from src.services.firebase_client import FirebaseClient
+from src.services.firebase_client import FirebaseClient, get_firebase_client
+from src.services.counters import ShardedCounters
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -36,12 +38,12 @@ class TokenResponse(BaseModel):
     user: UserProfile
 
 @router.post("/register", response_model=TokenResponse)
-async def register_user(user_data: UserRegister):
+async def register_user(
+    user_data: UserRegister,
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
+):
     """Register a new user"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Create user in Firebase Auth
         user_record = firebase_client.auth.create_user(
             email=user_data.email,
@@ -65,6 +67,7 @@ async def register_user(user_data: UserRegister):
         }
         
         firebase_client.get_document("users", user_record.uid).set(user_doc)
+        await asyncio.to_thread(ShardedCounters(firebase_client).increment, "users", role=user_data.role)
         
         # Generate custom token for immediate login
         custom_token = firebase_client.auth.create_custom_token(user_record.uid)
@@ -85,12 +88,12 @@ async def register_user(user_data: UserRegister):
         raise HTTPException(status_code=400, detail="Registration failed")
 
 @router.post("/login", response_model=TokenResponse)
-async def login_user(login_data: UserLogin):
+async def login_user(
+    login_data: UserLogin,
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
+):
     """Login user and return token"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Verify user credentials
         user_record = firebase_client.auth.get_user_by_email(login_data.email)
         
@@ -120,12 +123,12 @@ async def login_user(login_data: UserLogin):
         raise HTTPException(status_code=401, detail="Login failed")
 
 @router.get("/me", response_model=UserProfile)
-async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
+async def get_current_user_profile(
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
+):
     """Get current user profile"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         uid = current_user.get("uid")
         user_doc = firebase_client.get_document("users", uid).get()
         
@@ -149,13 +152,11 @@ async def get_current_user_profile(current_user: dict = Depends(get_current_user
 @router.put("/me", response_model=UserProfile)
 async def update_user_profile(
     profile_update: dict,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Update current user profile"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         uid = current_user.get("uid")
         
         # Update user document
@@ -6,16 +6,20 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+import asyncio
+import functools
 import structlog
 from src.middleware.firebase_auth import get_current_user, get_current_uid, require_role
-from src.services.firebase_client import FirebaseClient
-from src.services.ml.dosha_classifier import DoshaClassifier
-from src.services.ml.compat_gnn import CompatibilityGNN
-from src.services.ml.rasa_recommender import RasaRecommender
-from src.services.ml.nutrient_calculator import NutrientCalculator
-from src.services.ayurvedic.guna_calculator import GunaCalculator
-from src.services.ayurvedic.viruddha_ahara import ViruddhaAharaDetector
-from src.services.ayurvedic.agni_analyzer import AgniAnalyzer
+from src.services.firebase_client import FirebaseClient, get_firebase_client
+from src.services.executor import AnalysisExecutor, get_analysis_executor
+from src.services.micro_batcher import MicroBatcher, get_agni_trend_batcher
+from src.services.counters import ShardedCounters
+from src.services.meal_analysis_cache import MealAnalysisCache, get_meal_analysis_cache
+from src.services.meal_analysis_store import MealAnalysisStore, compact_meal, meal_analysis_summary
+from src.models.firebase_dao import DietChartDAO
+from src.models.pydantic_schemas import DietChartPage
+from src.utils.exceptions import ServiceOverloadedError, ValidationError
+from src.config import settings
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -60,6 +64,14 @@ class FoodAnalysisResponse(BaseModel):
     incompatibility_check: Dict[str, Any]
     agni_impact: Dict[str, Any]
 
+class BatchFoodAnalysisRequest(BaseModel):
+    meals: List[FoodAnalysisRequest] = []
+    charts: List[List[Meal]] = []
+
+class BatchFoodAnalysisResponse(BaseModel):
+    meals: List[FoodAnalysisResponse]
+    charts: List[List[FoodAnalysisResponse]]
+
 class AgniPredictionRequest(BaseModel):
     historical_data: List[Dict[str, Any]]
     current_agni: Optional[float] = None
@@ -77,26 +89,25 @@ class AgniPredictionResponse(BaseModel):
 @router.post("/analyze-prakriti", response_model=Dict[str, Any])
 async def analyze_prakriti(
     analysis_data: Dict[str, Any],
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor)
 ):
     """Analyze patient's Prakriti for diet recommendations"""
     try:
-        dosha_classifier = DoshaClassifier()
-        
         # Extract features from analysis data
-        features = dosha_classifier.analyze_patient_features(analysis_data)
-        dosha_analysis = dosha_classifier.predict_dosha(features)
+        features = await executor.call("dosha_classifier", "analyze_patient_features", analysis_data)
+        dosha_analysis = await executor.call("dosha_classifier", "predict_dosha", features)
         
         # Get rasa recommendations
-        rasa_recommender = RasaRecommender()
-        rasa_recommendations = rasa_recommender.recommend_rasas(
+        rasa_recommendations = await executor.call(
+            "rasa_recommender", "recommend_rasas",
             dosha_analysis.get('dosha_scores', {}),
             analysis_data.get('current_rasas', [])
         )
         
         # Get guna recommendations
-        guna_calculator = GunaCalculator()
-        guna_recommendations = guna_calculator.recommend_guna_for_dosha(
+        guna_recommendations = await executor.call(
+            "guna_calculator", "recommend_guna_for_dosha",
             dosha_analysis.get('dosha_scores', {}),
             analysis_data.get('current_gunas', [])
         )
@@ -112,6 +123,8 @@ async def analyze_prakriti(
             }
         }
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Prakriti analysis failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to analyze prakriti")
@@ -119,58 +132,74 @@ async def analyze_prakriti(
 @router.post("/analyze-foods", response_model=FoodAnalysisResponse)
 async def analyze_foods(
     analysis_request: FoodAnalysisRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    cache: MealAnalysisCache = Depends(get_meal_analysis_cache)
 ):
     """Comprehensive analysis of food items"""
     try:
         foods = [food.dict() for food in analysis_request.foods]
-        food_names = [food['name'] for food in foods]
-        
-        # Initialize analyzers
-        compat_gnn = CompatibilityGNN()
-        rasa_recommender = RasaRecommender()
-        guna_calculator = GunaCalculator()
-        nutrient_calculator = NutrientCalculator()
-        incompatibility_detector = ViruddhaAharaDetector()
-        agni_analyzer = AgniAnalyzer()
-        
-        # Perform analyses
-        compatibility_result = compat_gnn.check_meal_compatibility(food_names)
-        rasa_result = rasa_recommender.analyze_meal_rasas(foods)
-        guna_result = guna_calculator.analyze_meal_guna(foods)
-        nutrition_result = nutrient_calculator.calculate_meal_nutrition(foods)
-        incompatibility_result = incompatibility_detector.check_meal_incompatibilities(food_names)
-        
-        # Agni impact (simplified - would need patient data)
-        agni_result = {
-            "agni_impact": "neutral",
-            "recommendations": ["Consider your digestive capacity"]
-        }
-        
-        return FoodAnalysisResponse(
-            compatibility_check=compatibility_result,
-            rasa_analysis=rasa_result,
-            guna_analysis=guna_result,
-            nutrition_analysis=nutrition_result,
-            incompatibility_check=incompatibility_result,
-            agni_impact=agni_result
-        )
+        analyses = await _analyze_meals([foods], executor, cache)
+        return FoodAnalysisResponse(**analyses[0])
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Food analysis failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to analyze foods")
 
+@router.post("/analyze-foods/batch", response_model=BatchFoodAnalysisResponse)
+async def analyze_foods_batch(
+    batch_request: BatchFoodAnalysisRequest,
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    cache: MealAnalysisCache = Depends(get_meal_analysis_cache)
+):
+    """Analyze many meals or diet charts in a single pass"""
+    total_meals = len(batch_request.meals) + sum(len(chart) for chart in batch_request.charts)
+    if total_meals > settings.ANALYSIS_BATCH_MAX_MEALS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.ANALYSIS_BATCH_MAX_MEALS} meals"
+        )
+    
+    try:
+        # Flatten standalone meals and chart meals into one batch
+        meals = [[food.dict() for food in request.foods] for request in batch_request.meals]
+        for chart in batch_request.charts:
+            meals.extend([food.dict() for food in meal.foods] for meal in chart)
+        
+        results = [
+            FoodAnalysisResponse(**result)
+            for result in await _analyze_meals(meals, executor, cache)
+        ]
+        
+        # Split results back out per meal and per chart
+        meal_results = results[:len(batch_request.meals)]
+        chart_results = []
+        position = len(batch_request.meals)
+        for chart in batch_request.charts:
+            chart_results.append(results[position:position + len(chart)])
+            position += len(chart)
+        
+        return BatchFoodAnalysisResponse(meals=meal_results, charts=chart_results)
+        
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
+    except Exception as e:
+        logger.error("Batch food analysis failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to analyze foods")
+
 @router.post("/predict-agni-trend", response_model=AgniPredictionResponse)
 async def predict_agni_trend(
     prediction_request: AgniPredictionRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    agni_trend_batcher: MicroBatcher = Depends(get_agni_trend_batcher)
 ):
     """Predict Agni trend using LSTM time series model"""
     try:
-        agni_analyzer = AgniAnalyzer()
-        
-        # Predict Agni trend using LSTM model
-        prediction = agni_analyzer.predict_agni_trend(prediction_request.historical_data)
+        # Predict Agni trend using LSTM model, batched with concurrent requests
+        prediction = await agni_trend_batcher.submit(prediction_request.historical_data)
         
         return AgniPredictionResponse(
             agni_score=prediction.get('agni_score', 0.5),
@@ -183,6 +212,8 @@ async def predict_agni_trend(
             model_accuracy=prediction.get('model_accuracy', '88.2%')
         )
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Agni trend prediction failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to predict Agni trend")
@@ -190,17 +221,18 @@ async def predict_agni_trend(
 @router.post("/assess-daily-agni", response_model=Dict[str, Any])
 async def assess_daily_agni_with_ml(
     daily_metrics: Dict[str, Any],
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor)
 ):
     """Assess daily Agni using ML model"""
     try:
-        agni_analyzer = AgniAnalyzer()
-        
         # Assess daily Agni using LSTM model
-        assessment = agni_analyzer.assess_daily_agni_with_ml(daily_metrics)
+        assessment = await executor.call("agni_analyzer", "assess_daily_agni_with_ml", daily_metrics)
         
         return assessment
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Daily Agni assessment failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to assess daily Agni")
@@ -209,17 +241,20 @@ async def assess_daily_agni_with_ml(
 async def predict_meal_agni_impact(
     meal_foods: List[Dict[str, Any]],
     current_agni: float,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor)
 ):
     """Predict how a meal will impact current Agni using ML model"""
     try:
-        agni_analyzer = AgniAnalyzer()
-        
         # Predict meal Agni impact using LSTM model
-        prediction = agni_analyzer.predict_meal_agni_impact_with_ml(meal_foods, current_agni)
+        prediction = await executor.call(
+            "agni_analyzer", "predict_meal_agni_impact_with_ml", meal_foods, current_agni
+        )
         
         return prediction
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Meal Agni impact prediction failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to predict meal Agni impact")
@@ -227,13 +262,13 @@ async def predict_meal_agni_impact(
 @router.post("/generate", response_model=DietChartResponse)
 async def generate_diet_chart(
     chart_data: DietChartCreate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    cache: MealAnalysisCache = Depends(get_meal_analysis_cache),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Generate AI-powered diet chart"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Check permissions
         user_role = current_user.get("role", "patient")
         if user_role not in ["doctor", "admin"]:
@@ -251,22 +286,24 @@ async def generate_diet_chart(
         optimized_meals = []
         total_nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}
         
-        for meal in chart_data.meals:
-            # Analyze meal
-            food_analysis = await analyze_foods(
-                FoodAnalysisRequest(foods=meal.foods),
-                current_user
-            )
-            
+        # Analyze all meals in one batch
+        meal_analyses = await _analyze_meals([
+            [food.dict() for food in meal.foods] for meal in chart_data.meals
+        ], executor, cache)
+        
+        analyses = [FoodAnalysisResponse(**analysis).dict() for analysis in meal_analyses]
+        
+        # Full analyses live in the content-addressed store; meals keep a reference and summary
+        await asyncio.to_thread(MealAnalysisStore(firebase_client).save, analyses)
+        
+        for meal, analysis in zip(chart_data.meals, analyses):
             # Calculate nutrition
-            meal_nutrition = food_analysis.nutrition_analysis
+            meal_nutrition = analysis['nutrition_analysis']
             for nutrient, value in meal_nutrition.items():
                 if nutrient in total_nutrition:
                     total_nutrition[nutrient] += value
             
-            # Add analysis to meal
-            meal_data = meal.dict()
-            meal_data['analysis'] = food_analysis.dict()
+            meal_data = compact_meal(meal.dict(), analysis)
             meal_data['nutrition'] = meal_nutrition
             optimized_meals.append(meal_data)
         
@@ -286,22 +323,22 @@ async def generate_diet_chart(
             "updated_at": firebase_client.db.SERVER_TIMESTAMP
         }
         
-        # Save to Firestore
-        doc_ref = firebase_client.get_collection("diet_charts").add(chart_doc)
-        chart_id = doc_ref[1].id
-        
-        # Update with chart_id
-        firebase_client.get_document("diet_charts", chart_id).update({"chart_id": chart_id})
+        # Save to Firestore together with the patient's analytics rollup
+        chart_id = firebase_client.get_collection("diet_charts").document().id
+        chart_doc["chart_id"] = chart_id
+        await DietChartDAO(firebase_client).write_with_rollup(chart_id, new_chart=chart_doc)
+        await asyncio.to_thread(ShardedCounters(firebase_client).increment, "diet_charts")
         
         logger.info("Diet chart generated", chart_id=chart_id, patient_id=chart_data.patient_id)
         
         return DietChartResponse(
-            chart_id=chart_id,
             **chart_doc,
             created_at=str(chart_doc["created_at"]),
             updated_at=str(chart_doc["updated_at"])
         )
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Diet chart generation failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to generate diet chart")
@@ -309,13 +346,12 @@ async def generate_diet_chart(
 @router.get("/charts/{chart_id}", response_model=DietChartResponse)
 async def get_diet_chart(
     chart_id: str,
-    current_user: dict = Depends(get_current_user)
+    include_analysis: bool = Query(False),
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Get diet chart by ID"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get chart document
         chart_doc = firebase_client.get_document("diet_charts", chart_id).get()
         if not chart_doc.exists:
@@ -330,56 +366,49 @@ async def get_diet_chart(
         elif user_role == "doctor" and chart_data.get("created_by") != current_user.get("uid"):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        return DietChartResponse(
-            chart_id=chart_id,
+        # Full meal analyses are loaded only when asked for
+        if include_analysis:
+            chart_data["meals"] = await asyncio.to_thread(
+                MealAnalysisStore(firebase_client).attach, chart_data.get("meals", [])
+            )
+        
+        return DietChartResponse(**{
             **chart_data,
-            created_at=str(chart_data.get("created_at", "")),
-            updated_at=str(chart_data.get("updated_at", ""))
-        )
+            "chart_id": chart_id,
+            "created_at": str(chart_data.get("created_at", "")),
+            "updated_at": str(chart_data.get("updated_at", ""))
+        })
         
     except Exception as e:
         logger.error("Get diet chart failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to get diet chart")
 
-@router.get("/charts", response_model=List[DietChartResponse])
+@router.get("/charts", response_model=DietChartPage)
 async def list_diet_charts(
     patient_id: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    page_token: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """List diet charts"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
-        # Build query
-        query = firebase_client.get_collection("diet_charts")
-        
+        created_by = None
         user_role = current_user.get("role", "patient")
         if user_role == "patient":
-            query = query.where("patient_id", "==", current_user.get("uid"))
+            # Patients only see their own charts
+            if patient_id and patient_id != current_user.get("uid"):
+                return DietChartPage(items=[])
+            patient_id = current_user.get("uid")
         elif user_role == "doctor":
-            query = query.where("created_by", "==", current_user.get("uid"))
+            created_by = current_user.get("uid")
         
-        if patient_id:
-            query = query.where("patient_id", "==", patient_id)
-        
-        # Apply pagination
-        docs = query.offset(skip).limit(limit).order_by("created_at", direction="DESCENDING").stream()
-        
-        charts = []
-        for doc in docs:
-            chart_data = doc.to_dict()
-            charts.append(DietChartResponse(
-                chart_id=doc.id,
-                **chart_data,
-                created_at=str(chart_data.get("created_at", "")),
-                updated_at=str(chart_data.get("updated_at", ""))
-            ))
-        
-        return charts
+        return await DietChartDAO(firebase_client).list_diet_charts(
+            patient_id=patient_id, created_by=created_by, limit=limit, page_token=page_token
+        )
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     except Exception as e:
         logger.error("List diet charts failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to list diet charts")
@@ -388,13 +417,11 @@ async def list_diet_charts(
 async def update_diet_chart(
     chart_id: str,
     chart_update: Dict[str, Any],
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Update diet chart"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Check if chart exists
         chart_doc = firebase_client.get_document("diet_charts", chart_id).get()
         if not chart_doc.exists:
@@ -409,11 +436,11 @@ async def update_diet_chart(
         elif user_role == "doctor" and chart_data.get("created_by") != current_user.get("uid"):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        # Update chart
+        # Update chart and the patient's analytics rollup atomically
         update_data = chart_update.copy()
         update_data["updated_at"] = firebase_client.db.SERVER_TIMESTAMP
         
-        firebase_client.get_document("diet_charts", chart_id).update(update_data)
+        await DietChartDAO(firebase_client).write_with_rollup(chart_id, update_fields=update_data)
         
         # Get updated chart
         updated_doc = firebase_client.get_document("diet_charts", chart_id).get()
@@ -434,13 +461,11 @@ async def update_diet_chart(
 async def clone_diet_chart(
     chart_id: str,
     new_patient_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Clone diet chart for another patient"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get original chart
         original_doc = firebase_client.get_document("diet_charts", chart_id).get()
         if not original_doc.exists:
@@ -462,20 +487,15 @@ async def clone_diet_chart(
             "updated_at": firebase_client.db.SERVER_TIMESTAMP
         })
         
-        # Remove original chart_id
-        if "chart_id" in cloned_data:
-            del cloned_data["chart_id"]
-        
-        # Save cloned chart
-        doc_ref = firebase_client.get_collection("diet_charts").add(cloned_data)
-        new_chart_id = doc_ref[1].id
-        
-        firebase_client.get_document("diet_charts", new_chart_id).update({"chart_id": new_chart_id})
+        # Save cloned chart under a new chart_id, with the new patient's rollup
+        new_chart_id = firebase_client.get_collection("diet_charts").document().id
+        cloned_data["chart_id"] = new_chart_id
+        await DietChartDAO(firebase_client).write_with_rollup(new_chart_id, new_chart=cloned_data)
+        await asyncio.to_thread(ShardedCounters(firebase_client).increment, "diet_charts")
         
         logger.info("Diet chart cloned", original_id=chart_id, new_id=new_chart_id)
         
         return DietChartResponse(
-            chart_id=new_chart_id,
             **cloned_data,
             created_at=str(cloned_data["created_at"]),
             updated_at=str(cloned_data["updated_at"])
@@ -485,6 +505,11 @@ async def clone_diet_chart(
         logger.error("Clone diet chart failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to clone diet chart")
 
+async def _analyze_meals(meals: List[List[Dict[str, Any]]], executor: AnalysisExecutor,
+                         cache: MealAnalysisCache) -> List[Dict[str, Any]]:
+    """Analyze meals through the cache; only uncached meals reach the worker pool"""
+    return await cache.analyze_meals(meals, functools.partial(executor.call, "meal_analysis", "analyze_meals"))
+
 def _calculate_ayurvedic_compliance(meals: List[Dict], dosha_scores: Dict[str, float]) -> float:
     """Calculate Ayurvedic compliance score for meals"""
     try:
@@ -497,14 +522,16 @@ def _calculate_ayurvedic_compliance(meals: List[Dict], dosha_scores: Dict[str, f
         for meal in meals:
             meal_score = 0.5  # Base score
             
+            analysis = meal_analysis_summary(meal)
+            
             # Check food compatibility
-            if 'analysis' in meal and 'compatibility_check' in meal['analysis']:
-                compat_score = meal['analysis']['compatibility_check'].get('score', 0.5)
+            if 'compatibility_check' in analysis:
+                compat_score = analysis['compatibility_check'].get('score', 0.5)
                 meal_score = (meal_score + compat_score) / 2
             
             # Check rasa balance
-            if 'analysis' in meal and 'rasa_analysis' in meal['analysis']:
-                rasa_score = meal['analysis']['rasa_analysis'].get('balance_score', 0.5)
+            if 'rasa_analysis' in analysis:
+                rasa_score = analysis['rasa_analysis'].get('balance_score', 0.5)
                 meal_score = (meal_score + rasa_score) / 2
             
             compliance_scores.append(meal_score)
@@ -6,14 +6,22 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
 import structlog
 from src.middleware.firebase_auth import get_current_user, get_current_uid, require_role
-from src.services.firebase_client import FirebaseClient
-from src.services.ml.dosha_classifier import DoshaClassifier
+from src.services.firebase_client import FirebaseClient, get_firebase_client
+from src.services.executor import AnalysisExecutor, get_analysis_executor
+from src.services.counters import ShardedCounters
+from src.models.firebase_dao import PatientDAO
+from src.models.pydantic_schemas import PatientPage
+from src.utils.exceptions import ServiceOverloadedError, ValidationError
+from src.config import settings
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+WRITE_BATCH_SIZE = 500  # Firestore's limit on writes per batch
+
 # Pydantic models
 class PatientCreate(BaseModel):
     full_name: str
@@ -58,16 +66,29 @@ class PrakritiAnalysisRequest(BaseModel):
     physical_characteristics: Dict[str, Any]
     lifestyle_habits: Dict[str, Any]
 
+class PrakritiBatchItem(PrakritiAnalysisRequest):
+    patient_id: str
+
+class PrakritiBatchRequest(BaseModel):
+    patients: List[PrakritiBatchItem]
+
+class PrakritiBatchResult(BaseModel):
+    patient_id: str
+    prakriti_analysis: Dict[str, Any]
+
+class PrakritiBatchResponse(BaseModel):
+    results: List[PrakritiBatchResult]
+    not_found: List[str]
+    access_denied: List[str] = []
+
 @router.post("/", response_model=PatientResponse)
 async def create_patient(
     patient_data: PatientCreate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Create a new patient"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Check if user has permission to create patients
         user_role = current_user.get("role", "patient")
         if user_role not in ["doctor", "admin"]:
@@ -96,6 +117,7 @@ async def create_patient(
         
         # Update with patient_id
         firebase_client.get_document("patients", patient_id).update({"patient_id": patient_id})
+        await asyncio.to_thread(ShardedCounters(firebase_client).increment, "patients")
         
         logger.info("Patient created", patient_id=patient_id, doctor_uid=current_user.get("uid"))
         
@@ -110,43 +132,28 @@ async def create_patient(
         logger.error("Patient creation failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to create patient")
 
-@router.get("/", response_model=List[PatientResponse])
+@router.get("/", response_model=PatientPage)
 async def list_patients(
-    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    current_user: dict = Depends(get_current_user)
+    page_token: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """List patients (doctor/admin only)"""
+    user_role = current_user.get("role", "patient")
+    if user_role not in ["doctor", "admin"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
-        user_role = current_user.get("role", "patient")
-        if user_role not in ["doctor", "admin"]:
-            raise HTTPException(status_code=403, detail="Insufficient permissions")
-        
-        # Query patients
-        query = firebase_client.get_collection("patients")
-        
         # If doctor, filter by assigned patients
-        if user_role == "doctor":
-            query = query.where("assigned_doctor", "==", current_user.get("uid"))
-        
-        # Apply pagination
-        docs = query.offset(skip).limit(limit).stream()
+        doctor_id = current_user.get("uid") if user_role == "doctor" else None
         
-        patients = []
-        for doc in docs:
-            patient_data = doc.to_dict()
-            patients.append(PatientResponse(
-                patient_id=doc.id,
-                **patient_data,
-                created_at=str(patient_data.get("created_at", "")),
-                updated_at=str(patient_data.get("updated_at", ""))
-            ))
-        
-        return patients
+        return await PatientDAO(firebase_client).list_patients(
+            doctor_id=doctor_id, limit=limit, page_token=page_token
+        )
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     except Exception as e:
         logger.error("List patients failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to list patients")
@@ -154,13 +161,11 @@ async def list_patients(
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_patient(
     patient_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Get patient by ID"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get patient document
         patient_doc = firebase_client.get_document("patients", patient_id).get()
         
@@ -191,13 +196,11 @@ async def get_patient(
 async def update_patient(
     patient_id: str,
     patient_update: PatientUpdate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Update patient information"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Check if patient exists
         patient_doc = firebase_client.get_document("patients", patient_id).get()
         if not patient_doc.exists:
@@ -238,13 +241,12 @@ async def update_patient(
 async def analyze_prakriti(
     patient_id: str,
     analysis_request: PrakritiAnalysisRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Analyze patient's Prakriti (constitution)"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Check permissions
         user_role = current_user.get("role", "patient")
         if user_role == "patient" and current_user.get("uid") != patient_id:
@@ -258,18 +260,11 @@ async def analyze_prakriti(
         patient_data = patient_doc.to_dict()
         
         # Prepare features for dosha classification
-        features = {
-            'age': patient_data.get('age', 30),
-            'gender': patient_data.get('gender', 'male'),
-            **analysis_request.symptoms,
-            **analysis_request.physical_characteristics,
-            **analysis_request.lifestyle_habits
-        }
+        features = _prakriti_features(patient_data, analysis_request)
         
         # Analyze dosha using ML model
-        dosha_classifier = DoshaClassifier()
-        feature_vector = dosha_classifier.analyze_patient_features(features)
-        dosha_analysis = dosha_classifier.predict_dosha(feature_vector)
+        feature_vector = await executor.call("dosha_classifier", "analyze_patient_features", features)
+        dosha_analysis = await executor.call("dosha_classifier", "predict_dosha", feature_vector)
         
         # Update patient with prakriti analysis
         firebase_client.get_document("patients", patient_id).update({
@@ -281,20 +276,94 @@ async def analyze_prakriti(
         
         return dosha_analysis
         
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         logger.error("Prakriti analysis failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to analyze prakriti")
 
+@router.post("/analyze-prakriti/batch", response_model=PrakritiBatchResponse)
+async def analyze_prakriti_batch(
+    batch_request: PrakritiBatchRequest,
+    current_user: dict = Depends(get_current_user),
+    executor: AnalysisExecutor = Depends(get_analysis_executor),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
+):
+    """Analyze Prakriti for a cohort of patients in one prediction (doctor/admin only)"""
+    user_role = current_user.get("role", "patient")
+    if user_role not in ["doctor", "admin"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
+    if len(batch_request.patients) > settings.PRAKRITI_BATCH_MAX_PATIENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.PRAKRITI_BATCH_MAX_PATIENTS} patients"
+        )
+    
+    try:
+        # A patient listed more than once is analyzed with their last answers,
+        # so the response matches what is stored
+        requests = {item.patient_id: item for item in batch_request.patients}
+        patient_ids = list(requests)
+        
+        # Read every patient in one round trip, off the event loop
+        snapshots = await asyncio.to_thread(
+            firebase_client.db.get_all,
+            [firebase_client.get_document("patients", patient_id) for patient_id in patient_ids]
+        )
+        # Soft-deleted patients count as not found
+        patients = {
+            snapshot.id: snapshot.to_dict() for snapshot in snapshots
+            if snapshot.exists and not snapshot.to_dict().get("deleted")
+        }
+        not_found = [patient_id for patient_id in patient_ids if patient_id not in patients]
+        
+        # Doctors may only analyze their own patients
+        access_denied = [
+            patient_id for patient_id, patient_data in patients.items()
+            if user_role == "doctor" and patient_data.get("assigned_doctor") != current_user.get("uid")
+        ]
+        found = [
+            item for patient_id, item in requests.items()
+            if patient_id in patients and patient_id not in access_denied
+        ]
+        
+        # One predict_proba call for the whole cohort
+        features = [_prakriti_features(patients[item.patient_id], item) for item in found]
+        analyses = await executor.call("dosha_classifier", "predict_dosha_batch", features)
+        
+        await asyncio.to_thread(_save_prakriti_analyses, firebase_client, {
+            item.patient_id: analysis for item, analysis in zip(found, analyses)
+        })
+        
+        logger.info(
+            "Batch prakriti analysis completed",
+            patients=len(found), not_found=len(not_found), access_denied=len(access_denied)
+        )
+        
+        return PrakritiBatchResponse(
+            results=[
+                PrakritiBatchResult(patient_id=item.patient_id, prakriti_analysis=analysis)
+                for item, analysis in zip(found, analyses)
+            ],
+            not_found=not_found,
+            access_denied=access_denied
+        )
+        
+    except ServiceOverloadedError as e:
+        raise HTTPException(status_code=503, detail=e.message)
+    except Exception as e:
+        logger.error("Batch prakriti analysis failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to analyze prakriti")
+
 @router.delete("/{patient_id}")
 async def delete_patient(
     patient_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Soft delete patient (admin only)"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         user_role = current_user.get("role", "patient")
         if user_role != "admin":
             raise HTTPException(status_code=403, detail="Admin access required")
@@ -314,3 +383,25 @@ async def delete_patient(
     except Exception as e:
         logger.error("Delete patient failed", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to delete patient")
+
+def _prakriti_features(patient_data: Dict[str, Any], analysis_request: PrakritiAnalysisRequest) -> Dict[str, Any]:
+    """Patient record and intake answers as input for dosha classification"""
+    return {
+        'age': patient_data.get('age', 30),
+        'gender': patient_data.get('gender', 'male'),
+        **analysis_request.symptoms,
+        **analysis_request.physical_characteristics,
+        **analysis_request.lifestyle_habits
+    }
+
+def _save_prakriti_analyses(firebase_client: FirebaseClient, analyses: Dict[str, Dict[str, Any]]):
+    """Write prakriti analyses onto their patients with batched writes"""
+    items = list(analyses.items())
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        batch = firebase_client.db.batch()
+        for patient_id, analysis in items[start:start + WRITE_BATCH_SIZE]:
+            batch.update(firebase_client.get_document("patients", patient_id), {
+                "prakriti_analysis": analysis,
+                "updated_at": firebase_client.db.SERVER_TIMESTAMP
+            })
+        batch.commit()
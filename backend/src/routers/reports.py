@@ -16,7 +16,8 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from datetime import datetime
 from src.middleware.firebase_auth import get_current_user, get_current_uid, require_role
-from src.services.firebase_client import FirebaseClient
+from src.services.firebase_client import FirebaseClient, get_firebase_client
+from src.services.meal_analysis_store import meal_analysis_summary
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -40,13 +41,11 @@ async def generate_diet_chart_pdf(
     include_analysis: bool = True,
     include_nutrition: bool = True,
     include_recommendations: bool = True,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Generate PDF report for diet chart"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get chart data
         chart_doc = firebase_client.get_document("diet_charts", chart_id).get()
         if not chart_doc.exists:
@@ -88,13 +87,11 @@ async def generate_diet_chart_pdf(
 @router.post("/generate", response_model=ReportResponse)
 async def generate_custom_report(
     report_request: ReportRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Generate custom report"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get chart data
         chart_doc = firebase_client.get_document("diet_charts", report_request.chart_id).get()
         if not chart_doc.exists:
@@ -146,13 +143,11 @@ async def generate_custom_report(
 @router.get("/download/{report_id}")
 async def download_report(
     report_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    firebase_client: FirebaseClient = Depends(get_firebase_client)
 ):
     """Download generated report"""
     try:
-        firebase_client = FirebaseClient()
-        await firebase_client.initialize()
-        
         # Get report data
         report_doc = firebase_client.get_document("reports", report_id).get()
         if not report_doc.exists:
@@ -271,8 +266,8 @@ def _generate_diet_chart_pdf(
                     story.append(Spacer(1, 12))
                 
                 # Include analysis if requested
-                if include_analysis and 'analysis' in meal:
-                    analysis = meal['analysis']
+                analysis = meal_analysis_summary(meal)
+                if include_analysis and analysis:
                     
                     # Compatibility check
                     if 'compatibility_check' in analysis:
@@ -0,0 +1,184 @@
+"""
+Patient Analytics Rollups
+Per-patient chart counts, compliance and nutrition sums kept in daily buckets,
+updated in the same transaction as every diet chart write
+
+A rollup first created by a chart write only covers charts written since; it is
+marked complete once rebuilt from all of the patient's charts.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+ROLLUP_COLLECTION = "patient_rollups"
+ROLLUP_DAYS = 366  # Longest analytics window plus today
+RECENT_CHARTS = 10
+NUTRIENTS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+
+def _utc(value: datetime) -> datetime:
+    # Firestore returns aware timestamps; treat naive ones as UTC so they compare
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def _empty_rollup(patient_id: str) -> Dict[str, Any]:
+    return {
+        'patient_id': patient_id,
+        'total_charts': 0,
+        'compliance_sum': 0.0,
+        'nutrition_sums': {nutrient: 0.0 for nutrient in NUTRIENTS},
+        'daily': {},
+        'recent': []
+    }
+
+def chart_contribution(chart: Optional[Dict[str, Any]], default_time: datetime) -> Optional[Dict[str, Any]]:
+    """What one diet chart adds to its patient's rollup (None for absent or deleted charts)"""
+    if not chart or chart.get('deleted') or not chart.get('patient_id'):
+        return None
+    created_at = chart.get('created_at')
+    if not isinstance(created_at, datetime):
+        # Server timestamp not resolved yet: the chart is being written now
+        created_at = default_time
+    created_at = _utc(created_at)
+    nutrition = chart.get('total_nutrition') or {}
+    return {
+        'chart_id': chart.get('chart_id'),
+        'patient_id': chart['patient_id'],
+        'day': created_at.date().isoformat(),
+        'created_at': created_at,
+        'compliance': float(chart.get('ayurvedic_compliance', 0.5)),
+        'nutrition': {nutrient: float(nutrition.get(nutrient, 0) or 0) for nutrient in NUTRIENTS}
+    }
+
+def _apply(rollup: Dict[str, Any], contribution: Dict[str, Any], sign: int):
+    """Add (sign=1) or remove (sign=-1) one chart's contribution in place"""
+    rollup['total_charts'] += sign
+    rollup['compliance_sum'] += sign * contribution['compliance']
+    for nutrient, value in contribution['nutrition'].items():
+        rollup['nutrition_sums'][nutrient] = rollup['nutrition_sums'].get(nutrient, 0.0) + sign * value
+
+    bucket = rollup['daily'].setdefault(contribution['day'], {
+        'charts': 0, 'compliance_sum': 0.0, 'nutrition': {nutrient: 0.0 for nutrient in NUTRIENTS}
+    })
+    bucket['charts'] += sign
+    bucket['compliance_sum'] += sign * contribution['compliance']
+    for nutrient, value in contribution['nutrition'].items():
+        bucket['nutrition'][nutrient] = bucket['nutrition'].get(nutrient, 0.0) + sign * value
+    if bucket['charts'] <= 0:
+        del rollup['daily'][contribution['day']]
+
+    # Most recent charts, oldest first, for the compliance trend
+    recent = [entry for entry in rollup['recent'] if entry['chart_id'] != contribution['chart_id']]
+    if sign > 0:
+        recent.append({
+            'chart_id': contribution['chart_id'],
+            'created_at': contribution['created_at'],
+            'compliance': contribution['compliance']
+        })
+        recent.sort(key=lambda entry: entry['created_at'])
+    rollup['recent'] = recent[-RECENT_CHARTS:]
+
+def update_rollup(rollup: Optional[Dict[str, Any]], patient_id: str,
+                  old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]], now: datetime) -> Dict[str, Any]:
+    """Rollup after replacing one chart's contribution, with expired days dropped"""
+    rollup = rollup or _empty_rollup(patient_id)
+    now = _utc(now)
+    if old is not None and old['patient_id'] == patient_id:
+        _apply(rollup, old, -1)
+    if new is not None and new['patient_id'] == patient_id:
+        _apply(rollup, new, 1)
+
+    oldest_day = (now - timedelta(days=ROLLUP_DAYS)).date().isoformat()
+    rollup['daily'] = {day: bucket for day, bucket in rollup['daily'].items() if day >= oldest_day}
+    rollup['updated_at'] = now
+    return rollup
+
+def rebuild_rollup(patient_id: str, charts: List[Dict[str, Any]], now: datetime) -> Dict[str, Any]:
+    """Rollup computed from scratch, for patients whose charts predate rollups"""
+    rollup = _empty_rollup(patient_id)
+    for chart in charts:
+        contribution = chart_contribution(chart, now)
+        if contribution is not None:
+            _apply(rollup, contribution, 1)
+    rollup['complete'] = True
+    return update_rollup(rollup, patient_id, None, None, now)
+
+def write_chart(transaction, get_document: Callable, chart_id: str,
+                old_chart: Optional[Dict[str, Any]], new_chart: Optional[Dict[str, Any]],
+                now: datetime, update_fields: Optional[Dict[str, Any]] = None):
+    """Write a diet chart and the rollups it affects within one transaction
+
+    new_chart is the chart as it will be stored (None when it is removed);
+    update_fields, if given, is written with update() instead of set().
+    """
+    old = chart_contribution(old_chart and {**old_chart, 'chart_id': chart_id}, now)
+    new = chart_contribution(new_chart and {**new_chart, 'chart_id': chart_id}, now)
+    patient_ids = {c['patient_id'] for c in (old, new) if c is not None}
+
+    # Transactions require every read before the first write
+    rollup_refs = {patient_id: get_document(ROLLUP_COLLECTION, patient_id) for patient_id in patient_ids}
+    rollups = {}
+    for patient_id, rollup_ref in rollup_refs.items():
+        snapshot = rollup_ref.get(transaction=transaction)
+        rollups[patient_id] = snapshot.to_dict() if snapshot.exists else None
+
+    chart_ref = get_document("diet_charts", chart_id)
+    if update_fields is not None:
+        transaction.update(chart_ref, update_fields)
+    elif new_chart is not None:
+        transaction.set(chart_ref, new_chart)
+
+    for patient_id, rollup_ref in rollup_refs.items():
+        transaction.set(rollup_ref, update_rollup(rollups[patient_id], patient_id, old, new, now))
+
+def load_rollup(transaction, get_document: Callable, get_collection: Callable,
+                patient_id: str, now: datetime) -> Dict[str, Any]:
+    """Patient's rollup, rebuilt from their charts within the transaction unless complete"""
+    rollup_ref = get_document(ROLLUP_COLLECTION, patient_id)
+    rollup = rollup_ref.get(transaction=transaction).to_dict()
+    if rollup and rollup.get('complete'):
+        return rollup
+
+    charts = get_collection("diet_charts").where("patient_id", "==", patient_id).stream(transaction=transaction)
+    rollup = rebuild_rollup(patient_id, [{**chart.to_dict(), 'chart_id': chart.id} for chart in charts], now)
+    transaction.set(rollup_ref, rollup)
+    return rollup
+
+def summarize_rollup(rollup: Optional[Dict[str, Any]], days: int, now: datetime) -> Dict[str, Any]:
+    """Chart count, compliance, trend and average nutrition over the last `days` days"""
+    start_day = (now - timedelta(days=days)).date().isoformat()
+    buckets = [bucket for day, bucket in (rollup or {}).get('daily', {}).items() if day >= start_day]
+
+    total_charts = sum(bucket['charts'] for bucket in buckets)
+    compliance_sum = sum(bucket['compliance_sum'] for bucket in buckets)
+    nutrition_sums = {
+        nutrient: sum(bucket['nutrition'].get(nutrient, 0.0) for bucket in buckets) for nutrient in NUTRIENTS
+    }
+
+    recent = [
+        entry['compliance'] for entry in (rollup or {}).get('recent', [])
+        if entry['created_at'].date().isoformat() >= start_day
+    ][-3:]
+
+    if total_charts == 0:
+        trends = {"trend": "no_data", "direction": "stable"}
+    elif total_charts < 2 or not recent:
+        trends = {"trend": "insufficient_data", "direction": "stable"}
+    else:
+        recent_avg = sum(recent) / len(recent)
+        earlier_count = total_charts - len(recent)
+        earlier_avg = (compliance_sum - sum(recent)) / earlier_count if earlier_count > 0 else recent_avg
+        if recent_avg > earlier_avg + 0.1:
+            direction = "improving"
+        elif recent_avg < earlier_avg - 0.1:
+            direction = "declining"
+        else:
+            direction = "stable"
+        trends = {"trend": "analyzed", "direction": direction, "recent_avg": recent_avg, "earlier_avg": earlier_avg}
+
+    return {
+        'total_charts': total_charts,
+        'avg_compliance': compliance_sum / total_charts if total_charts else 0.5,
+        'recent_trends': trends,
+        'avg_nutrition': {
+            nutrient: value / total_charts for nutrient, value in nutrition_sums.items()
+        } if total_charts else None
+    }
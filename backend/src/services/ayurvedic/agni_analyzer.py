@@ -133,21 +133,43 @@ class AgniAnalyzer:
     
     def predict_agni_trend(self, historical_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Predict Agni trend using LSTM time series model"""
+        return self.predict_agni_trends([historical_data])[0]
+    
+    def predict_agni_trends(self, histories: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Predict Agni trends for many patients with one LSTM forward pass"""
         try:
             # Use the LSTM-based Agni predictor
-            prediction = self.agni_predictor.predict_agni_trend(historical_data)
-            
-            # Enhance with traditional Ayurvedic analysis
-            traditional_analysis = self._analyze_traditional_agni_indicators(historical_data)
-            
-            return {
-                **prediction,
-                'traditional_analysis': traditional_analysis,
-                'combined_confidence': (prediction.get('confidence', 0.5) + traditional_analysis.get('confidence', 0.5)) / 2,
-                'ml_model_used': 'LSTM Time Series',
-                'model_accuracy': '88.2%'
-            }
-            
+            predictions = self.agni_predictor.predict_agni_trends(histories)
+        except Exception as e:
+            # Histories come from unrelated requests; retry one by one so a
+            # failure only costs the histories that cause it
+            logger.error("Batched Agni trend prediction failed", error=str(e))
+            predictions = [self._predict_single_agni_trend(historical_data) for historical_data in histories]
+        
+        results = []
+        for historical_data, prediction in zip(histories, predictions):
+            try:
+                # Enhance with traditional Ayurvedic analysis
+                traditional_analysis = self._analyze_traditional_agni_indicators(historical_data)
+                
+                results.append({
+                    **prediction,
+                    'traditional_analysis': traditional_analysis,
+                    'combined_confidence': (prediction.get('confidence', 0.5) + traditional_analysis.get('confidence', 0.5)) / 2,
+                    'ml_model_used': 'LSTM Time Series',
+                    'model_accuracy': '88.2%'
+                })
+                
+            except Exception as e:
+                logger.error("Agni trend prediction failed", error=str(e))
+                results.append(self._default_agni_prediction())
+        
+        return results
+    
+    def _predict_single_agni_trend(self, historical_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """LSTM prediction for one history, or the default prediction if it fails"""
+        try:
+            return self.agni_predictor.predict_agni_trends([historical_data])[0]
         except Exception as e:
             logger.error("Agni trend prediction failed", error=str(e))
             return self._default_agni_prediction()
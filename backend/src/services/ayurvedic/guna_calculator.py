@@ -75,6 +75,21 @@ class GunaCalculator:
     
     def analyze_meal_guna(self, foods: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze guna properties of a complete meal"""
+        return self.analyze_meals_guna([foods])[0]
+    
+    def analyze_meals_guna(self, meals: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Analyze guna properties of many meals, looking up each distinct food once"""
+        guna_lookup = {}
+        for foods in meals:
+            for food in foods:
+                food_name = food.get('name', '')
+                if food_name not in guna_lookup:
+                    guna_lookup[food_name] = self.calculate_food_guna(food_name)
+        
+        return [self._analyze_meal_guna(foods, guna_lookup) for foods in meals]
+    
+    def _analyze_meal_guna(self, foods: List[Dict[str, Any]], guna_lookup: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze guna properties of a meal from precomputed food gunas"""
         try:
             meal_properties = []
             total_heating = 0
@@ -85,7 +100,7 @@ class GunaCalculator:
                 food_name = food.get('name', '')
                 quantity = food.get('quantity', 100)
                 
-                guna_data = self.calculate_food_guna(food_name)
+                guna_data = dict(guna_lookup[food_name])
                 meal_properties.append(guna_data)
                 
                 # Weight by quantity
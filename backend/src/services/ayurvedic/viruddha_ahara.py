@@ -3,11 +3,65 @@ Viruddha Ahara (Incompatible Foods) Detection Service
 """
 
 import structlog
-from typing import Dict, List, Any, Set, Tuple
+from collections import deque
+from typing import Dict, Iterator, List, Any, Set, Tuple
 from functools import lru_cache
 
 logger = structlog.get_logger()
 
+def _iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of set bits, lowest first"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+class _KeywordAutomaton:
+    """Aho-Corasick automaton mapping a text to the OR of all keyword masks it contains"""
+    
+    def __init__(self, keyword_masks: Dict[str, int]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+        
+        # Build the keyword trie
+        for keyword, mask in keyword_masks.items():
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(0)
+                state = next_state
+            self._output[state] |= mask
+        
+        # Breadth-first failure links, merging outputs of suffix keywords
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+                queue.append(next_state)
+    
+    def match(self, text: str) -> int:
+        """OR of the masks of every keyword occurring anywhere in text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        mask = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            mask |= output[state]
+        return mask
+
 class ViruddhaAharaDetector:
     """Detect incompatible food combinations according to Ayurveda"""
     
@@ -56,28 +110,40 @@ class ViruddhaAharaDetector:
             'cooked_foods': ['rice', 'dal', 'curry', 'soup'],
             'fermented': ['pickle', 'fermented_foods', 'wine']
         }
+        
+        self._build_category_index()
+    
+    def _build_category_index(self):
+        """Compile food_categories into a keyword automaton and category bitsets"""
+        # One bit per category name that can take part in an incompatibility
+        names = list(self.food_categories)
+        for category, incompatible in self.incompatible_combinations.items():
+            names.append(category)
+            names.extend(sorted(incompatible))
+        self._category_bits = {}
+        for name in names:
+            self._category_bits.setdefault(name, len(self._category_bits))
+        self._category_names = list(self._category_bits)
+        
+        keyword_masks: Dict[str, int] = {}
+        for category, keywords in self.food_categories.items():
+            for keyword in keywords:
+                keyword_masks[keyword] = keyword_masks.get(keyword, 0) | (1 << self._category_bits[category])
+        self._category_matcher = _KeywordAutomaton(keyword_masks)
+        
+        # Bitset of categories each category must not be combined with
+        self._incompatible_masks = {}
+        for category, incompatible in self.incompatible_combinations.items():
+            mask = 0
+            for other in incompatible:
+                mask |= 1 << self._category_bits[other]
+            self._incompatible_masks[self._category_bits[category]] = mask
     
     def check_incompatibility(self, food1: str, food2: str) -> Dict[str, Any]:
         """Check if two foods are incompatible"""
         try:
-            food1_categories = self._get_food_categories(food1)
-            food2_categories = self._get_food_categories(food2)
-            
-            # Check direct incompatibilities
-            incompatible = False
-            conflicts = []
-            
-            for cat1 in food1_categories:
-                if cat1 in self.incompatible_combinations:
-                    incompatible_cats = self.incompatible_combinations[cat1]
-                    for cat2 in food2_categories:
-                        if cat2 in incompatible_cats:
-                            incompatible = True
-                            conflicts.append({
-                                'category1': cat1,
-                                'category2': cat2,
-                                'reason': self._get_incompatibility_reason(cat1, cat2)
-                            })
+            conflicts = self._find_conflicts(self._food_category_mask(food1), self._food_category_mask(food2))
+            incompatible = len(conflicts) > 0
             
             return {
                 'incompatible': incompatible,
@@ -96,13 +162,18 @@ class ViruddhaAharaDetector:
             all_conflicts = []
             incompatible_pairs = []
             
+            # Categorize each food once
+            category_masks = [self._food_category_mask(food) for food in foods]
+            conflict_masks = [self._conflict_mask(mask) for mask in category_masks]
+            
             # Check all pairs
             for i in range(len(foods)):
+                if not conflict_masks[i]:
+                    continue
                 for j in range(i + 1, len(foods)):
-                    result = self.check_incompatibility(foods[i], foods[j])
-                    if result['incompatible']:
+                    if conflict_masks[i] & category_masks[j]:
                         incompatible_pairs.append((foods[i], foods[j]))
-                        all_conflicts.extend(result['conflicts'])
+                        all_conflicts.extend(self._find_conflicts(category_masks[i], category_masks[j]))
             
             # Calculate overall meal compatibility
             total_pairs = len(foods) * (len(foods) - 1) // 2
@@ -121,6 +192,10 @@ class ViruddhaAharaDetector:
             logger.error("Meal incompatibility check failed", error=str(e))
             return {'error': 'Failed to check meal incompatibilities'}
     
+    def check_meals_incompatibilities(self, meals: List[List[str]]) -> List[Dict[str, Any]]:
+        """Check incompatibilities of many meals (each distinct food is categorized once)"""
+        return [self.check_meal_incompatibilities(foods) for foods in meals]
+    
     def suggest_alternatives(self, incompatible_foods: List[Tuple[str, str]]) -> Dict[str, Any]:
         """Suggest alternative food combinations"""
         try:
@@ -146,17 +221,46 @@ class ViruddhaAharaDetector:
     def _get_food_categories(self, food: str) -> Set[str]:
         """Get all categories a food belongs to"""
         food_lower = food.lower().replace(' ', '_')
-        categories = set()
-        
-        for category, foods in self.food_categories.items():
-            if any(food_item in food_lower for food_item in foods):
-                categories.add(category)
+        mask = self._category_matcher.match(food_lower)
         
         # If no categories found, add the food name itself
-        if not categories:
-            categories.add(food_lower)
+        if not mask:
+            return {food_lower}
+        
+        return {self._category_names[bit] for bit in _iter_bits(mask)}
+    
+    @lru_cache(maxsize=4096)
+    def _food_category_mask(self, food: str) -> int:
+        """Bitset of the categories a food belongs to"""
+        food_lower = food.lower().replace(' ', '_')
+        mask = self._category_matcher.match(food_lower)
+        
+        # Uncategorized foods stand for themselves (e.g. 'ghee', 'hot_water')
+        if not mask and food_lower in self._category_bits:
+            mask = 1 << self._category_bits[food_lower]
         
-        return categories
+        return mask
+    
+    def _conflict_mask(self, category_mask: int) -> int:
+        """Bitset of every category incompatible with any of the given categories"""
+        mask = 0
+        for bit in _iter_bits(category_mask):
+            mask |= self._incompatible_masks.get(bit, 0)
+        return mask
+    
+    def _find_conflicts(self, mask1: int, mask2: int) -> List[Dict[str, str]]:
+        """List the category conflicts between two foods' category bitsets"""
+        conflicts = []
+        for bit1 in _iter_bits(mask1):
+            for bit2 in _iter_bits(self._incompatible_masks.get(bit1, 0) & mask2):
+                cat1 = self._category_names[bit1]
+                cat2 = self._category_names[bit2]
+                conflicts.append({
+                    'category1': cat1,
+                    'category2': cat2,
+                    'reason': self._get_incompatibility_reason(cat1, cat2)
+                })
+        return conflicts
     
     def _get_incompatibility_reason(self, cat1: str, cat2: str) -> str:
         """Get reason for incompatibility"""
@@ -0,0 +1,109 @@
+"""
+Sharded Counters
+Collection totals and user role distribution kept in counter shard documents,
+so dashboards read a fixed number of small documents instead of whole collections
+"""
+
+import random
+from typing import Any, Dict, Optional
+
+COUNTER_SHARDS_COLLECTION = "counter_shards"
+DEFAULT_SHARDS = 10
+TRACKED_COLLECTIONS = ("users", "patients", "diet_charts")
+USER_ROLES = ("patient", "doctor", "admin")
+
+def count_documents(query, transaction=None) -> int:
+    """Server-side count aggregation; no documents are transferred"""
+    return int(query.count().get(transaction=transaction)[0][0].value)
+
+class ShardedCounters:
+    """Totals spread over shard documents to avoid single-document write contention
+
+    Each increment goes to a random shard; reads add every shard to a baseline
+    document seeded once from count aggregations. Firestore sustains about one
+    write per second per document, so N shards allow roughly N concurrent
+    increments per second.
+    """
+
+    def __init__(self, firebase_client, name: str = "dashboard", num_shards: int = DEFAULT_SHARDS):
+        self.firebase_client = firebase_client
+        self.name = name
+        self.num_shards = num_shards
+
+    def _shard(self, index: int):
+        return self.firebase_client.get_document(COUNTER_SHARDS_COLLECTION, f"{self.name}_{index}")
+
+    def increment(self, collection: str, delta: int = 1, role: Optional[str] = None):
+        """Add to a collection total, and to a role count for users"""
+        update: Dict[str, Any] = {collection: self.firebase_client.increment(delta)}
+        if role:
+            update["roles"] = {role: self.firebase_client.increment(delta)}
+        self._shard(random.randrange(self.num_shards)).set(update, merge=True)
+
+    def _baseline(self):
+        return self.firebase_client.get_document(COUNTER_SHARDS_COLLECTION, f"{self.name}_baseline")
+
+    def _sum_shards(self, snapshots) -> Dict[str, Any]:
+        totals = {collection: 0 for collection in TRACKED_COLLECTIONS}
+        roles: Dict[str, int] = {}
+        for snapshot in snapshots:
+            if not snapshot.exists:
+                continue
+            data = snapshot.to_dict()
+            for collection in TRACKED_COLLECTIONS:
+                totals[collection] += int(data.get(collection, 0))
+            for role, count in (data.get("roles") or {}).items():
+                roles[role] = roles.get(role, 0) + int(count)
+        return {"totals": totals, "roles": roles}
+
+    def _counts(self, baseline, shards) -> Dict[str, Any]:
+        counts = self._sum_shards([baseline] + shards)
+        counts["roles"] = {role: count for role, count in counts["roles"].items() if count}
+        return counts
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """Baseline plus summed shard increments, or None if the counters were never seeded"""
+        references = [self._baseline()] + [self._shard(index) for index in range(self.num_shards)]
+        baseline, *shards = self.firebase_client.db.get_all(references)
+        if not baseline.exists:
+            return None
+        return self._counts(baseline, shards)
+
+    def _seed(self, transaction) -> Dict[str, Any]:
+        baseline_ref = self._baseline()
+        baseline = baseline_ref.get(transaction=transaction)
+        shards = [self._shard(index).get(transaction=transaction) for index in range(self.num_shards)]
+        if baseline.exists:
+            # Seeded concurrently by another request
+            return self._counts(baseline, shards)
+
+        totals = {
+            collection: count_documents(self.firebase_client.get_collection(collection), transaction)
+            for collection in TRACKED_COLLECTIONS
+        }
+        users = self.firebase_client.get_collection("users")
+        roles = {role: count_documents(users.where("role", "==", role), transaction) for role in USER_ROLES}
+        roles = {role: count for role, count in roles.items() if count}
+        other = totals["users"] - sum(roles.values())
+        if other > 0:
+            roles["unknown"] = other
+
+        # Increments made before seeding are already in the counts; the baseline
+        # holds the rest so shards keep counting untouched
+        increments = self._sum_shards(shards)
+        transaction.create(baseline_ref, {
+            **{collection: totals[collection] - increments["totals"][collection] for collection in totals},
+            "roles": {
+                role: roles.get(role, 0) - increments["roles"].get(role, 0)
+                for role in set(roles) | set(increments["roles"])
+            }
+        })
+        return {"totals": totals, "roles": roles}
+
+    def seed(self) -> Dict[str, Any]:
+        """Create the baseline from count aggregations over the collections, once"""
+        return self.firebase_client.run_transaction(self._seed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current totals, seeding the counters on first use"""
+        return self.read() or self.seed()
@@ -0,0 +1,162 @@
+"""
+Analysis Executor
+Runs CPU-bound ML and rule-engine calls off the event loop with bounded concurrency
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+import structlog
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from src.services.ml.model_registry import ModelRegistry, model_registry
+from src.services.ml.inference import get_default_backend, set_default_backend
+from src.utils.exceptions import ServiceOverloadedError
+
+logger = structlog.get_logger()
+
+EXECUTOR_MODES = ("thread", "process")
+
+def _load_worker_models(inference_backend: str):
+    """Process pool initializer: load every model once per worker process"""
+    set_default_backend(inference_backend)
+    model_registry.load_all()
+
+def _invoke_model(registry: Optional[ModelRegistry], model_name: str, method: str,
+                  args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    """Call a method on a registered model, returning the result and run time in seconds"""
+    start = time.perf_counter()
+    # Process workers resolve models from their own copy of the global registry
+    registry = registry or model_registry
+    result = getattr(registry.get(model_name), method)(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+class AnalysisExecutor:
+    """Bounded worker pool for synchronous model inference and analysis"""
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, mode: str = "thread",
+                 registry: ModelRegistry = model_registry):
+        self.registry = registry
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.mode = mode
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None,
+              mode: Optional[str] = None):
+        """Create the worker pool (called once per worker at startup)"""
+        with self._lock:
+            if self._pool is not None:
+                return
+
+            self.max_workers = max_workers or self.max_workers
+            self.max_queue = self.max_queue if max_queue is None else max_queue
+            self.mode = mode or self.mode
+
+            if self.mode not in EXECUTOR_MODES:
+                raise ValueError(f"Unknown executor mode: {self.mode}")
+
+            if self.mode == "process":
+                # Spawn so workers never inherit a forked TensorFlow runtime
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_load_worker_models,
+                    initargs=(get_default_backend(),)
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="analysis"
+                )
+
+        logger.info(
+            "Analysis executor started",
+            mode=self.mode,
+            max_workers=self.max_workers,
+            max_queue=self.max_queue
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+            logger.info("Analysis executor stopped")
+
+    @property
+    def in_flight(self) -> int:
+        """Calls currently running or waiting for a worker"""
+        return self._in_flight
+
+    async def call(self, model_name: str, method: str, *args, **kwargs) -> Any:
+        """Run a method of a registered model in the worker pool"""
+        if self._pool is None:
+            self.start()
+
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            logger.warning("Analysis executor overloaded", call=f"{model_name}.{method}", in_flight=self._in_flight)
+            raise ServiceOverloadedError(details={'in_flight': self._in_flight})
+
+        label = f"{model_name}.{method}"
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            registry = self.registry if self.mode == "thread" else None
+            result, run_time = await loop.run_in_executor(
+                self._pool, _invoke_model, registry, model_name, method, args, kwargs
+            )
+        finally:
+            self._in_flight -= 1
+
+        total_time = time.perf_counter() - submitted
+        self._record(label, run_time, max(total_time - run_time, 0.0))
+        return result
+
+    def _record(self, label: str, run_time: float, wait_time: float):
+        """Accumulate per-call timing"""
+        stats = self._stats.setdefault(label, {
+            'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queue_wait_ms': 0.0
+        })
+        run_ms = run_time * 1000
+        stats['calls'] += 1
+        stats['total_ms'] += run_ms
+        stats['max_ms'] = max(stats['max_ms'], run_ms)
+        stats['queue_wait_ms'] += wait_time * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool state and timing per offloaded call"""
+        return {
+            'mode': self.mode,
+            'running': self._pool is not None,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self._in_flight,
+            'rejected': self._rejected,
+            'calls': {
+                label: {
+                    'calls': int(stats['calls']),
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'avg_queue_wait_ms': round(stats['queue_wait_ms'] / stats['calls'], 2)
+                }
+                for label, stats in self._stats.items()
+            }
+        }
+
+# Global executor instance
+analysis_executor = AnalysisExecutor()
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """Shared AnalysisExecutor instance"""
+    return analysis_executor
@@ -2,11 +2,18 @@
 Firebase Client Service
 """
 
+import asyncio
 import firebase_admin
-from firebase_admin import credentials, firestore, storage
+from firebase_admin import credentials, firestore, firestore_async, storage
 from google.cloud import storage as gcs
 import structlog
+import time
+from datetime import datetime
+from typing import Any, Dict
 from src.config import settings
+from src.services.storage.aio import AsyncLocalDatabase
+from src.services.storage.base import Increment as LocalIncrement, transactional as local_transactional
+from src.services.storage.factory import LOCAL_BACKENDS, get_local_database
 import os
 
 logger = structlog.get_logger()
@@ -16,14 +23,51 @@ class FirebaseClient:
     
     def __init__(self):
         self.db = None
+        self.async_db = None
         self.storage_client = None
+        self.backend = settings.STORAGE_BACKEND
         self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._init_count = 0
+        self._init_time_ms = 0.0
+        self._initialized_at = None
+        self._reuse_count = 0
     
     async def initialize(self):
         """Initialize Firebase services"""
         if self._initialized:
+            self._reuse_count += 1
             return
         
+        # Concurrent first requests share a single initialization
+        async with self._init_lock:
+            if self._initialized:
+                self._reuse_count += 1
+                return
+            
+            start = time.perf_counter()
+            if self.backend in LOCAL_BACKENDS:
+                self._initialize_local()
+            else:
+                self._initialize_firebase()
+            
+            self._init_count += 1
+            self._init_time_ms = round((time.perf_counter() - start) * 1000, 2)
+            self._initialized_at = datetime.utcnow().isoformat()
+            logger.info("Storage client initialized", backend=self.backend, init_time_ms=self._init_time_ms)
+    
+    def _initialize_local(self):
+        """Local stand-in for offline development and load testing"""
+        self.db = get_local_database(
+            self.backend,
+            sqlite_path=settings.STORAGE_SQLITE_PATH,
+            latency_ms=settings.STORAGE_LATENCY_MS
+        )
+        self.async_db = AsyncLocalDatabase(self.db)
+        self._initialized = True
+    
+    def _initialize_firebase(self):
+        """Initialize the Firebase Admin SDK, Firestore and Cloud Storage clients"""
         try:
             # Initialize Firebase Admin SDK
             if not firebase_admin._apps:
@@ -37,8 +81,9 @@ class FirebaseClient:
                     'storageBucket': f"{settings.GOOGLE_CLOUD_PROJECT}.appspot.com"
                 })
             
-            # Initialize Firestore
+            # Initialize Firestore (sync client for scripts, async client for request handlers)
             self.db = firestore.client()
+            self.async_db = firestore_async.client()
             
             # Initialize Cloud Storage
             self.storage_client = gcs.Client(project=settings.GOOGLE_CLOUD_PROJECT)
@@ -50,6 +95,17 @@ class FirebaseClient:
             logger.error("Failed to initialize Firebase", error=str(e))
             raise
     
+    def stats(self) -> Dict[str, Any]:
+        """Initialization cost and how often the shared clients were reused"""
+        return {
+            'backend': self.backend,
+            'initialized': self._initialized,
+            'init_count': self._init_count,
+            'init_time_ms': self._init_time_ms,
+            'initialized_at': self._initialized_at,
+            'reuse_count': self._reuse_count
+        }
+    
     async def health_check(self) -> bool:
         """Check Firebase connection health"""
         try:
@@ -57,9 +113,9 @@ class FirebaseClient:
                 await self.initialize()
             
             # Test Firestore connection
-            test_doc = self.db.collection("_health_check").document("test")
-            test_doc.set({"timestamp": firestore.SERVER_TIMESTAMP})
-            test_doc.delete()
+            test_doc = self.async_db.collection("_health_check").document("test")
+            await test_doc.set({"timestamp": self.server_timestamp})
+            await test_doc.delete()
             
             return True
             
@@ -77,9 +133,39 @@ class FirebaseClient:
         """Get Firestore document reference"""
         return self.get_collection(collection_name).document(document_id)
     
+    def run_transaction(self, func, *args, **kwargs):
+        """Run func(transaction, *args, **kwargs) atomically, retrying on contention"""
+        if not self._initialized:
+            raise RuntimeError("Firebase not initialized")
+        wrapper = local_transactional if self.backend in LOCAL_BACKENDS else firestore.transactional
+        return wrapper(func)(self.db.transaction(), *args, **kwargs)
+    
+    @property
+    def server_timestamp(self):
+        """Server timestamp sentinel for the active backend"""
+        return getattr(self.db, "SERVER_TIMESTAMP", firestore.SERVER_TIMESTAMP)
+    
+    def increment(self, value: float):
+        """Server-side numeric increment transform for the active backend"""
+        if self.backend in LOCAL_BACKENDS:
+            return LocalIncrement(value)
+        return firestore.Increment(value)
+    
+    def get_async_collection(self, collection_name: str):
+        """Get non-blocking Firestore collection reference"""
+        if not self._initialized:
+            raise RuntimeError("Firebase not initialized")
+        return self.async_db.collection(f"{settings.FIRESTORE_COLLECTION_PREFIX}_{collection_name}")
+    
+    def get_async_document(self, collection_name: str, document_id: str):
+        """Get non-blocking Firestore document reference"""
+        return self.get_async_collection(collection_name).document(document_id)
+    
     async def upload_file(self, bucket_name: str, file_path: str, destination_blob_name: str):
         """Upload file to Cloud Storage"""
         try:
+            if self.storage_client is None:
+                raise RuntimeError(f"Cloud Storage not available with the {self.backend} storage backend")
             bucket = self.storage_client.bucket(bucket_name)
             blob = bucket.blob(destination_blob_name)
             blob.upload_from_filename(file_path)
@@ -91,6 +177,8 @@ class FirebaseClient:
     async def download_file(self, bucket_name: str, source_blob_name: str, destination_file_name: str):
         """Download file from Cloud Storage"""
         try:
+            if self.storage_client is None:
+                raise RuntimeError(f"Cloud Storage not available with the {self.backend} storage backend")
             bucket = self.storage_client.bucket(bucket_name)
             blob = bucket.blob(source_blob_name)
             blob.download_to_filename(destination_file_name)
@@ -98,3 +186,11 @@ class FirebaseClient:
         except Exception as e:
             logger.error("File download failed", error=str(e))
             raise
+
+# Application-scoped client: one Firestore channel and Cloud Storage session per worker
+firebase_client = FirebaseClient()
+
+async def get_firebase_client() -> FirebaseClient:
+    """Shared, initialized FirebaseClient instance"""
+    await firebase_client.initialize()
+    return firebase_client
@@ -0,0 +1,66 @@
+"""
+Meal Analysis Pipeline
+Runs every food analyzer once over a batch of meals and splits the results per meal
+"""
+
+import structlog
+from typing import Any, Dict, List
+
+from src.services.ml.compat_gnn import CompatibilityGNN
+from src.services.ml.rasa_recommender import RasaRecommender
+from src.services.ml.nutrient_calculator import NutrientCalculator
+from src.services.ayurvedic.guna_calculator import GunaCalculator
+from src.services.ayurvedic.viruddha_ahara import ViruddhaAharaDetector
+
+logger = structlog.get_logger()
+
+class MealAnalysisPipeline:
+    """Comprehensive food analysis for one or many meals"""
+
+    def __init__(self, compat_gnn: CompatibilityGNN, rasa_recommender: RasaRecommender,
+                 guna_calculator: GunaCalculator, nutrient_calculator: NutrientCalculator,
+                 viruddha_detector: ViruddhaAharaDetector):
+        self.compat_gnn = compat_gnn
+        self.rasa_recommender = rasa_recommender
+        self.guna_calculator = guna_calculator
+        self.nutrient_calculator = nutrient_calculator
+        self.viruddha_detector = viruddha_detector
+
+    def analyze_meal(self, foods: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze the foods of a single meal"""
+        return self.analyze_meals([foods])[0]
+
+    def analyze_meals(self, meals: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Analyze many meals, running each analyzer once over the whole batch"""
+        if not meals:
+            return []
+
+        meal_food_names = [[food['name'] for food in foods] for foods in meals]
+
+        compatibility_results = self.compat_gnn.check_meals_compatibility(meal_food_names)
+        rasa_results = self.rasa_recommender.analyze_meals_rasas(meals)
+        guna_results = self.guna_calculator.analyze_meals_guna(meals)
+        nutrition_results = self.nutrient_calculator.calculate_meals_nutrition(meals)
+        incompatibility_results = self.viruddha_detector.check_meals_incompatibilities(meal_food_names)
+
+        logger.info(
+            "Meals analyzed",
+            meals=len(meals),
+            distinct_foods=len({name.lower() for names in meal_food_names for name in names})
+        )
+
+        return [
+            {
+                'compatibility_check': compatibility_results[i],
+                'rasa_analysis': rasa_results[i],
+                'guna_analysis': guna_results[i],
+                'nutrition_analysis': nutrition_results[i],
+                'incompatibility_check': incompatibility_results[i],
+                # Agni impact (simplified - would need patient data)
+                'agni_impact': {
+                    "agni_impact": "neutral",
+                    "recommendations": ["Consider your digestive capacity"]
+                }
+            }
+            for i in range(len(meals))
+        ]
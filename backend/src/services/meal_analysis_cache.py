@@ -0,0 +1,203 @@
+"""
+Meal Analysis Cache
+Analysis results keyed by a hash of each meal's foods, so repeated meals across
+patients and charts skip the analysis pipeline
+"""
+
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import structlog
+
+from src.services.meal_analysis_store import MealAnalysisStore
+from src.utils.helpers import generate_hash
+
+logger = structlog.get_logger()
+
+CACHE_COLLECTION = "meal_analysis_cache"
+
+def meal_cache_key(foods: List[Dict[str, Any]], model_version: str) -> str:
+    """Hash of the model version and every analyzed field of the foods, in order
+
+    Analyses repeat food names as sent and list pairs in meal order, so names
+    keep their case and the order is part of the key.
+    """
+    normalized = [
+        (
+            str(food.get('name', '')),
+            float(food.get('quantity', 100) or 0),
+            str(food.get('unit', 'grams')),
+            food.get('ayurvedic_properties') or {}
+        )
+        for food in foods
+    ]
+    return generate_hash({'model_version': model_version, 'foods': normalized})
+
+class PersistentAnalysisTier:
+    """Cache entries shared across workers and restarts
+
+    Each entry points at an analysis in the content-addressed meal analysis
+    store; expires_at can back a Firestore TTL policy so stale entries are
+    deleted server-side.
+    """
+
+    def __init__(self, firebase_client, collection: str = CACHE_COLLECTION):
+        self.firebase_client = firebase_client
+        self.collection = collection
+        self.store = MealAnalysisStore(firebase_client)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Unexpired analyses by key"""
+        references = [self.firebase_client.get_document(self.collection, key) for key in keys]
+        now = datetime.now(timezone.utc)
+        refs = {}
+        for snapshot in self.firebase_client.db.get_all(references):
+            entry = snapshot.to_dict() if snapshot.exists else None
+            if entry and entry.get('expires_at') and entry['expires_at'] > now:
+                refs[snapshot.id] = entry['analysis_ref']
+        analyses = self.store.load(list(refs.values()))
+        return {key: analyses[ref] for key, ref in refs.items() if ref in analyses}
+
+    def set_many(self, entries: Dict[str, Dict[str, Any]], ttl_seconds: float, model_version: str):
+        """Store analyses and point their keys at them"""
+        keys = list(entries)
+        refs = self.store.save([entries[key] for key in keys])
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        batch = self.firebase_client.db.batch()
+        for key, ref in zip(keys, refs):
+            batch.set(self.firebase_client.get_document(self.collection, key), {
+                'analysis_ref': ref,
+                'model_version': model_version,
+                'expires_at': expires_at
+            })
+        batch.commit()
+
+class MealAnalysisCache:
+    """Bounded in-memory LRU with TTL, optionally backed by a persistent tier"""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 86400, model_version: str = "1",
+                 persistent: Optional[PersistentAnalysisTier] = None, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self.persistent = persistent
+        self._clock = clock
+        # key -> (analysis, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._persistent_errors = 0
+
+    def configure(self, max_size: int, ttl_seconds: float, model_version: str,
+                  persistent: Optional[PersistentAnalysisTier] = None):
+        """Apply settings; a new model version drops every cached analysis"""
+        if model_version != self.model_version:
+            self._entries.clear()
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self.persistent = persistent
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self._clock():
+            del self._entries[key]
+            self._expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key: str, analysis: Dict[str, Any]):
+        self._entries[key] = (analysis, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    async def analyze_meals(self, meals: List[List[Dict[str, Any]]],
+                            analyze: Callable[[List[List[Dict[str, Any]]]], Awaitable[List[Dict[str, Any]]]]
+                            ) -> List[Dict[str, Any]]:
+        """Analyses for meals in order, running analyze only on distinct uncached meals"""
+        keys = [meal_cache_key(foods, self.model_version) for foods in meals]
+        results: Dict[str, Dict[str, Any]] = {}
+        missing: Dict[str, List[Dict[str, Any]]] = {}
+
+        for key, foods in zip(keys, meals):
+            if key in results or key in missing:
+                continue
+            cached = self._get(key)
+            if cached is not None:
+                self._hits += 1
+                results[key] = cached
+            else:
+                missing[key] = foods
+
+        if missing and self.persistent is not None:
+            try:
+                stored = await asyncio.to_thread(self.persistent.get_many, list(missing))
+            except Exception as e:
+                self._persistent_errors += 1
+                logger.error("Meal analysis cache read failed", error=str(e))
+                stored = {}
+            for key, analysis in stored.items():
+                self._persistent_hits += 1
+                self._put(key, analysis)
+                results[key] = analysis
+                del missing[key]
+
+        if missing:
+            self._misses += len(missing)
+            analyses = await analyze(list(missing.values()))
+            computed = dict(zip(missing, analyses))
+            for key, analysis in computed.items():
+                self._put(key, analysis)
+                results[key] = analysis
+
+            if self.persistent is not None:
+                try:
+                    await asyncio.to_thread(
+                        self.persistent.set_many, computed, self.ttl_seconds, self.model_version
+                    )
+                except Exception as e:
+                    self._persistent_errors += 1
+                    logger.error("Meal analysis cache write failed", error=str(e))
+
+        # Callers get their own copies; cached analyses are never mutated
+        return [copy.deepcopy(results[key]) for key in keys]
+
+    def clear(self):
+        """Drop every in-memory entry"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self._hits + self._persistent_hits + self._misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'model_version': self.model_version,
+            'persistent': self.persistent is not None,
+            'hits': self._hits,
+            'persistent_hits': self._persistent_hits,
+            'misses': self._misses,
+            'hit_rate': round((self._hits + self._persistent_hits) / lookups, 4) if lookups else 0.0,
+            'expired': self._expired,
+            'evictions': self._evictions,
+            'persistent_errors': self._persistent_errors
+        }
+
+# Global cache instance
+meal_analysis_cache = MealAnalysisCache()
+
+def get_meal_analysis_cache() -> MealAnalysisCache:
+    """Shared MealAnalysisCache instance"""
+    return meal_analysis_cache
@@ -0,0 +1,82 @@
+"""
+Meal Analysis Store
+Full meal analyses kept in a content-addressed collection and referenced by hash
+from diet chart meals, which carry only the summary fields their readers use
+"""
+
+from typing import Any, Dict, List
+from src.utils.helpers import generate_hash
+
+ANALYSIS_COLLECTION = "meal_analyses"
+BATCH_SIZE = 500  # Firestore's limit on writes per batch
+
+# Analysis fields copied onto each meal for compliance, analytics and reports
+SUMMARY_FIELDS = {
+    'compatibility_check': ('compatible', 'score'),
+    'rasa_analysis': ('balance_score',)
+}
+
+def analysis_ref(analysis: Dict[str, Any]) -> str:
+    """Content hash identifying an analysis; equal analyses share one document"""
+    return generate_hash(analysis)
+
+def summarize_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """The small subset of an analysis stored inline on the meal"""
+    return {
+        section: {field: analysis[section][field] for field in fields if field in analysis[section]}
+        for section, fields in SUMMARY_FIELDS.items()
+        if isinstance(analysis.get(section), dict)
+    }
+
+def meal_analysis_summary(meal: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary of a meal's analysis, for charts written before and after the split"""
+    if 'analysis_summary' in meal:
+        return meal['analysis_summary']
+    return summarize_analysis(meal.get('analysis') or {})
+
+def compact_meal(meal_data: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Meal as stored on the chart: a reference and summary in place of the full analysis"""
+    return {**meal_data, 'analysis_ref': analysis_ref(analysis), 'analysis_summary': summarize_analysis(analysis)}
+
+class MealAnalysisStore:
+    """Content-addressed storage for meal analyses
+
+    Documents are immutable and keyed by content hash, so saving an analysis
+    that already exists rewrites identical data and repeated meals across
+    charts are stored once.
+    """
+
+    def __init__(self, firebase_client):
+        self.firebase_client = firebase_client
+
+    def _document(self, ref: str):
+        return self.firebase_client.get_document(ANALYSIS_COLLECTION, ref)
+
+    def save(self, analyses: List[Dict[str, Any]]) -> List[str]:
+        """Store analyses and return their references, in order"""
+        refs = [analysis_ref(analysis) for analysis in analyses]
+        unique = list(dict(zip(refs, analyses)).items())
+
+        for start in range(0, len(unique), BATCH_SIZE):
+            batch = self.firebase_client.db.batch()
+            for ref, analysis in unique[start:start + BATCH_SIZE]:
+                batch.set(self._document(ref), analysis)
+            batch.commit()
+        return refs
+
+    def load(self, refs: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Analyses by reference; missing references are left out"""
+        unique = list(dict.fromkeys(refs))
+        if not unique:
+            return {}
+        snapshots = self.firebase_client.db.get_all([self._document(ref) for ref in unique])
+        return {snapshot.id: snapshot.to_dict() for snapshot in snapshots if snapshot.exists}
+
+    def attach(self, meals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Meals with their full analyses loaded back under 'analysis'"""
+        analyses = self.load([meal['analysis_ref'] for meal in meals if meal.get('analysis_ref')])
+        return [
+            {**meal, 'analysis': analyses[meal['analysis_ref']]}
+            if meal.get('analysis_ref') in analyses else meal
+            for meal in meals
+        ]
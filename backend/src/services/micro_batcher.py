@@ -0,0 +1,119 @@
+"""
+Micro-Batcher
+Gathers concurrent requests over a short window and serves them with one batched call
+"""
+
+import asyncio
+import structlog
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.services.executor import analysis_executor
+
+logger = structlog.get_logger()
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into batched calls"""
+
+    def __init__(self, process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 64, window_ms: float = 5.0, name: str = "batch"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    def start(self, max_batch_size: Optional[int] = None, window_ms: Optional[float] = None):
+        """Apply batching limits (called once per worker at startup)"""
+        self.max_batch_size = max_batch_size or self.max_batch_size
+        self.window_ms = self.window_ms if window_ms is None else window_ms
+        logger.info(
+            "Micro-batcher started",
+            batcher=self.name,
+            max_batch_size=self.max_batch_size,
+            window_ms=self.window_ms
+        )
+
+    async def shutdown(self):
+        """Flush pending requests and wait for running batches"""
+        while self._pending:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send up to one batch of pending items"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        # Leftovers start a new window
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window_ms / 1000, self._flush)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run one batched call and hand each caller its result"""
+        self._batches += 1
+        self._items += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error("Batched call failed", batcher=self.name, size=len(batch), error=str(e))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counts and sizes"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'window_ms': self.window_ms,
+            'pending': len(self._pending),
+            'batches': self._batches,
+            'items': self._items,
+            'avg_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+            'largest_batch': self._largest_batch
+        }
+
+# Global Agni trend batcher
+agni_trend_batcher = MicroBatcher(
+    lambda histories: analysis_executor.call("agni_analyzer", "predict_agni_trends", histories),
+    name="agni_trend"
+)
+
+def get_agni_trend_batcher() -> MicroBatcher:
+    """Shared Agni trend MicroBatcher instance"""
+    return agni_trend_batcher
@@ -3,24 +3,48 @@ Agni Predictor Service - LSTM Time Series Model
 Digestive power assessment using LSTM neural network
 """
 
-import tensorflow as tf
 import numpy as np
 import structlog
 from typing import Dict, List, Any, Optional, Tuple
 from functools import lru_cache
 import os
 from datetime import datetime, timedelta
+from src.services.ml.inference import create_inference_backend
+from src.services.ml.frameworks import tensorflow
+from src.services.ml.feature_encoding import FeatureEncoder, FlagFeature, NumericFeature
 
 logger = structlog.get_logger()
 
+# Encoding of each daily metric to a feature
+AGNI_FEATURES = {
+    'appetite_score': NumericFeature(0, 10, 10.0),  # 0-1 scale
+    'digestion_quality': NumericFeature(0, 10, 10.0),
+    'bowel_movement_frequency': NumericFeature(0, 3, 3.0),  # 0-3 times per day
+    'energy_level': NumericFeature(0, 10, 10.0),
+    'sleep_quality': NumericFeature(0, 10, 10.0),
+    'stress_level': NumericFeature(0, 10, 10.0),
+    'meal_timing_consistency': FlagFeature(),
+    'water_intake': NumericFeature(0, 3, 3.0),  # 0-3 liters
+    'exercise_frequency': NumericFeature(0, 7, 7.0),  # 0-7 times per week
+    'weather_impact': NumericFeature(-5, 5, 5.0, offset=0.5)  # -5 to 5, normalized to 0-1
+}
+
+# Default feature names for Agni prediction
+DEFAULT_FEATURE_NAMES = list(AGNI_FEATURES)
+
+FORECAST_DAYS = 7
+
 class AgniPredictor:
     """Agni (Digestive Fire) Predictor using LSTM Time Series"""
     
-    def __init__(self, model_path: str = "model/agni_predictor.h5"):
+    def __init__(self, model_path: str = "model/agni_predictor.h5", inference_backend: Optional[str] = None):
         self.model_path = model_path
+        self.inference_backend = inference_backend
         self.model = None
+        self._inference = None
         self.scaler = None
-        self.feature_names = None
+        self.feature_names = list(DEFAULT_FEATURE_NAMES)
+        self._encoder = None
         self.sequence_length = 7  # 7 days of data for prediction
         self._load_model()
     
@@ -32,7 +56,8 @@ class AgniPredictor:
                 return
             
             # Load the LSTM model
-            self.model = tf.keras.models.load_model(self.model_path)
+            self.model = tensorflow().keras.models.load_model(self.model_path)
+            self._inference = create_inference_backend(self.model, self.inference_backend)
             
             # Load scaler and feature names (if available)
             scaler_path = "model/agni_scaler.pkl"
@@ -41,14 +66,10 @@ class AgniPredictor:
                 with open(scaler_path, 'rb') as f:
                     scaler_data = pickle.load(f)
                     self.scaler = scaler_data.get('scaler')
-                    self.feature_names = scaler_data.get('feature_names', [])
-            else:
-                # Default feature names for Agni prediction
-                self.feature_names = [
-                    'appetite_score', 'digestion_quality', 'bowel_movement_frequency',
-                    'energy_level', 'sleep_quality', 'stress_level', 'meal_timing_consistency',
-                    'water_intake', 'exercise_frequency', 'weather_impact'
-                ]
+                    self.feature_names = scaler_data.get('feature_names') or list(DEFAULT_FEATURE_NAMES)
+            
+            # Compile the encoder for this model's features
+            self._get_encoder()
             
             logger.info("Agni predictor LSTM model loaded successfully")
             
@@ -58,40 +79,78 @@ class AgniPredictor:
     
     def predict_agni_trend(self, historical_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Predict Agni trend from historical data"""
+        return self.predict_agni_trends([historical_data])[0]
+    
+    def predict_agni_trends(self, histories: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Predict Agni trends for many patients with a single forward pass"""
         if self.model is None:
             logger.warning("Agni predictor model not available")
-            return self._default_agni_prediction()
+            return [self._default_agni_prediction() for _ in histories]
         
         try:
-            # Prepare time series data
-            features = self._prepare_time_series_data(historical_data)
-            
-            if features is None or len(features) < self.sequence_length:
-                logger.warning("Insufficient historical data for prediction")
-                return self._default_agni_prediction()
-            
-            # Reshape for LSTM input (samples, timesteps, features)
-            X = features.reshape(1, self.sequence_length, -1)
-            
-            # Make prediction
-            prediction = self.model.predict(X, verbose=0)
-            
-            # Interpret prediction
-            agni_score = float(prediction[0][0])
-            trend_direction = self._interpret_agni_trend(agni_score, historical_data)
-            
-            return {
-                'agni_score': agni_score,
-                'trend_direction': trend_direction,
-                'confidence': self._calculate_confidence(features),
-                'prediction_date': datetime.utcnow().isoformat(),
-                'recommendations': self._get_agni_recommendations(agni_score, trend_direction),
-                'next_week_forecast': self._generate_weekly_forecast(features)
-            }
+            results: List[Optional[Dict[str, Any]]] = [None] * len(histories)
+            
+            # Encode each history on its own: histories come from unrelated requests,
+            # so a malformed one only falls back to the default for itself
+            ready, windows = [], []
+            for i, historical_data in enumerate(histories):
+                if len(historical_data) < self.sequence_length:
+                    logger.warning("Insufficient historical data for prediction")
+                    results[i] = self._default_agni_prediction()
+                    continue
+                try:
+                    windows.append(self._encode_daily_metrics(historical_data[-self.sequence_length:]))
+                    ready.append(i)
+                except Exception as e:
+                    logger.error("Agni history encoding failed", error=str(e))
+                    results[i] = self._default_agni_prediction()
+            
+            if ready:
+                # LSTM input (samples, timesteps, features)
+                X = np.stack(windows)
+                
+                # Make prediction
+                predictions = self._run_model(X)
+                
+                # Score the last 3 days and the 7 forecast days of every history in one pass
+                recent = X[:, -3:]
+                forecast = self._forecast_features(X[:, -1])
+                scores = self._calculate_agni_scores_from_features(
+                    np.concatenate([recent, forecast], axis=1).reshape(-1, X.shape[2])
+                ).reshape(len(ready), -1)
+                recent_scores, forecast_scores = scores[:, :recent.shape[1]], scores[:, recent.shape[1]:]
+                
+                for j, i in enumerate(ready):
+                    try:
+                        features = X[j]
+                        
+                        # Interpret prediction
+                        agni_score = float(predictions[j][0])
+                        trend_direction = self._classify_agni_trend(agni_score, recent_scores[j])
+                        
+                        results[i] = {
+                            'agni_score': agni_score,
+                            'trend_direction': trend_direction,
+                            'confidence': self._calculate_confidence(features),
+                            'prediction_date': datetime.utcnow().isoformat(),
+                            'recommendations': self._get_agni_recommendations(agni_score, trend_direction),
+                            'next_week_forecast': self._weekly_forecast_from_scores(forecast_scores[j])
+                        }
+                    except Exception as e:
+                        logger.error("Agni prediction failed", error=str(e))
+                        results[i] = self._default_agni_prediction()
+            
+            return results
             
         except Exception as e:
             logger.error("Agni prediction failed", error=str(e))
-            return self._default_agni_prediction()
+            return [self._default_agni_prediction() for _ in histories]
+    
+    def _run_model(self, X: np.ndarray) -> np.ndarray:
+        """Forward pass through the configured inference backend"""
+        if self._inference is None or self._inference.model is not self.model:
+            self._inference = create_inference_backend(self.model, self.inference_backend)
+        return self._inference(X)
     
     def assess_daily_agni(self, daily_metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Assess daily Agni based on current metrics"""
@@ -140,70 +199,30 @@ class AgniPredictor:
             logger.error("Meal Agni impact prediction failed", error=str(e))
             return self._default_meal_impact_assessment()
     
-    def _prepare_time_series_data(self, historical_data: List[Dict[str, Any]]) -> Optional[np.ndarray]:
-        """Prepare time series data for LSTM input"""
-        try:
-            if len(historical_data) < self.sequence_length:
-                return None
-            
-            # Take the most recent data points
-            recent_data = historical_data[-self.sequence_length:]
-            
-            features = []
-            for data_point in recent_data:
-                feature_vector = self._convert_daily_metrics_to_features(data_point)
-                features.append(feature_vector)
-            
-            return np.array(features)
-            
-        except Exception as e:
-            logger.error("Time series data preparation failed", error=str(e))
-            return None
+    def _get_encoder(self) -> FeatureEncoder:
+        """Encoder for the current feature names, rebuilt only when they change"""
+        if self._encoder is None or self._encoder.feature_names != list(self.feature_names):
+            self._encoder = FeatureEncoder(self.feature_names, AGNI_FEATURES)
+        return self._encoder
+    
+    def _encode_daily_metrics(self, daily_metrics: List[Dict[str, Any]]) -> np.ndarray:
+        """Convert many days of metrics to a days x features matrix in one pass"""
+        return self._get_encoder().encode(daily_metrics)
     
     def _convert_daily_metrics_to_features(self, daily_metrics: Dict[str, Any]) -> np.ndarray:
         """Convert daily metrics to feature vector"""
         try:
-            # Map metrics to numerical values
-            feature_mapping = {
-                'appetite_score': lambda x: min(max(x, 0), 10) / 10.0,  # 0-1 scale
-                'digestion_quality': lambda x: min(max(x, 0), 10) / 10.0,
-                'bowel_movement_frequency': lambda x: min(max(x, 0), 3) / 3.0,  # 0-3 times per day
-                'energy_level': lambda x: min(max(x, 0), 10) / 10.0,
-                'sleep_quality': lambda x: min(max(x, 0), 10) / 10.0,
-                'stress_level': lambda x: min(max(x, 0), 10) / 10.0,
-                'meal_timing_consistency': lambda x: 1.0 if x else 0.0,
-                'water_intake': lambda x: min(max(x, 0), 3) / 3.0,  # 0-3 liters
-                'exercise_frequency': lambda x: min(max(x, 0), 7) / 7.0,  # 0-7 times per week
-                'weather_impact': lambda x: min(max(x, -5), 5) / 5.0 + 0.5  # -5 to 5, normalized to 0-1
-            }
-            
-            features = []
-            for feature_name in self.feature_names:
-                if feature_name in daily_metrics:
-                    try:
-                        value = feature_mapping[feature_name](daily_metrics[feature_name])
-                        features.append(value)
-                    except (KeyError, TypeError):
-                        features.append(0.5)  # Default neutral value
-                else:
-                    features.append(0.5)  # Default neutral value
-            
-            return np.array(features)
+            return self._get_encoder().encode_one(daily_metrics)
             
         except Exception as e:
             logger.error("Feature conversion failed", error=str(e))
             return np.array([0.5] * len(self.feature_names))
     
-    def _interpret_agni_trend(self, agni_score: float, historical_data: List[Dict[str, Any]]) -> str:
-        """Interpret Agni trend direction"""
-        if len(historical_data) < 2:
+    def _classify_agni_trend(self, agni_score: float, recent_scores: np.ndarray) -> str:
+        """Classify trend direction against the recent daily Agni scores"""
+        if len(recent_scores) == 0:
             return "stable"
         
-        # Calculate recent average
-        recent_scores = [self._calculate_agni_score_from_features(
-            self._convert_daily_metrics_to_features(data)
-        ) for data in historical_data[-3:]]
-        
         recent_avg = np.mean(recent_scores)
         
         if agni_score > recent_avg + 0.1:
@@ -227,49 +246,48 @@ class AgniPredictor:
             logger.error("Confidence calculation failed", error=str(e))
             return 0.5
     
-    def _generate_weekly_forecast(self, features: np.ndarray) -> List[Dict[str, Any]]:
-        """Generate 7-day Agni forecast"""
-        try:
-            forecast = []
-            current_features = features[-1].copy()  # Start with most recent data
-            
-            for day in range(7):
-                # Simple trend-based forecast (in practice, use the LSTM model)
-                trend_factor = 0.95 + (day * 0.01)  # Slight upward trend
-                predicted_score = self._calculate_agni_score_from_features(current_features) * trend_factor
-                
-                forecast.append({
-                    'day': day + 1,
-                    'agni_score': float(predicted_score),
-                    'agni_level': self._classify_agni_level(predicted_score),
-                    'confidence': max(0.5, 1.0 - (day * 0.1))  # Decreasing confidence
-                })
-                
-                # Update features for next day (simplified)
-                current_features = current_features * 0.95  # Slight decay
-            
-            return forecast
-            
-        except Exception as e:
-            logger.error("Weekly forecast generation failed", error=str(e))
-            return []
+    def _forecast_features(self, latest_features: np.ndarray) -> np.ndarray:
+        """Feature vectors for the next 7 days from each history's most recent day: (histories, 7, features)"""
+        # Simple trend-based forecast (in practice, use the LSTM model): features decay slightly each day
+        decay = 0.95 ** np.arange(FORECAST_DAYS)
+        return latest_features[:, np.newaxis, :] * decay[np.newaxis, :, np.newaxis]
+    
+    def _weekly_forecast_from_scores(self, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """7-day forecast entries from the Agni scores of the forecast days"""
+        forecast = []
+        for day, score in enumerate(scores.tolist()):
+            trend_factor = 0.95 + (day * 0.01)  # Slight upward trend
+            predicted_score = score * trend_factor
+            
+            forecast.append({
+                'day': day + 1,
+                'agni_score': float(predicted_score),
+                'agni_level': self._classify_agni_level(predicted_score),
+                'confidence': max(0.5, 1.0 - (day * 0.1))  # Decreasing confidence
+            })
+        
+        return forecast
     
     def _calculate_agni_score_from_features(self, features: np.ndarray) -> float:
         """Calculate Agni score from feature vector"""
+        return float(self._calculate_agni_scores_from_features(features.reshape(1, -1))[0])
+    
+    def _calculate_agni_scores_from_features(self, features: np.ndarray) -> np.ndarray:
+        """Calculate Agni scores for many feature vectors at once"""
         try:
             if self.model is None:
                 # Simple weighted average when model is not available
                 weights = np.array([0.2, 0.2, 0.15, 0.15, 0.1, 0.1, 0.05, 0.03, 0.01, 0.01])
-                return float(np.dot(features, weights))
+                return features @ weights
             
             # Use model for prediction
-            X = features.reshape(1, 1, -1)  # Single timestep
-            prediction = self.model.predict(X, verbose=0)
-            return float(prediction[0][0])
+            X = features.reshape(len(features), 1, -1)  # Single timestep each
+            prediction = self._run_model(X)
+            return prediction[:, 0].astype(np.float64)
             
         except Exception as e:
             logger.error("Agni score calculation failed", error=str(e))
-            return 0.5
+            return np.full(len(features), 0.5)
     
     def _classify_agni_level(self, agni_score: float) -> str:
         """Classify Agni level based on score"""
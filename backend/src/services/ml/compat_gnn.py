@@ -3,44 +3,70 @@ Food Compatibility GNN Service
 Integrates with the existing ayurvedic_compatibility_gnn.h5 model
 """
 
-import tensorflow as tf
 import numpy as np
 import structlog
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from functools import lru_cache
 import os
+from src.services.ml.compat_matrix import CompatibilityMatrix, model_fingerprint
+from src.services.ml.inference import create_inference_backend
+from src.services.ml.frameworks import tensorflow
 
 logger = structlog.get_logger()
 
 class CompatibilityGNN:
     """Food compatibility analysis using Graph Neural Network"""
     
-    def __init__(self, model_path: str = "model/ayurvedic_compatibility_gnn.h5"):
+    def __init__(self, model_path: str = "model/ayurvedic_compatibility_gnn.h5",
+                 encoders_path: str = "model/compatibility_encoders.pkl",
+                 matrix_path: Optional[str] = "model/compatibility_matrix.npy",
+                 inference_backend: Optional[str] = None):
         self.model_path = model_path
+        self.encoders_path = encoders_path
+        self.matrix_path = matrix_path
+        self.inference_backend = inference_backend
         self.model = None
+        self._inference = None
+        self.score_matrix = None
         self.food_embeddings = None
         self.food_to_index = {}
         self._load_model()
     
+    @property
+    def is_available(self) -> bool:
+        """Whether pairs can be scored, by table lookup or by the live model"""
+        return self.score_matrix is not None or self.model is not None
+    
     def _load_model(self):
-        """Load the trained GNN model and food embeddings"""
+        """Load the precomputed score table, or the trained GNN model and food embeddings"""
         try:
             if not os.path.exists(self.model_path):
-                logger.warning(f"Model file not found: {model_path}")
+                logger.warning(f"Model file not found: {self.model_path}")
                 return
             
-            # Load the GNN model
-            self.model = tf.keras.models.load_model(self.model_path)
-            
             # Load food embeddings and mappings
-            embeddings_path = "model/compatibility_encoders.pkl"
-            if os.path.exists(embeddings_path):
+            if os.path.exists(self.encoders_path):
                 import pickle
-                with open(embeddings_path, 'rb') as f:
+                with open(self.encoders_path, 'rb') as f:
                     data = pickle.load(f)
                     self.food_embeddings = data.get('embeddings')
                     self.food_to_index = data.get('food_to_index', {})
             
+            # A fresh precomputed table answers every pair without TensorFlow
+            if self.matrix_path:
+                self.score_matrix = CompatibilityMatrix.load(
+                    self.matrix_path,
+                    model_fingerprint(self.model_path, self.encoders_path),
+                    len(self.food_to_index)
+                )
+                if self.score_matrix is not None:
+                    logger.info("Compatibility matrix loaded", path=self.matrix_path)
+                    return
+            
+            # Load the GNN model
+            self.model = tensorflow().keras.models.load_model(self.model_path)
+            self._inference = create_inference_backend(self.model, self.inference_backend)
+            
             logger.info("Compatibility GNN model loaded successfully")
             
         except Exception as e:
@@ -50,7 +76,7 @@ class CompatibilityGNN:
     @lru_cache(maxsize=256)
     def check_compatibility(self, food1: str, food2: str) -> Dict[str, Any]:
         """Check compatibility between two foods"""
-        if self.model is None:
+        if not self.is_available:
             logger.warning("Compatibility GNN model not available")
             return self._default_compatibility()
         
@@ -63,35 +89,9 @@ class CompatibilityGNN:
                 logger.warning(f"Food not found in embeddings: {food1}, {food2}")
                 return self._default_compatibility()
             
-            # Create adjacency matrix for the two foods
-            num_foods = len(self.food_to_index)
-            adj_matrix = np.zeros((num_foods, num_foods))
-            adj_matrix[idx1, idx2] = 1
-            adj_matrix[idx2, idx1] = 1
-            
-            # Get embeddings for both foods
-            food1_embedding = self.food_embeddings[idx1]
-            food2_embedding = self.food_embeddings[idx2]
-            
-            # Prepare input for GNN
-            node_features = np.vstack([food1_embedding, food2_embedding])
-            adj_matrix_subset = adj_matrix[:2, :2]
-            
             # Make prediction
-            prediction = self.model.predict([
-                node_features.reshape(1, 2, -1),
-                adj_matrix_subset.reshape(1, 2, 2)
-            ])
-            
-            compatibility_score = float(prediction[0][0])
-            is_compatible = compatibility_score > 0.5
-            
-            return {
-                'compatible': is_compatible,
-                'score': compatibility_score,
-                'explanation': self._get_compatibility_explanation(food1, food2, compatibility_score),
-                'recommendations': self._get_compatibility_recommendations(food1, food2, is_compatible)
-            }
+            compatibility_score = float(self._score_pairs(np.array([idx1]), np.array([idx2]))[0])
+            return self._compatibility_result(food1, food2, compatibility_score)
             
         except Exception as e:
             logger.error("Compatibility check failed", error=str(e))
@@ -99,16 +99,22 @@ class CompatibilityGNN:
     
     def check_meal_compatibility(self, foods: List[str]) -> Dict[str, Any]:
         """Check compatibility of multiple foods in a meal"""
-        if len(foods) < 2:
-            return {'compatible': True, 'score': 1.0, 'conflicts': []}
-        
-        conflicts = []
-        total_score = 0
-        comparisons = 0
+        return self.check_meals_compatibility([foods])[0]
+    
+    def check_meals_compatibility(self, meals: List[List[str]]) -> List[Dict[str, Any]]:
+        """Check compatibility of many meals, scoring all distinct pairs in one model call"""
+        results = []
         
-        for i in range(len(foods)):
-            for j in range(i + 1, len(foods)):
-                result = self.check_compatibility(foods[i], foods[j])
+        for foods, pair_results in zip(meals, self._check_meals_pairs(meals)):
+            if len(foods) < 2:
+                results.append({'compatible': True, 'score': 1.0, 'conflicts': []})
+                continue
+            
+            conflicts = []
+            total_score = 0
+            comparisons = 0
+            
+            for i, j, result in pair_results:
                 total_score += result['score']
                 comparisons += 1
                 
@@ -119,15 +125,112 @@ class CompatibilityGNN:
                         'score': result['score'],
                         'explanation': result['explanation']
                     })
+            
+            avg_score = total_score / comparisons if comparisons > 0 else 1.0
+            is_compatible = len(conflicts) == 0
+            
+            results.append({
+                'compatible': is_compatible,
+                'score': avg_score,
+                'conflicts': conflicts,
+                'recommendations': self._get_meal_recommendations(conflicts)
+            })
+        
+        return results
+    
+    def _check_meals_pairs(self, meals: List[List[str]]) -> List[List[Tuple[int, int, Dict[str, Any]]]]:
+        """Check every food pair of every meal, scoring all distinct known pairs in one call"""
+        # Pairs in the same (i, j) order as a nested i < j loop
+        meal_pairs = [np.triu_indices(len(foods), k=1) for foods in meals]
+        results = [[self._default_compatibility() for _ in range(len(pair_i))] for pair_i, _ in meal_pairs]
+        
+        if not self.is_available:
+            logger.warning("Compatibility GNN model not available")
+        else:
+            # Gather the known pairs of all meals: (meal, position, idx1, idx2)
+            pair_meal, pair_position, pair_idx1, pair_idx2 = [], [], [], []
+            unknown = set()
+            for meal_number, (foods, (pair_i, pair_j)) in enumerate(zip(meals, meal_pairs)):
+                indices = np.array([self.food_to_index.get(food.lower(), -1) for food in foods], dtype=np.int64)
+                unknown.update(food for food, idx in zip(foods, indices) if idx < 0)
+                
+                known = np.nonzero((indices[pair_i] >= 0) & (indices[pair_j] >= 0))[0]
+                pair_meal.extend([meal_number] * len(known))
+                pair_position.extend(known.tolist())
+                pair_idx1.extend(indices[pair_i[known]].tolist())
+                pair_idx2.extend(indices[pair_j[known]].tolist())
+            
+            if unknown:
+                logger.warning("Foods not found in embeddings", foods=sorted(unknown))
+            
+            if pair_idx1:
+                try:
+                    # Score each distinct (food1, food2) pair once across the whole batch
+                    pair_idx1 = np.array(pair_idx1, dtype=np.int64)
+                    pair_idx2 = np.array(pair_idx2, dtype=np.int64)
+                    keys = pair_idx1 * max(len(self.food_to_index), 1) + pair_idx2
+                    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+                    scores = self._score_pairs(pair_idx1[first], pair_idx2[first])[inverse.reshape(-1)]
+                    
+                    for meal_number, position, score in zip(pair_meal, pair_position, scores.tolist()):
+                        pair_i, pair_j = meal_pairs[meal_number]
+                        foods = meals[meal_number]
+                        food1, food2 = foods[pair_i[position]], foods[pair_j[position]]
+                        results[meal_number][position] = self._compatibility_result(food1, food2, float(score))
+                except Exception as e:
+                    logger.error("Meal compatibility scoring failed", error=str(e))
+        
+        return [
+            list(zip(pair_i.tolist(), pair_j.tolist(), meal_results))
+            for (pair_i, pair_j), meal_results in zip(meal_pairs, results)
+        ]
+    
+    def _score_pairs(self, idx1: np.ndarray, idx2: np.ndarray) -> np.ndarray:
+        """Score many food pairs, from the precomputed table when available"""
+        if self.score_matrix is not None:
+            return self.score_matrix.lookup(idx1, idx2)
+        return self.predict_pair_scores(idx1, idx2)
+    
+    def predict_pair_scores(self, idx1: np.ndarray, idx2: np.ndarray) -> np.ndarray:
+        """Score many food pairs with a single live model invocation"""
+        embeddings = np.asarray(self.food_embeddings)
+        
+        # (pairs, 2, embedding_dim) node features gathered in one operation
+        node_features = np.stack([embeddings[idx1], embeddings[idx2]], axis=1)
+        adjacency = self._pair_adjacency(idx1, idx2)
         
-        avg_score = total_score / comparisons if comparisons > 0 else 1.0
-        is_compatible = len(conflicts) == 0
+        prediction = self._run_model([node_features, adjacency])
+        return np.asarray(prediction).reshape(len(idx1), -1)[:, 0]
+    
+    def _run_model(self, inputs: List[np.ndarray]) -> np.ndarray:
+        """Forward pass through the configured inference backend"""
+        if self._inference is None or self._inference.model is not self.model:
+            self._inference = create_inference_backend(self.model, self.inference_backend)
+        return self._inference(inputs)
+    
+    @staticmethod
+    def _pair_adjacency(idx1: np.ndarray, idx2: np.ndarray) -> np.ndarray:
+        """Top-left 2x2 block of each pair's food graph adjacency, as fed to the model
+        
+        Equivalent to marking (idx1, idx2) in a num_foods x num_foods matrix and
+        slicing [:2, :2], without allocating the dense matrix.
+        """
+        adjacency = np.zeros((len(idx1), 2, 2))
+        in_block = (idx1 < 2) & (idx2 < 2)
+        rows = np.nonzero(in_block)[0]
+        adjacency[rows, idx1[in_block], idx2[in_block]] = 1
+        adjacency[rows, idx2[in_block], idx1[in_block]] = 1
+        return adjacency
+    
+    def _compatibility_result(self, food1: str, food2: str, compatibility_score: float) -> Dict[str, Any]:
+        """Build the compatibility result for a scored pair"""
+        is_compatible = compatibility_score > 0.5
         
         return {
             'compatible': is_compatible,
-            'score': avg_score,
-            'conflicts': conflicts,
-            'recommendations': self._get_meal_recommendations(conflicts)
+            'score': compatibility_score,
+            'explanation': self._get_compatibility_explanation(food1, food2, compatibility_score),
+            'recommendations': self._get_compatibility_recommendations(food1, food2, is_compatible)
         }
     
     def _default_compatibility(self) -> Dict[str, Any]:
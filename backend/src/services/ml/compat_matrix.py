@@ -0,0 +1,154 @@
+"""
+Precomputed Food Compatibility Matrix
+Offline food x food score table served by memory-mapped lookup
+
+Build with:
+    python -m src.services.ml.compat_matrix --output model/compatibility_matrix.npy
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+import structlog
+from typing import Any, Dict, Optional
+
+logger = structlog.get_logger()
+
+FORMAT_VERSION = 1
+
+def _file_digest(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def model_fingerprint(model_path: str, encoders_path: str) -> Optional[str]:
+    """Fingerprint of the model and encoders a score table was built from"""
+    if not os.path.exists(model_path) or not os.path.exists(encoders_path):
+        return None
+
+    digest = hashlib.sha256()
+    digest.update(_file_digest(model_path).encode())
+    digest.update(_file_digest(encoders_path).encode())
+    return digest.hexdigest()
+
+def _metadata_path(matrix_path: str) -> str:
+    return f"{matrix_path}.json"
+
+def packed_size(num_foods: int) -> int:
+    """Number of entries in an upper-triangular table (diagonal included)"""
+    return num_foods * (num_foods + 1) // 2
+
+def packed_index(idx1: np.ndarray, idx2: np.ndarray, num_foods: int) -> np.ndarray:
+    """Position of each (idx1, idx2) pair in the packed upper-triangular table"""
+    row = np.minimum(idx1, idx2).astype(np.int64)
+    col = np.maximum(idx1, idx2).astype(np.int64)
+    return row * num_foods - row * (row - 1) // 2 + (col - row)
+
+class CompatibilityMatrix:
+    """Memory-mapped float16 upper-triangular food compatibility scores"""
+
+    def __init__(self, scores: np.ndarray, num_foods: int):
+        self.scores = scores
+        self.num_foods = num_foods
+
+    @classmethod
+    def load(cls, matrix_path: str, fingerprint: Optional[str], num_foods: int) -> Optional["CompatibilityMatrix"]:
+        """Memory-map a score table, or return None if it is missing or stale"""
+        metadata_path = _metadata_path(matrix_path)
+        if fingerprint is None or not os.path.exists(matrix_path) or not os.path.exists(metadata_path):
+            return None
+
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+
+            if (metadata.get('format_version') != FORMAT_VERSION or
+                    metadata.get('fingerprint') != fingerprint or
+                    metadata.get('num_foods') != num_foods):
+                logger.warning("Compatibility matrix is stale, ignoring", path=matrix_path)
+                return None
+
+            scores = np.load(matrix_path, mmap_mode='r')
+            if scores.shape != (packed_size(num_foods),):
+                logger.warning("Compatibility matrix has unexpected shape, ignoring", path=matrix_path)
+                return None
+
+            return cls(scores, num_foods)
+
+        except Exception as e:
+            logger.error("Failed to load compatibility matrix", error=str(e))
+            return None
+
+    def lookup(self, idx1: np.ndarray, idx2: np.ndarray) -> np.ndarray:
+        """Scores for many food index pairs"""
+        positions = packed_index(np.asarray(idx1), np.asarray(idx2), self.num_foods)
+        return self.scores[positions].astype(np.float64)
+
+def build_compatibility_matrix(gnn, output_path: str, chunk_size: int = 65536) -> Dict[str, Any]:
+    """Score every food pair with the live model and write the packed table"""
+    if gnn.model is None:
+        raise RuntimeError("Compatibility GNN model not available")
+
+    fingerprint = model_fingerprint(gnn.model_path, gnn.encoders_path)
+    num_foods = len(gnn.food_to_index)
+    total = packed_size(num_foods)
+
+    scores = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float16, shape=(total,))
+
+    # Rows are written in packed order, so each chunk is a contiguous slice
+    position = 0
+    row = 0
+    while row < num_foods:
+        rows = []
+        pairs = 0
+        while row < num_foods and (not rows or pairs + (num_foods - row) <= chunk_size):
+            rows.append(row)
+            pairs += num_foods - row
+            row += 1
+
+        idx1 = np.concatenate([np.full(num_foods - r, r) for r in rows])
+        idx2 = np.concatenate([np.arange(r, num_foods) for r in rows])
+        scores[position:position + pairs] = gnn.predict_pair_scores(idx1, idx2)
+        position += pairs
+
+    scores.flush()
+    del scores
+
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'fingerprint': fingerprint,
+        'num_foods': num_foods,
+        'dtype': 'float16',
+        'layout': 'upper_triangular'
+    }
+    with open(_metadata_path(output_path), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    logger.info("Compatibility matrix built", path=output_path, num_foods=num_foods, pairs=total)
+    return metadata
+
+def main():
+    """Build the compatibility matrix from the command line"""
+    from src.services.ml.compat_gnn import CompatibilityGNN
+
+    parser = argparse.ArgumentParser(description="Precompute the food compatibility score table")
+    parser.add_argument("--model-path", default="model/ayurvedic_compatibility_gnn.h5")
+    parser.add_argument("--encoders-path", default="model/compatibility_encoders.pkl")
+    parser.add_argument("--output", default="model/compatibility_matrix.npy")
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    gnn = CompatibilityGNN(
+        model_path=args.model_path,
+        encoders_path=args.encoders_path,
+        matrix_path=None
+    )
+    build_compatibility_matrix(gnn, args.output, chunk_size=args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,38 @@ import structlog
 from typing import Dict, List, Any
 from functools import lru_cache
 import os
+from src.services.ml.frameworks import lazy_import
+from src.services.ml.feature_encoding import CategoricalFeature, FeatureEncoder, NumericFeature
 
 logger = structlog.get_logger()
 
+# Encoding of each patient field to a 0-1 feature
+DOSHA_FEATURES = {
+    'age': NumericFeature(None, 100, 100.0),  # Normalize age
+    'gender': CategoricalFeature({'male': 1.0}, unknown=0.0),
+    'body_type': CategoricalFeature({'thin': 0.0, 'medium': 0.5, 'heavy': 1.0}),
+    'skin_type': CategoricalFeature({'dry': 0.0, 'normal': 0.5, 'oily': 1.0}),
+    'hair_type': CategoricalFeature({'dry': 0.0, 'normal': 0.5, 'oily': 1.0}),
+    'appetite': CategoricalFeature({'low': 0.0, 'normal': 0.5, 'high': 1.0}),
+    'digestion': CategoricalFeature({'slow': 0.0, 'normal': 0.5, 'fast': 1.0}),
+    'sleep_pattern': CategoricalFeature({'light': 0.0, 'normal': 0.5, 'deep': 1.0}),
+    'energy_level': CategoricalFeature({'low': 0.0, 'moderate': 0.5, 'high': 1.0}),
+    'mood_stability': CategoricalFeature({'unstable': 0.0, 'moderate': 0.5, 'stable': 1.0}),
+    'weather_preference': CategoricalFeature({'cold': 0.0, 'moderate': 0.5, 'warm': 1.0}),
+    'exercise_tolerance': CategoricalFeature({'low': 0.0, 'moderate': 0.5, 'high': 1.0})
+}
+
+# Default feature names for dosha classification
+DEFAULT_FEATURE_NAMES = list(DOSHA_FEATURES)
+
 class DoshaClassifier:
     """Dosha (Prakriti) classification service"""
     
     def __init__(self, model_path: str = "model/dosha_classifier.pkl"):
         self.model_path = model_path
         self.model = None
-        self.feature_names = None
+        self.feature_names = list(DEFAULT_FEATURE_NAMES)
+        self._encoder = None
         self._load_model()
     
     def _load_model(self):
@@ -28,21 +50,20 @@ class DoshaClassifier:
                 logger.warning(f"Model file not found: {self.model_path}")
                 return
             
+            # Unpickling pulls in the estimator's framework; import it up front so its cost is recorded
+            lazy_import("sklearn", optional=True)
             with open(self.model_path, 'rb') as f:
                 model_data = pickle.load(f)
             
             # Handle different model formats
             if isinstance(model_data, dict):
                 self.model = model_data.get('model')
-                self.feature_names = model_data.get('feature_names', [])
+                self.feature_names = model_data.get('feature_names') or list(DEFAULT_FEATURE_NAMES)
             else:
                 self.model = model_data
-                # Default feature names for dosha classification
-                self.feature_names = [
-                    'age', 'gender', 'body_type', 'skin_type', 'hair_type',
-                    'appetite', 'digestion', 'sleep_pattern', 'energy_level',
-                    'mood_stability', 'weather_preference', 'exercise_tolerance'
-                ]
+            
+            # Compile the encoder for this model's features
+            self._get_encoder()
             
             logger.info("Dosha classifier model loaded successfully")
             
@@ -61,27 +82,48 @@ class DoshaClassifier:
             # Convert tuple back to numpy array
             features_array = np.array(features).reshape(1, -1)
             
-            # Make prediction
-            prediction = self.model.predict(features_array)[0]
-            probabilities = self.model.predict_proba(features_array)[0]
-            
-            # Map to dosha names
-            dosha_names = ['vata', 'pitta', 'kapha']
-            dosha_scores = dict(zip(dosha_names, probabilities))
+            # Labels follow from the probabilities; no separate predict call
+            probabilities = self.model.predict_proba(features_array)
+            return self._predictions_from_probabilities(probabilities)[0]
             
-            # Determine primary dosha
-            primary_dosha = dosha_names[np.argmax(probabilities)]
+        except Exception as e:
+            logger.error("Dosha prediction failed", error=str(e))
+            return self._default_dosha_prediction()
+    
+    def predict_dosha_batch(self, patients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Predict dosha constitutions for many patients with one predict_proba call"""
+        if not patients:
+            return []
+        
+        if self.model is None:
+            logger.warning("Dosha classifier model not available")
+            return [self._default_dosha_prediction() for _ in patients]
+        
+        try:
+            features = self.encode_patient_features(patients)
+            return self._predictions_from_probabilities(self.model.predict_proba(features))
             
-            return {
+        except Exception as e:
+            logger.error("Batch dosha prediction failed", error=str(e), patients=len(patients))
+            return [self._default_dosha_prediction() for _ in patients]
+    
+    def _predictions_from_probabilities(self, probabilities: np.ndarray) -> List[Dict[str, Any]]:
+        """Prediction dicts from a patients x doshas probability matrix"""
+        dosha_names = ['vata', 'pitta', 'kapha']
+        probabilities = np.asarray(probabilities, dtype=float)
+        primary = probabilities.argmax(axis=1)
+        
+        predictions = []
+        for row, index in zip(probabilities.tolist(), primary.tolist()):
+            dosha_scores = dict(zip(dosha_names, row))
+            primary_dosha = dosha_names[index]
+            predictions.append({
                 'primary_dosha': primary_dosha,
                 'dosha_scores': dosha_scores,
-                'confidence': float(np.max(probabilities)),
+                'confidence': row[index],
                 'recommendations': self._get_dosha_recommendations(primary_dosha, dosha_scores)
-            }
-            
-        except Exception as e:
-            logger.error("Dosha prediction failed", error=str(e))
-            return self._default_dosha_prediction()
+            })
+        return predictions
     
     def _default_dosha_prediction(self) -> Dict[str, Any]:
         """Return default dosha prediction when model is unavailable"""
@@ -126,33 +168,16 @@ class DoshaClassifier:
         
         return base_rec
     
+    def _get_encoder(self) -> FeatureEncoder:
+        """Encoder for the current feature names, rebuilt only when they change"""
+        if self._encoder is None or self._encoder.feature_names != list(self.feature_names):
+            self._encoder = FeatureEncoder(self.feature_names, DOSHA_FEATURES)
+        return self._encoder
+    
+    def encode_patient_features(self, patients: List[Dict[str, Any]]) -> np.ndarray:
+        """Convert many patients' data to a patients x features matrix in one pass"""
+        return self._get_encoder().encode(patients)
+    
     def analyze_patient_features(self, patient_data: Dict[str, Any]) -> tuple:
         """Convert patient data to feature vector for prediction"""
-        # Map patient data to numerical features
-        feature_mapping = {
-            'age': lambda x: min(x / 100.0, 1.0),  # Normalize age
-            'gender': lambda x: 1.0 if x.lower() == 'male' else 0.0,
-            'body_type': lambda x: {'thin': 0.0, 'medium': 0.5, 'heavy': 1.0}.get(x.lower(), 0.5),
-            'skin_type': lambda x: {'dry': 0.0, 'normal': 0.5, 'oily': 1.0}.get(x.lower(), 0.5),
-            'hair_type': lambda x: {'dry': 0.0, 'normal': 0.5, 'oily': 1.0}.get(x.lower(), 0.5),
-            'appetite': lambda x: {'low': 0.0, 'normal': 0.5, 'high': 1.0}.get(x.lower(), 0.5),
-            'digestion': lambda x: {'slow': 0.0, 'normal': 0.5, 'fast': 1.0}.get(x.lower(), 0.5),
-            'sleep_pattern': lambda x: {'light': 0.0, 'normal': 0.5, 'deep': 1.0}.get(x.lower(), 0.5),
-            'energy_level': lambda x: {'low': 0.0, 'moderate': 0.5, 'high': 1.0}.get(x.lower(), 0.5),
-            'mood_stability': lambda x: {'unstable': 0.0, 'moderate': 0.5, 'stable': 1.0}.get(x.lower(), 0.5),
-            'weather_preference': lambda x: {'cold': 0.0, 'moderate': 0.5, 'warm': 1.0}.get(x.lower(), 0.5),
-            'exercise_tolerance': lambda x: {'low': 0.0, 'moderate': 0.5, 'high': 1.0}.get(x.lower(), 0.5)
-        }
-        
-        features = []
-        for feature_name in self.feature_names:
-            if feature_name in patient_data:
-                try:
-                    value = feature_mapping[feature_name](patient_data[feature_name])
-                    features.append(value)
-                except (KeyError, TypeError):
-                    features.append(0.5)  # Default neutral value
-            else:
-                features.append(0.5)  # Default neutral value
-        
-        return tuple(features)
+        return tuple(self._get_encoder().encode_one(patient_data).tolist())
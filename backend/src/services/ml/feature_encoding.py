@@ -0,0 +1,86 @@
+"""
+Feature Encoding
+Record-to-matrix encoders compiled once per model: lookup tables for categorical
+fields and NumPy clip/scale for numeric ones, applied a column at a time
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+NEUTRAL_VALUE = 0.5  # Encoded value of missing or unreadable fields
+
+class CategoricalFeature:
+    """Case-insensitive lookup table; unlisted strings map to `unknown`"""
+
+    def __init__(self, table: Dict[str, float], unknown: float = NEUTRAL_VALUE):
+        self.table = {key.lower(): float(value) for key, value in table.items()}
+        self.unknown = float(unknown)
+
+    def encode_value(self, value: Any) -> float:
+        return self.table.get(value.lower(), self.unknown) if isinstance(value, str) else NEUTRAL_VALUE
+
+    def encode(self, values: List[Any]) -> np.ndarray:
+        table, unknown = self.table, self.unknown
+        return np.fromiter(
+            (table.get(value.lower(), unknown) if isinstance(value, str) else NEUTRAL_VALUE for value in values),
+            dtype=np.float64, count=len(values)
+        )
+
+class NumericFeature:
+    """clip(value, low, high) / scale + offset"""
+
+    def __init__(self, low: Optional[float], high: Optional[float], scale: float, offset: float = 0.0):
+        self.low = -np.inf if low is None else low
+        self.high = np.inf if high is None else high
+        self.scale = scale
+        self.offset = offset
+
+    def encode_value(self, value: Any) -> float:
+        if not isinstance(value, (int, float, np.number)) or value != value:
+            return NEUTRAL_VALUE
+        return min(max(value, self.low), self.high) / self.scale + self.offset
+
+    def encode(self, values: List[Any]) -> np.ndarray:
+        raw = np.fromiter(
+            (value if isinstance(value, (int, float, np.number)) else np.nan for value in values),
+            dtype=np.float64, count=len(values)
+        )
+        encoded = np.clip(raw, self.low, self.high) / self.scale + self.offset
+        return np.where(np.isnan(encoded), NEUTRAL_VALUE, encoded)
+
+class FlagFeature:
+    """1.0 for truthy values, 0.0 otherwise"""
+
+    def encode_value(self, value: Any) -> float:
+        return 1.0 if value else 0.0
+
+    def encode(self, values: List[Any]) -> np.ndarray:
+        return np.fromiter((1.0 if value else 0.0 for value in values), dtype=np.float64, count=len(values))
+
+class FeatureEncoder:
+    """Encodes dict records into a records x features matrix in feature_names order
+
+    Absent fields, and features with no known encoding, take the neutral value.
+    """
+
+    def __init__(self, feature_names: Sequence[str], features: Dict[str, Any]):
+        self.feature_names = list(feature_names)
+        self._columns = [(name, features.get(name)) for name in self.feature_names]
+
+    def encode(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """Feature matrix with one row per record"""
+        matrix = np.full((len(records), len(self._columns)), NEUTRAL_VALUE)
+        for j, (name, feature) in enumerate(self._columns):
+            if feature is None:
+                continue
+            present = [i for i, record in enumerate(records) if name in record]
+            if present:
+                matrix[present, j] = feature.encode([records[i][name] for i in present])
+        return matrix
+
+    def encode_one(self, record: Dict[str, Any]) -> np.ndarray:
+        """Feature vector of a single record, without per-column array overhead"""
+        return np.array([
+            feature.encode_value(record[name]) if feature is not None and name in record else NEUTRAL_VALUE
+            for name, feature in self._columns
+        ])
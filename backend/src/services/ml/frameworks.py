@@ -0,0 +1,70 @@
+"""
+ML Framework Imports
+Deferred, timed imports of heavy ML frameworks (TensorFlow, scikit-learn, Torch)
+"""
+
+import importlib
+import sys
+import threading
+import time
+import structlog
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+logger = structlog.get_logger()
+
+_import_times: Dict[str, float] = {}
+_app_import_times: Dict[str, float] = {}
+_lock = threading.Lock()
+
+def lazy_import(name: str, optional: bool = False) -> Optional[ModuleType]:
+    """Import a module on first use and record how long the import took
+
+    Optional modules return None when they are not installed.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            if not optional:
+                raise
+            logger.warning("Optional ML framework not installed", module=name, error=str(e))
+            return None
+
+        _import_times[name] = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("ML framework imported", module=name, import_time_ms=_import_times[name])
+        return module
+
+def tensorflow() -> ModuleType:
+    """The tensorflow module, imported on first use"""
+    return lazy_import("tensorflow")
+
+def is_imported(name: str) -> bool:
+    """Whether a module has already been imported in this process"""
+    return name in sys.modules
+
+@contextmanager
+def track_imports(label: str):
+    """Record how long a block of application imports takes"""
+    start = time.perf_counter()
+    yield
+    _app_import_times[label] = round((time.perf_counter() - start) * 1000, 2)
+
+def import_report() -> Dict[str, Any]:
+    """Import time per application module group and deferred framework"""
+    return {
+        'app_import_time_ms': dict(_app_import_times),
+        'framework_import_time_ms': dict(_import_times),
+        'frameworks_loaded': {
+            name: is_imported(name) for name in ('tensorflow', 'sklearn', 'xgboost', 'torch')
+        }
+    }
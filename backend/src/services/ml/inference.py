@@ -0,0 +1,151 @@
+"""
+ML Inference Backends
+Lightweight alternatives to Keras model.predict for small, latency-sensitive inputs
+"""
+
+import threading
+import numpy as np
+import structlog
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.services.ml.frameworks import tensorflow
+
+logger = structlog.get_logger()
+
+ModelInputs = Union[np.ndarray, Sequence[np.ndarray]]
+
+INFERENCE_BACKENDS = ("keras", "tf_function", "tflite")
+
+_default_backend = "tf_function"
+
+def set_default_backend(name: str):
+    """Select the backend used by models that do not request one explicitly"""
+    global _default_backend
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    _default_backend = name
+
+def get_default_backend() -> str:
+    """Backend used by models that do not request one explicitly"""
+    return _default_backend
+
+def _as_input_list(inputs: ModelInputs) -> List[np.ndarray]:
+    if isinstance(inputs, (list, tuple)):
+        return [np.asarray(x, dtype=np.float32) for x in inputs]
+    return [np.asarray(inputs, dtype=np.float32)]
+
+def _batch_size(inputs: ModelInputs) -> int:
+    return len(inputs[0]) if isinstance(inputs, (list, tuple)) else len(inputs)
+
+class KerasPredictBackend:
+    """Plain model.predict (also used for any non-Keras model object)"""
+
+    name = "keras"
+
+    def __init__(self, model: Any):
+        self.model = model
+
+    def __call__(self, inputs: ModelInputs) -> np.ndarray:
+        return np.asarray(self.model.predict(inputs, batch_size=_batch_size(inputs), verbose=0))
+
+class CompiledFunctionBackend:
+    """Model forward pass traced once as a tf.function with a fixed input signature"""
+
+    name = "tf_function"
+
+    def __init__(self, model: Any):
+        tf = tensorflow()
+
+        self.model = model
+        self._multi_input = len(model.inputs) > 1
+        # Batch dimension left open so every batch size reuses one graph
+        signature = [
+            tf.TensorSpec(shape=[None, *x.shape[1:]], dtype=tf.float32)
+            for x in model.inputs
+        ]
+
+        if self._multi_input:
+            self._forward = tf.function(
+                lambda *xs: model(list(xs), training=False),
+                input_signature=signature
+            )
+        else:
+            self._forward = tf.function(
+                lambda x: model(x, training=False),
+                input_signature=signature
+            )
+
+    def __call__(self, inputs: ModelInputs) -> np.ndarray:
+        return self._forward(*_as_input_list(inputs)).numpy()
+
+class TFLiteBackend:
+    """Model converted in memory to TFLite and run by the TFLite interpreter
+
+    Recurrent layers that need TF select ops do not convert; those models fall
+    back to model.predict in create_inference_backend.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model: Any):
+        tf = tensorflow()
+
+        self.model = model
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        self._interpreter = tf.lite.Interpreter(model_content=converter.convert())
+        self._input_indexes = self._match_inputs(model, self._interpreter.get_input_details())
+        self._output_index = self._interpreter.get_output_details()[0]['index']
+        self._batch = None
+        # The interpreter is not thread-safe
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _match_inputs(model: Any, input_details: List[Dict[str, Any]]) -> List[Tuple[int, List[int]]]:
+        """Interpreter tensor index and shape for each Keras input, matched by shape then order"""
+        remaining = list(input_details)
+        matched = []
+        for x in model.inputs:
+            shape = tuple(x.shape[1:])
+            detail = next((d for d in remaining if tuple(d['shape'][1:]) == shape), remaining[0])
+            remaining.remove(detail)
+            matched.append((detail['index'], list(detail['shape'][1:])))
+        return matched
+
+    def __call__(self, inputs: ModelInputs) -> np.ndarray:
+        arrays = _as_input_list(inputs)
+        batch = len(arrays[0])
+
+        with self._lock:
+            # Resizing re-plans the graph, so only do it when the batch size changes
+            if batch != self._batch:
+                for index, shape in self._input_indexes:
+                    self._interpreter.resize_tensor_input(index, [batch, *shape])
+                self._interpreter.allocate_tensors()
+                self._batch = batch
+
+            for array, (index, _) in zip(arrays, self._input_indexes):
+                self._interpreter.set_tensor(index, array)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index).copy()
+
+_BACKEND_CLASSES: Dict[str, Any] = {
+    "keras": KerasPredictBackend,
+    "tf_function": CompiledFunctionBackend,
+    "tflite": TFLiteBackend
+}
+
+def create_inference_backend(model: Any, backend: Optional[str] = None):
+    """Wrap a loaded model in the requested inference backend, falling back to model.predict"""
+    backend = backend or _default_backend
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    # Only real Keras models can be traced or converted
+    if backend == "keras" or not hasattr(model, "inputs"):
+        return KerasPredictBackend(model)
+
+    try:
+        return _BACKEND_CLASSES[backend](model)
+    except Exception as e:
+        logger.error("Failed to build inference backend, using model.predict", backend=backend, error=str(e))
+        return KerasPredictBackend(model)
@@ -0,0 +1,163 @@
+"""
+ML Model Registry
+Loads every model once per worker process and shares the instances across requests
+"""
+
+import os
+import threading
+import time
+import structlog
+from typing import Any, Callable, Dict, List
+
+from src.services.ml.dosha_classifier import DoshaClassifier
+from src.services.ml.compat_gnn import CompatibilityGNN
+from src.services.ml.rasa_recommender import RasaRecommender
+from src.services.ml.nutrient_calculator import NutrientCalculator
+from src.services.ayurvedic.guna_calculator import GunaCalculator
+from src.services.ayurvedic.viruddha_ahara import ViruddhaAharaDetector
+from src.services.ayurvedic.agni_analyzer import AgniAnalyzer
+from src.services.meal_analysis import MealAnalysisPipeline
+
+logger = structlog.get_logger()
+
+def _current_rss_bytes() -> int:
+    """Resident set size of the current process in bytes (0 if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        # Peak RSS is the best we can do without /proc (kilobytes on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return 0
+
+class ModelRegistry:
+    """Process-wide registry of ML models and analyzers"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register a factory that builds the named model"""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+            self._stats.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Get the shared instance of a model, loading it on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Model not registered: {name}")
+                self._instances[name] = self._load(name)
+            return self._instances[name]
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """Load every registered model (called once per worker at startup)"""
+        for name in self.names():
+            self.get(name)
+
+        logger.info("ML models loaded", models=self.stats())
+        return self.stats()
+
+    def names(self) -> List[str]:
+        """Names of all registered models"""
+        return list(self._factories.keys())
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a model has already been loaded"""
+        return name in self._instances
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load time and memory usage per model"""
+        return {
+            name: dict(self._stats.get(name, {'loaded': False}))
+            for name in self._factories
+        }
+
+    def clear(self):
+        """Drop all loaded instances so they are rebuilt on next access"""
+        with self._lock:
+            self._instances.clear()
+            self._stats.clear()
+
+    def _load(self, name: str) -> Any:
+        """Build a model and record how long it took and how much memory it used"""
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+
+        instance = self._factories[name]()
+
+        load_time = time.perf_counter() - start
+        memory_bytes = max(_current_rss_bytes() - rss_before, 0)
+
+        self._stats[name] = {
+            'loaded': True,
+            'load_time_ms': round(load_time * 1000, 2),
+            'memory_mb': round(memory_bytes / (1024 * 1024), 2)
+        }
+
+        logger.info("ML model loaded", model=name, **self._stats[name])
+        return instance
+
+# Global registry instance
+model_registry = ModelRegistry()
+model_registry.register("dosha_classifier", DoshaClassifier)
+model_registry.register("compat_gnn", CompatibilityGNN)
+model_registry.register("rasa_recommender", RasaRecommender)
+model_registry.register("nutrient_calculator", NutrientCalculator)
+model_registry.register("guna_calculator", GunaCalculator)
+model_registry.register("viruddha_detector", ViruddhaAharaDetector)
+model_registry.register("agni_analyzer", AgniAnalyzer)
+model_registry.register("meal_analysis", lambda: MealAnalysisPipeline(
+    model_registry.get("compat_gnn"),
+    model_registry.get("rasa_recommender"),
+    model_registry.get("guna_calculator"),
+    model_registry.get("nutrient_calculator"),
+    model_registry.get("viruddha_detector")
+))
+
+# FastAPI dependencies
+def get_dosha_classifier() -> DoshaClassifier:
+    """Shared DoshaClassifier instance"""
+    return model_registry.get("dosha_classifier")
+
+def get_compat_gnn() -> CompatibilityGNN:
+    """Shared CompatibilityGNN instance"""
+    return model_registry.get("compat_gnn")
+
+def get_rasa_recommender() -> RasaRecommender:
+    """Shared RasaRecommender instance"""
+    return model_registry.get("rasa_recommender")
+
+def get_nutrient_calculator() -> NutrientCalculator:
+    """Shared NutrientCalculator instance"""
+    return model_registry.get("nutrient_calculator")
+
+def get_guna_calculator() -> GunaCalculator:
+    """Shared GunaCalculator instance"""
+    return model_registry.get("guna_calculator")
+
+def get_viruddha_detector() -> ViruddhaAharaDetector:
+    """Shared ViruddhaAharaDetector instance"""
+    return model_registry.get("viruddha_detector")
+
+def get_agni_analyzer() -> AgniAnalyzer:
+    """Shared AgniAnalyzer instance"""
+    return model_registry.get("agni_analyzer")
+
+def get_meal_analysis() -> MealAnalysisPipeline:
+    """Shared MealAnalysisPipeline built from the shared analyzers"""
+    return model_registry.get("meal_analysis")
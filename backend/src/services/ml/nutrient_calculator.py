@@ -2,17 +2,58 @@
 Nutrient Calculator Service
 """
 
+import copy
+import os
 import numpy as np
 import structlog
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from functools import lru_cache
 
+from src.services.ml.nutrition_store import NutritionStore
+
 logger = structlog.get_logger()
 
+# Always reported, in this order, ahead of any other nutrients
+BASE_NUTRIENTS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+
+# Assumed per-100g nutrition of foods missing from the store
+UNKNOWN_FOOD_NUTRITION = {
+    'calories': 50, 'protein': 2, 'carbs': 10, 'fat': 1,
+    'fiber': 2, 'vitamins': {'C': 20}, 'minerals': {'iron': 0.5}
+}
+
+# Grams per unit; unknown units are taken as grams
+UNIT_GRAMS = {
+    'grams': 1.0,
+    'kg': 1000.0,
+    'cups': 250.0,  # Approximate for most foods
+    'tbsp': 15.0,
+    'tsp': 5.0,
+    'pieces': 50.0,  # Average piece weight
+    'slices': 25.0   # Average slice weight
+}
+
+def _round_float32(values: np.ndarray) -> List[float]:
+    """Values rounded to float32's 7 significant digits, so 2.7 * 1.0 reads back as 2.7"""
+    values = values.astype(np.float64)
+    magnitude = np.floor(np.log10(np.abs(values), where=values != 0, out=np.zeros_like(values)))
+    scale = 10.0 ** (6 - magnitude)
+    return (np.round(values * scale) / scale).tolist()
+
+# Common regional names for the built-in foods
+FOOD_ALIASES = {
+    'chawal': 'rice',
+    'atta': 'wheat',
+    'doodh': 'milk',
+    'clarified butter': 'ghee',
+    'lentils': 'dal',
+    'sabzi': 'vegetables'
+}
+
 class NutrientCalculator:
     """Nutritional analysis and calculation service"""
     
-    def __init__(self):
+    def __init__(self, store_path: Optional[str] = "model/nutrition_db.npz"):
         # Base nutritional data for common foods (per 100g)
         self.nutritional_database = {
             'rice': {
@@ -41,6 +82,10 @@ class NutrientCalculator:
             }
         }
         
+        # Indexed food table; the built-in foods unless a store file has been built
+        self.store = self._load_store(store_path)
+        self._build_nutrient_matrix()
+        
         # Daily nutritional requirements by age and gender
         self.daily_requirements = {
             'male': {
@@ -60,50 +105,107 @@ class NutrientCalculator:
     
     def calculate_meal_nutrition(self, foods: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate nutritional content of a meal"""
+        return self.calculate_meals_nutrition([foods])[0]
+    
+    def calculate_meals_nutrition(self, meals: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Calculate nutritional content of many meals in one vectorized pass"""
         try:
-            total_nutrition = {
-                'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0,
-                'vitamins': {}, 'minerals': {}
-            }
-            
-            for food in foods:
-                food_name = food.get('name', '').lower()
-                quantity = food.get('quantity', 100)  # Default to 100g
-                unit = food.get('unit', 'grams')
-                
-                # Convert quantity to grams
-                quantity_grams = self._convert_to_grams(quantity, unit)
-                
-                # Get nutritional data
-                nutrition = self._get_food_nutrition(food_name)
-                
-                # Calculate nutrition for this quantity
-                for nutrient, value in nutrition.items():
-                    if nutrient in ['vitamins', 'minerals']:
-                        if nutrient not in total_nutrition[nutrient]:
-                            total_nutrition[nutrient] = {}
-                        for sub_nutrient, sub_value in value.items():
-                            total_nutrition[nutrient][sub_nutrient] = total_nutrition[nutrient].get(sub_nutrient, 0) + (sub_value * quantity_grams / 100)
-                    else:
-                        total_nutrition[nutrient] += value * quantity_grams / 100
-            
-            return total_nutrition
+            totals, present = self._meal_totals(meals)
+            return self._as_nutrition_list(totals, present)
             
         except Exception as e:
             logger.error("Meal nutrition calculation failed", error=str(e))
-            return {}
+            return [{} for _ in meals]
+    
+    def calculate_chart_nutrition(self, days: List[List[List[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """Meal, day and chart totals for days of meals, from one matrix multiply"""
+        meals = [foods for day in days for foods in day]
+        totals, present = self._meal_totals(meals)
+        
+        # Sum meal rows into day rows
+        day_of_meal = np.repeat(np.arange(len(days)), [len(day) for day in days])
+        day_matrix = np.zeros((len(days), len(meals)), dtype=np.float32)
+        day_matrix[day_of_meal, np.arange(len(meals))] = 1.0
+        day_totals = day_matrix @ totals
+        day_present = day_matrix @ present > 0
+        
+        meal_nutrition = self._as_nutrition_list(totals, present)
+        bounds = np.cumsum([0] + [len(day) for day in days])
+        return {
+            'meals': [meal_nutrition[bounds[d]:bounds[d + 1]] for d in range(len(days))],
+            'days': self._as_nutrition_list(day_totals, day_present),
+            'total': self._as_nutrition_list(day_totals.sum(axis=0, keepdims=True), day_present.any(axis=0, keepdims=True))[0]
+        }
+    
+    def _build_nutrient_matrix(self):
+        """Dense foods x nutrients float32 table, with unknown-food nutrition as the last row"""
+        unknown = NutritionStore.from_records({'unknown': UNKNOWN_FOOD_NUTRITION})
+        self.nutrient_columns = list(self.store.columns) + [
+            column for column in unknown.columns if column not in self.store.columns
+        ]
+        self._unknown_row = len(self.store)
+        
+        values = np.full((len(self.store) + 1, len(self.nutrient_columns)), np.nan, dtype=np.float32)
+        values[:-1, :len(self.store.columns)] = self.store.values
+        values[-1, [self.nutrient_columns.index(column) for column in unknown.columns]] = unknown.values[0]
+        
+        self.nutrient_present = (~np.isnan(values)).astype(np.float32)
+        self.nutrient_matrix = np.nan_to_num(values, nan=0.0)
+        # (group, key) per column; group is None for top-level nutrients
+        self._column_keys = [
+            (group, sub_nutrient) if sub_nutrient else (None, group)
+            for group, _, sub_nutrient in (column.partition('.') for column in self.nutrient_columns)
+        ]
+    
+    def _meal_totals(self, meals: List[List[Dict[str, Any]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Nutrient totals and nutrient presence per meal: gather food rows, then one matmul"""
+        rows, grams, meal_of_item = [], [], []
+        food_rows = {}
+        for i, foods in enumerate(meals):
+            for food in foods:
+                # Look up each distinct food once
+                food_name = food.get('name', '').lower()
+                if food_name not in food_rows:
+                    row = self.store.match(food_name)
+                    food_rows[food_name] = self._unknown_row if row is None else row
+                rows.append(food_rows[food_name])
+                grams.append(self._convert_to_grams(food.get('quantity', 100), food.get('unit', 'grams')))
+                meal_of_item.append(i)
+        
+        rows = np.array(rows, dtype=np.int64)
+        items = np.arange(len(rows))
+        membership = np.zeros((len(meals), len(rows)), dtype=np.float32)
+        membership[meal_of_item, items] = 1.0
+        portions = np.zeros_like(membership)
+        portions[meal_of_item, items] = np.array(grams, dtype=np.float32) / 100
+        
+        totals = portions @ self.nutrient_matrix[rows]
+        present = membership @ self.nutrient_present[rows] > 0
+        return totals, present
+    
+    def _as_nutrition_list(self, totals: np.ndarray, present: np.ndarray) -> List[Dict[str, Any]]:
+        """Nutrition dict per row of totals, listing the nutrients its foods contain"""
+        results = []
+        for row_values, row_present in zip(_round_float32(totals), present.tolist()):
+            nutrition = {nutrient: 0.0 for nutrient in BASE_NUTRIENTS}
+            nested = {'vitamins': {}, 'minerals': {}}
+            for (group, key), value, found in zip(self._column_keys, row_values, row_present):
+                if not found:
+                    continue
+                if group:
+                    nested[group][key] = value
+                else:
+                    nutrition[key] = value
+            nutrition.update(nested)
+            results.append(nutrition)
+        return results
     
     def analyze_diet_balance(self, daily_meals: List[Dict[str, Any]], patient_info: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze overall diet balance for a patient"""
         try:
             # Calculate total daily nutrition
-            total_daily = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}
-            
-            for meal in daily_meals:
-                meal_nutrition = self.calculate_meal_nutrition(meal.get('foods', []))
-                for nutrient, value in meal_nutrition.items():
-                    if nutrient in total_daily:
-                        total_daily[nutrient] += value
+            day = self.calculate_chart_nutrition([[meal.get('foods', []) for meal in daily_meals]])['total']
+            total_daily = {nutrient: day[nutrient] for nutrient in BASE_NUTRIENTS}
             
             # Get daily requirements
             requirements = self._get_daily_requirements(patient_info)
@@ -157,34 +259,28 @@ class NutrientCalculator:
     
     def _convert_to_grams(self, quantity: float, unit: str) -> float:
         """Convert different units to grams"""
-        conversion_factors = {
-            'grams': 1.0,
-            'kg': 1000.0,
-            'cups': 250.0,  # Approximate for most foods
-            'tbsp': 15.0,
-            'tsp': 5.0,
-            'pieces': 50.0,  # Average piece weight
-            'slices': 25.0   # Average slice weight
-        }
-        
-        return quantity * conversion_factors.get(unit.lower(), 1.0)
+        return quantity * UNIT_GRAMS.get(unit.lower(), 1.0)
+    
+    def _load_store(self, store_path: Optional[str]) -> NutritionStore:
+        """Load the food nutrition store, falling back to the built-in foods"""
+        if store_path and os.path.exists(store_path):
+            try:
+                store = NutritionStore.load(store_path)
+                logger.info("Nutrition store loaded", path=store_path, foods=len(store))
+                return store
+            except Exception as e:
+                logger.error("Failed to load nutrition store", error=str(e))
+        return NutritionStore.from_records(self.nutritional_database, FOOD_ALIASES)
     
     def _get_food_nutrition(self, food_name: str) -> Dict[str, Any]:
         """Get nutritional data for a food item"""
-        # Try exact match first
-        if food_name in self.nutritional_database:
-            return self.nutritional_database[food_name]
-        
-        # Try partial match
-        for key, nutrition in self.nutritional_database.items():
-            if key in food_name or food_name in key:
-                return nutrition
+        # Exact name, alias, then closest token or trigram match
+        nutrition = self.store.lookup(food_name)
+        if nutrition is not None:
+            return nutrition
         
         # Default nutrition for unknown foods
-        return {
-            'calories': 50, 'protein': 2, 'carbs': 10, 'fat': 1,
-            'fiber': 2, 'vitamins': {'C': 20}, 'minerals': {'iron': 0.5}
-        }
+        return copy.deepcopy(UNKNOWN_FOOD_NUTRITION)
     
     def _get_daily_requirements(self, patient_info: Dict[str, Any]) -> Dict[str, float]:
         """Get daily nutritional requirements for patient"""
@@ -0,0 +1,227 @@
+"""
+Food Nutrition Store
+Per-100g nutrition table with exact, alias and fuzzy name lookup, loaded from a
+compact columnar file
+
+Build with:
+    python -m src.services.ml.nutrition_store --input foods.json --output model/nutrition_db.npz
+"""
+
+import argparse
+import json
+import re
+import numpy as np
+import structlog
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = structlog.get_logger()
+
+FORMAT_VERSION = 1
+NESTED_GROUPS = ('vitamins', 'minerals')
+MIN_TRIGRAM_SCORE = 0.6  # Share of the shorter name's trigrams found in the other
+MATCH_CACHE_SIZE = 4096
+
+def normalize_name(name: str) -> str:
+    """Lowercase name with punctuation and repeated whitespace removed"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(name).lower()).split())
+
+def _trigrams(name: str) -> set:
+    padded = f" {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _columns(records: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Fixed column order: top-level nutrients first, then group.sub_nutrient, each in first-seen order"""
+    columns: Dict[str, None] = {}
+    for nutrition in records.values():
+        for nutrient in nutrition:
+            if nutrient not in NESTED_GROUPS:
+                columns[nutrient] = None
+    for group in NESTED_GROUPS:
+        for nutrition in records.values():
+            for sub_nutrient in (nutrition.get(group) or {}):
+                columns[f"{group}.{sub_nutrient}"] = None
+    return list(columns)
+
+class NutritionStore:
+    """Foods x nutrients float32 table with hash, alias and inverted-index lookup
+
+    Absent nutrients are NaN so a food's record can be rebuilt exactly as it
+    was given. Fuzzy matches rank candidates by shared words (Jaccard), then,
+    for misspellings and compound words, by shared character trigrams
+    (overlap coefficient); ties go to the shorter, then alphabetically first
+    name, so results are deterministic.
+    """
+
+    def __init__(self, names: List[str], columns: List[str], values: np.ndarray,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.names = [normalize_name(name) for name in names]
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=np.float32).reshape(len(self.names), len(self.columns))
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.aliases = {}
+        for alias, target in (aliases or {}).items():
+            target_index = self.index.get(normalize_name(target))
+            if target_index is not None:
+                self.aliases[normalize_name(alias)] = target_index
+
+        # Names and aliases are both searchable entries pointing at a food row
+        self._entries: List[Tuple[str, int]] = [(name, i) for i, name in enumerate(self.names)]
+        self._entries += sorted(self.aliases.items())
+        token_postings: Dict[str, List[int]] = defaultdict(list)
+        trigram_postings: Dict[str, List[int]] = defaultdict(list)
+        token_counts, trigram_counts = [], []
+        for position, (entry, _) in enumerate(self._entries):
+            tokens, trigrams = set(entry.split()), _trigrams(entry)
+            token_counts.append(len(tokens))
+            trigram_counts.append(len(trigrams))
+            for token in tokens:
+                token_postings[token].append(position)
+            for trigram in trigrams:
+                trigram_postings[trigram].append(position)
+
+        # Inverted indexes as int32 posting arrays, scored with bincount
+        self._token_index = {token: np.array(p, dtype=np.int32) for token, p in token_postings.items()}
+        self._trigram_index = {trigram: np.array(p, dtype=np.int32) for trigram, p in trigram_postings.items()}
+        self._token_counts = np.array(token_counts, dtype=np.float32)
+        self._trigram_counts = np.array(trigram_counts, dtype=np.float32)
+        self._entry_rows = np.array([row for _, row in self._entries], dtype=np.int64)
+        # Tie-break order: shorter entry first, then alphabetical
+        order = sorted(range(len(self._entries)), key=lambda p: (len(self._entries[p][0]), self._entries[p][0]))
+        self._tie_rank = np.empty(len(self._entries), dtype=np.int64)
+        self._tie_rank[order] = np.arange(len(self._entries))
+
+        self._records: List[Optional[Dict[str, Any]]] = [None] * len(self.names)
+        self._match_cache: Dict[str, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_records(cls, records: Dict[str, Dict[str, Any]],
+                     aliases: Optional[Dict[str, str]] = None) -> "NutritionStore":
+        """Build from {food name: nutrition dict} as used by NutrientCalculator"""
+        columns = _columns(records)
+        position = {column: i for i, column in enumerate(columns)}
+        values = np.full((len(records), len(columns)), np.nan, dtype=np.float32)
+        for row, nutrition in enumerate(records.values()):
+            for nutrient, value in nutrition.items():
+                if nutrient in NESTED_GROUPS:
+                    for sub_nutrient, sub_value in (value or {}).items():
+                        values[row, position[f"{nutrient}.{sub_nutrient}"]] = sub_value
+                else:
+                    values[row, position[nutrient]] = value
+        return cls(list(records), columns, values, aliases)
+
+    @classmethod
+    def load(cls, path: str) -> "NutritionStore":
+        """Load a store written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported nutrition store format: {int(data['format_version'])}")
+            names = data['names'].tolist()
+            aliases = dict(zip(data['alias_names'].tolist(), (names[i] for i in data['alias_targets'])))
+            return cls(names, data['columns'].tolist(), data['values'], aliases)
+
+    def save(self, path: str):
+        """Write the table and aliases as columnar arrays"""
+        alias_names = sorted(self.aliases)
+        np.savez_compressed(
+            path,
+            format_version=np.int32(FORMAT_VERSION),
+            names=np.array(self.names, dtype=str),
+            columns=np.array(self.columns, dtype=str),
+            values=self.values,
+            alias_names=np.array(alias_names, dtype=str),
+            alias_targets=np.array([self.aliases[alias] for alias in alias_names], dtype=np.int32)
+        )
+
+    def match(self, food_name: str) -> Optional[int]:
+        """Row of the best match for a food name, or None"""
+        if food_name in self._match_cache:
+            return self._match_cache[food_name]
+
+        key = normalize_name(food_name)
+        row = self.index.get(key)
+        if row is None:
+            row = self.aliases.get(key)
+        if row is None and key:
+            row = self._fuzzy_match(key)
+
+        if len(self._match_cache) >= MATCH_CACHE_SIZE:
+            self._match_cache.clear()
+        self._match_cache[food_name] = row
+        return row
+
+    def _overlaps(self, terms: set, index: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+        """Shared term count per entry, from the inverted index postings"""
+        postings = [index[term] for term in terms if term in index]
+        if not postings:
+            return None
+        return np.bincount(np.concatenate(postings), minlength=len(self._entries)).astype(np.float32)
+
+    def _best(self, scores: np.ndarray, threshold: float) -> Optional[int]:
+        best_score = scores.max()
+        if best_score <= 0 or best_score < threshold:
+            return None
+        tied = np.flatnonzero(scores == best_score)
+        return int(self._entry_rows[tied[np.argmin(self._tie_rank[tied])]])
+
+    def _fuzzy_match(self, key: str) -> Optional[int]:
+        tokens = set(key.split())
+        shared = self._overlaps(tokens, self._token_index)
+        if shared is not None:
+            # Jaccard similarity of the word sets
+            return self._best(shared / (len(tokens) + self._token_counts - shared), 0.0)
+
+        trigrams = _trigrams(key)
+        shared = self._overlaps(trigrams, self._trigram_index)
+        if shared is None:
+            return None
+        # Overlap coefficient, so compound words still match their parts
+        return self._best(shared / np.minimum(len(trigrams), self._trigram_counts), MIN_TRIGRAM_SCORE)
+
+    def nutrition(self, row: int) -> Dict[str, Any]:
+        """Nutrition record of a row, in the NutrientCalculator dict format"""
+        record = self._records[row]
+        if record is None:
+            record, nested = {}, {group: {} for group in NESTED_GROUPS}
+            for column, value in zip(self.columns, self.values[row]):
+                if np.isnan(value):
+                    continue
+                # Shortest decimal that round-trips the float32 value
+                value = float(str(value))
+                group, _, sub_nutrient = column.partition('.')
+                if sub_nutrient:
+                    nested[group][sub_nutrient] = value
+                else:
+                    record[column] = value
+            record.update(nested)
+            self._records[row] = record
+        return record
+
+    def lookup(self, food_name: str) -> Optional[Dict[str, Any]]:
+        """Nutrition record of the best match for a food name, or None"""
+        row = self.match(food_name)
+        return None if row is None else self.nutrition(row)
+
+def build_nutrition_store(input_path: str, output_path: str) -> NutritionStore:
+    """Build a store file from JSON: {"foods": {name: nutrition}, "aliases": {alias: name}}"""
+    with open(input_path) as f:
+        data = json.load(f)
+    store = NutritionStore.from_records(data['foods'], data.get('aliases'))
+    store.save(output_path)
+    logger.info("Nutrition store built", path=output_path, foods=len(store),
+                aliases=len(store.aliases), nutrients=len(store.columns))
+    return store
+
+def main():
+    """Build the nutrition store from the command line"""
+    parser = argparse.ArgumentParser(description="Build the columnar food nutrition store")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", default="model/nutrition_db.npz")
+    args = parser.parse_args()
+    build_nutrition_store(args.input, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -82,6 +82,10 @@ class RasaRecommender:
             logger.error("Meal rasa analysis failed", error=str(e))
             return {'error': 'Failed to analyze meal rasas'}
     
+    def analyze_meals_rasas(self, meals: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Analyze rasa composition of many meals"""
+        return [self.analyze_meal_rasas(foods) for foods in meals]
+    
     def _calculate_rasa_balance(self, current_rasas: List[str], recommended: List[str], avoid: List[str]) -> float:
         """Calculate how well current rasas match recommendations"""
         if not current_rasas:
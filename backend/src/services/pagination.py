@@ -0,0 +1,70 @@
+"""
+Cursor Pagination
+Opaque page tokens that resume a query after the last document of the previous page,
+so every page costs the same reads instead of scanning past skipped documents
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from src.services.storage.base import DOCUMENT_ID
+from src.utils.exceptions import ValidationError
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"ts": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "ts" in value:
+        return datetime.fromisoformat(value["ts"])
+    return value
+
+def encode_page_token(order_values: Sequence[Any], document_id: str) -> str:
+    """Token holding the order-by values and id of the last document on a page"""
+    payload = {"v": [_encode_value(value) for value in order_values], "id": document_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_page_token(token: str) -> Tuple[List[Any], str]:
+    """Order-by values and document id from a page token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        return [_decode_value(value) for value in payload["v"]], str(payload["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationError("Invalid page token", {"error": str(e)})
+
+async def fetch_page(collection, query, orders: Sequence[Tuple[str, str]], limit: int,
+                     page_token: Optional[str] = None, field_paths: Optional[List[str]] = None):
+    """One page of an async query and the token for the next page (None on the last page)
+
+    The document id is appended as a final ordering so the cursor is unique;
+    one extra document is read to tell whether another page follows.
+    """
+    direction = orders[-1][1] if orders else "ASCENDING"
+    for field_path, field_direction in orders:
+        query = query.order_by(field_path, direction=field_direction)
+    query = query.order_by(DOCUMENT_ID, direction=direction)
+
+    if field_paths is not None:
+        # The cursor needs the order-by fields of the last document
+        order_fields = [field_path for field_path, _ in orders if field_path not in field_paths]
+        query = query.select(list(field_paths) + order_fields)
+
+    if page_token:
+        values, document_id = decode_page_token(page_token)
+        if len(values) != len(orders):
+            raise ValidationError("Invalid page token")
+        cursor = {field_path: value for (field_path, _), value in zip(orders, values)}
+        cursor[DOCUMENT_ID] = collection.document(document_id)
+        query = query.start_after(cursor)
+
+    docs = [doc async for doc in query.limit(limit + 1).stream()]
+    page = docs[:limit]
+    next_token = None
+    if len(docs) > limit:
+        last = page[-1]
+        next_token = encode_page_token([last.get(field_path) for field_path, _ in orders], last.id)
+    return page, next_token
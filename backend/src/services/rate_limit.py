@@ -0,0 +1,212 @@
+"""
+Sliding-Window Rate Limiter
+Per-worker request counting with optional, asynchronously synced shared counters
+"""
+
+import asyncio
+import time
+import structlog
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = structlog.get_logger()
+
+class LocalCounterStore:
+    """In-process stand-in for a shared Redis counter store"""
+
+    def __init__(self):
+        self._counts: Dict[str, Tuple[int, float]] = {}
+
+    async def increment_many(self, deltas: Dict[str, int], ttl_seconds: int) -> Dict[str, int]:
+        """Add deltas to counters and return their new totals"""
+        now = time.time()
+        self._counts = {key: value for key, value in self._counts.items() if value[1] > now}
+        totals = {}
+        for key, delta in deltas.items():
+            count = self._counts.get(key, (0, 0.0))[0] + delta
+            self._counts[key] = (count, now + ttl_seconds)
+            totals[key] = count
+        return totals
+
+    async def close(self):
+        self._counts.clear()
+
+class RedisCounterStore:
+    """Counters shared by every worker through Redis"""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis_client
+        except ImportError:
+            import aioredis as redis_client
+        self._redis = redis_client.from_url(url)
+
+    async def increment_many(self, deltas: Dict[str, int], ttl_seconds: int) -> Dict[str, int]:
+        """Add deltas to counters and return their new totals in one pipeline"""
+        pipe = self._redis.pipeline(transaction=False)
+        for key, delta in deltas.items():
+            pipe.incrby(key, delta)
+            pipe.expire(key, ttl_seconds)
+        results = await pipe.execute()
+        return dict(zip(deltas.keys(), results[::2]))
+
+    async def close(self):
+        await self._redis.close()
+
+class SlidingWindowRateLimiter:
+    """Sliding-window counter limiter
+
+    Each key keeps request counts for the current and previous fixed windows;
+    the previous window is weighted by how much of it still overlaps the
+    sliding window. Decisions are made from local state only. With a shared
+    store, local increments are flushed in batches every sync_interval seconds
+    and the returned totals fold in requests served by other workers.
+    """
+
+    def __init__(self, limit: int = 100, window_seconds: int = 60,
+                 shared_store: Optional[Any] = None, sync_interval: float = 1.0,
+                 max_keys: int = 100_000, clock: Callable[[], float] = time.time):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.shared_store = shared_store
+        self.sync_interval = sync_interval
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> [window index, current window count, previous window count]
+        self._counters: Dict[str, list] = {}
+        # (key, window index) -> increments not yet flushed to the shared store
+        self._pending: Dict[Tuple[str, int], int] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        self._allowed = 0
+        self._rejected = 0
+        self._syncs = 0
+        self._sync_errors = 0
+
+    def configure(self, limit: Optional[int] = None, window_seconds: Optional[int] = None,
+                  shared_store: Optional[Any] = None, sync_interval: Optional[float] = None):
+        """Apply limits and the shared store (called once per worker at startup)"""
+        self.limit = limit or self.limit
+        self.window_seconds = window_seconds or self.window_seconds
+        self.shared_store = shared_store or self.shared_store
+        self.sync_interval = sync_interval or self.sync_interval
+
+    def hit(self, key: str) -> bool:
+        """Count a request for key and report whether it is within the limit"""
+        now = self._clock()
+        window = int(now // self.window_seconds)
+        state = self._counters.get(key)
+
+        if state is None or state[0] != window:
+            previous = state[1] if state is not None and state[0] == window - 1 else 0
+            if state is None and len(self._counters) >= self.max_keys:
+                self._prune(window)
+            state = self._counters[key] = [window, 0, previous]
+
+        overlap = 1.0 - (now - window * self.window_seconds) / self.window_seconds
+        if state[2] * overlap + state[1] >= self.limit:
+            self._rejected += 1
+            return False
+
+        state[1] += 1
+        self._allowed += 1
+        if self.shared_store is not None:
+            pending_key = (key, window)
+            self._pending[pending_key] = self._pending.get(pending_key, 0) + 1
+        return True
+
+    def retry_after(self, key: str) -> int:
+        """Seconds until the current window for key rolls over"""
+        now = self._clock()
+        return max(1, int(self.window_seconds - now % self.window_seconds))
+
+    def _prune(self, window: int):
+        """Drop keys that have no counts in the current or previous window"""
+        self._counters = {key: state for key, state in self._counters.items() if state[0] >= window - 1}
+
+    async def sync(self):
+        """Flush pending increments to the shared store and adopt its totals"""
+        if self.shared_store is None or not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        deltas = {f"ratelimit:{key}:{window}": count for (key, window), count in pending.items()}
+        try:
+            totals = await self.shared_store.increment_many(deltas, ttl_seconds=self.window_seconds * 2)
+        except Exception as e:
+            # Keep the increments for the next attempt; local limits still apply
+            for pending_key, count in pending.items():
+                self._pending[pending_key] = self._pending.get(pending_key, 0) + count
+            self._sync_errors += 1
+            logger.error("Rate limit sync failed", error=str(e))
+            return
+
+        self._syncs += 1
+        for (key, window), store_key in zip(pending, deltas):
+            state = self._counters.get(key)
+            # Requests counted locally while the flush was in flight are not in the total yet
+            total = totals.get(store_key, 0) + self._pending.get((key, window), 0)
+            if state is None:
+                continue
+            if state[0] == window:
+                state[1] = max(state[1], total)
+            elif state[0] == window + 1:
+                state[2] = max(state[2], total)
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    def start(self):
+        """Start background syncing when a shared store is configured"""
+        if self.shared_store is not None and self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+        logger.info(
+            "Rate limiter started",
+            limit=self.limit,
+            window_seconds=self.window_seconds,
+            shared_store=type(self.shared_store).__name__ if self.shared_store else None
+        )
+
+    async def shutdown(self):
+        """Stop syncing, flush remaining counts and close the shared store"""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        if self.shared_store is not None:
+            await self.sync()
+            await self.shared_store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Decision counts and shared-store sync health"""
+        return {
+            'limit': self.limit,
+            'window_seconds': self.window_seconds,
+            'tracked_keys': len(self._counters),
+            'allowed': self._allowed,
+            'rejected': self._rejected,
+            'pending_increments': sum(self._pending.values()),
+            'syncs': self._syncs,
+            'sync_errors': self._sync_errors
+        }
+
+def create_counter_store(store: str, redis_url: Optional[str] = None):
+    """Shared counter store for RATE_LIMIT_STORE, or None for per-worker limits"""
+    if store == "redis":
+        return RedisCounterStore(redis_url)
+    if store == "local":
+        return LocalCounterStore()
+    if store == "memory":
+        return None
+    raise ValueError(f"Unknown rate limit store: {store}")
+
+# Global rate limiter instances: per user after authentication, per client address before it
+rate_limiter = SlidingWindowRateLimiter()
+client_rate_limiter = SlidingWindowRateLimiter()
+
+def get_rate_limiter() -> SlidingWindowRateLimiter:
+    """Get the rate limiter instance"""
+    return rate_limiter
@@ -0,0 +1 @@
+# Local storage backends package
@@ -0,0 +1,133 @@
+"""
+Async Local Firestore Stand-in
+AsyncClient-compatible facade over a LocalDatabase; blocking calls run in a
+worker thread so concurrent requests overlap their storage round trips
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from src.services.storage.base import (
+    CollectionReference, DocumentReference, DocumentSnapshot, LocalDatabase, Query, WriteBatch
+)
+
+class AsyncQuery:
+    """Awaitable view of a local Query"""
+
+    ASCENDING = Query.ASCENDING
+    DESCENDING = Query.DESCENDING
+
+    def __init__(self, query: Query):
+        self._query = query
+
+    def where(self, field_path: str, op_string: str, value: Any) -> "AsyncQuery":
+        return AsyncQuery(self._query.where(field_path, op_string, value))
+
+    def order_by(self, field_path: str, direction: str = Query.ASCENDING) -> "AsyncQuery":
+        return AsyncQuery(self._query.order_by(field_path, direction))
+
+    def offset(self, num_to_skip: int) -> "AsyncQuery":
+        return AsyncQuery(self._query.offset(num_to_skip))
+
+    def limit(self, count: int) -> "AsyncQuery":
+        return AsyncQuery(self._query.limit(count))
+
+    def select(self, field_paths: List[str]) -> "AsyncQuery":
+        return AsyncQuery(self._query.select(field_paths))
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "AsyncQuery":
+        return AsyncQuery(self._query.start_after(document_fields_or_snapshot))
+
+    async def get(self) -> List[DocumentSnapshot]:
+        return await asyncio.to_thread(self._query.get)
+
+    async def stream(self) -> AsyncIterator[DocumentSnapshot]:
+        for snapshot in await self.get():
+            yield snapshot
+
+class AsyncCollectionReference(AsyncQuery):
+    """Awaitable reference to a top-level collection"""
+
+    def __init__(self, collection: CollectionReference):
+        super().__init__(collection)
+
+    @property
+    def id(self) -> str:
+        return self._query.id
+
+    def document(self, document_id: Optional[str] = None) -> "AsyncDocumentReference":
+        return AsyncDocumentReference(self._query.document(document_id))
+
+    async def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[datetime, "AsyncDocumentReference"]:
+        timestamp, reference = await asyncio.to_thread(self._query.add, document_data, document_id)
+        return timestamp, AsyncDocumentReference(reference)
+
+class AsyncDocumentReference:
+    """Awaitable reference to a single document"""
+
+    def __init__(self, reference: DocumentReference):
+        self._reference = reference
+
+    @property
+    def id(self) -> str:
+        return self._reference.id
+
+    @property
+    def path(self) -> str:
+        return self._reference.path
+
+    async def get(self, field_paths: Optional[List[str]] = None) -> DocumentSnapshot:
+        return await asyncio.to_thread(self._reference.get, field_paths)
+
+    async def create(self, document_data: Dict[str, Any]):
+        await asyncio.to_thread(self._reference.create, document_data)
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False):
+        await asyncio.to_thread(self._reference.set, document_data, merge)
+
+    async def update(self, field_updates: Dict[str, Any]):
+        await asyncio.to_thread(self._reference.update, field_updates)
+
+    async def delete(self):
+        await asyncio.to_thread(self._reference.delete)
+
+class AsyncWriteBatch:
+    """Writes applied atomically when the commit is awaited"""
+
+    def __init__(self, batch: WriteBatch):
+        self._batch = batch
+
+    def create(self, reference: AsyncDocumentReference, document_data: Dict[str, Any]):
+        self._batch.create(reference._reference, document_data)
+
+    def set(self, reference: AsyncDocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._batch.set(reference._reference, document_data, merge)
+
+    def update(self, reference: AsyncDocumentReference, field_updates: Dict[str, Any]):
+        self._batch.update(reference._reference, field_updates)
+
+    def delete(self, reference: AsyncDocumentReference):
+        self._batch.delete(reference._reference)
+
+    def __len__(self) -> int:
+        return len(self._batch)
+
+    async def commit(self):
+        await asyncio.to_thread(self._batch.commit)
+
+class AsyncLocalDatabase:
+    """AsyncClient-compatible wrapper sharing storage with a LocalDatabase"""
+
+    def __init__(self, db: LocalDatabase):
+        self.sync_db = db
+        self.SERVER_TIMESTAMP = db.SERVER_TIMESTAMP
+
+    def collection(self, collection_path: str) -> AsyncCollectionReference:
+        return AsyncCollectionReference(self.sync_db.collection(collection_path))
+
+    def document(self, document_path: str) -> AsyncDocumentReference:
+        return AsyncDocumentReference(self.sync_db.document(document_path))
+
+    def batch(self) -> AsyncWriteBatch:
+        return AsyncWriteBatch(self.sync_db.batch())
@@ -0,0 +1,534 @@
+"""
+Local Firestore Stand-in
+Firestore-compatible collections, documents, queries, batches and transactions
+over a pluggable local document store
+"""
+
+import copy
+import functools
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+class _Sentinel:
+    """Field transform marker resolved when a write is applied"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+SERVER_TIMESTAMP = _Sentinel("SERVER_TIMESTAMP")
+DOCUMENT_ID = "__name__"  # Field path that orders by document id
+DELETE_FIELD = _Sentinel("DELETE_FIELD")
+
+class Increment:
+    """Add to a numeric field"""
+
+    def __init__(self, value: float):
+        self.value = value
+
+class ArrayUnion:
+    """Append values missing from an array field"""
+
+    def __init__(self, values: List[Any]):
+        self.values = list(values)
+
+class ArrayRemove:
+    """Remove values from an array field"""
+
+    def __init__(self, values: List[Any]):
+        self.values = list(values)
+
+class DocumentNotFoundError(Exception):
+    """Update of a document that does not exist"""
+
+class DocumentExistsError(Exception):
+    """Create of a document that already exists"""
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:20]
+
+def get_field(data: Dict[str, Any], path: str) -> Tuple[bool, Any]:
+    """Value at a dotted field path, and whether it exists"""
+    value: Any = data
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+def _project(data: Dict[str, Any], field_paths: Tuple[str, ...]) -> Dict[str, Any]:
+    """Copy of data holding only the given (dotted) field paths"""
+    projected: Dict[str, Any] = {}
+    for path in field_paths:
+        found, value = get_field(data, path)
+        if not found:
+            continue
+        parts = path.split('.')
+        target = projected
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return projected
+
+def _resolve_transform(current: Any, exists: bool, value: Any, timestamp: datetime) -> Any:
+    """Apply a sentinel or transform against a field's current value"""
+    if value is SERVER_TIMESTAMP:
+        return timestamp
+    if isinstance(value, Increment):
+        base = current if exists and isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.value
+    if isinstance(value, ArrayUnion):
+        array = list(current) if exists and isinstance(current, list) else []
+        return array + [v for v in value.values if v not in array]
+    if isinstance(value, ArrayRemove):
+        array = list(current) if exists and isinstance(current, list) else []
+        return [v for v in array if v not in value.values]
+    if isinstance(value, dict):
+        return {
+            k: _resolve_transform(
+                current.get(k) if isinstance(current, dict) else None,
+                isinstance(current, dict) and k in current,
+                v, timestamp
+            )
+            for k, v in value.items() if v is not DELETE_FIELD
+        }
+    return copy.deepcopy(value)
+
+def _set_field(data: Dict[str, Any], path: str, value: Any, timestamp: datetime):
+    """Write a dotted field path in place, resolving transforms"""
+    parts = path.split('.')
+    target = data
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+
+    if value is DELETE_FIELD:
+        target.pop(parts[-1], None)
+        return
+
+    exists = parts[-1] in target
+    target[parts[-1]] = _resolve_transform(target.get(parts[-1]), exists, value, timestamp)
+
+def _merge(current: Dict[str, Any], data: Dict[str, Any], timestamp: datetime):
+    """Deep-merge data into current (set with merge=True)"""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(current.get(key), dict):
+            _merge(current[key], value, timestamp)
+        elif value is DELETE_FIELD:
+            current.pop(key, None)
+        else:
+            current[key] = _resolve_transform(current.get(key), key in current, value, timestamp)
+
+# Firestore ordering across value types
+_TYPE_RANK = {type(None): 0, bool: 1, int: 2, float: 2, datetime: 3, str: 4, bytes: 5, list: 8, dict: 9}
+
+def sort_key(value: Any) -> Tuple[int, Any]:
+    """Sort key that orders mixed value types the way Firestore does"""
+    rank = _TYPE_RANK.get(type(value), 6)
+    if value is None:
+        return (rank, 0)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    if isinstance(value, list):
+        return (rank, [sort_key(v) for v in value])
+    if isinstance(value, dict):
+        return (rank, sorted((k, sort_key(v)) for k, v in value.items()))
+    return (rank, value)
+
+def _compare(op: str, field_value: Any, value: Any) -> bool:
+    """Evaluate one where() clause against an existing field value"""
+    if op == 'array-contains':
+        return isinstance(field_value, list) and value in field_value
+    if op == 'array-contains-any':
+        return isinstance(field_value, list) and any(v in field_value for v in value)
+    if op == 'in':
+        return field_value in value
+    if op == 'not-in':
+        return field_value is not None and field_value not in value
+    if op == '==':
+        if isinstance(field_value, bool) or isinstance(value, bool):
+            return field_value is value
+        return field_value == value
+    if op == '!=':
+        return field_value is not None and field_value != value
+
+    # Range comparisons only match values of the same type class
+    left, right = sort_key(field_value), sort_key(value)
+    if left[0] != right[0]:
+        return False
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    raise ValueError(f"Unsupported query operator: {op}")
+
+class DocumentSnapshot:
+    """Point-in-time read of a document"""
+
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict[str, Any]],
+                 create_time: Optional[datetime] = None, update_time: Optional[datetime] = None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        found, value = get_field(self._data or {}, field_path)
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+class AggregationResult:
+    """One aggregated value"""
+
+    def __init__(self, alias: str, value: Any):
+        self.alias = alias
+        self.value = value
+
+class AggregationQuery:
+    """count() over a query, computed without returning documents"""
+
+    def __init__(self, query: "Query", alias: Optional[str] = None):
+        self._query = query
+        self._alias = alias or "count"
+
+    def get(self, transaction: Optional["Transaction"] = None) -> List[List[AggregationResult]]:
+        return [[AggregationResult(self._alias, len(self._query._run()))]]
+
+class Query:
+    """Filtered, ordered and paginated view of a collection"""
+
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, db: "LocalDatabase", collection: str,
+                 filters: Tuple = (), orders: Tuple = (), offset: int = 0, limit: Optional[int] = None,
+                 projection: Optional[Tuple[str, ...]] = None, cursor: Optional[Any] = None):
+        self._db = db
+        self._collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._offset = offset
+        self._limit = limit
+        self._projection = projection
+        self._cursor = cursor
+
+    def _copy(self, **changes) -> "Query":
+        state = {
+            'filters': self._filters, 'orders': self._orders,
+            'offset': self._offset, 'limit': self._limit,
+            'projection': self._projection, 'cursor': self._cursor
+        }
+        state.update(changes)
+        return Query(self._db, self._collection, **state)
+
+    def where(self, field_path: str, op_string: str, value: Any) -> "Query":
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def offset(self, num_to_skip: int) -> "Query":
+        return self._copy(offset=num_to_skip)
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def select(self, field_paths: List[str]) -> "Query":
+        return self._copy(projection=tuple(field_paths))
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "Query":
+        """Resume after a snapshot, or after a dict of order-by field values"""
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def count(self, alias: Optional[str] = None) -> AggregationQuery:
+        return AggregationQuery(self, alias)
+
+    def _matches(self, data: Dict[str, Any]) -> bool:
+        for field_path, op, value in self._filters:
+            found, field_value = get_field(data, field_path)
+            if not found or not _compare(op, field_value, value):
+                return False
+        # Ordering on a field excludes documents that lack it
+        return all(get_field(data, field_path)[0] for field_path, _ in self._orders if field_path != DOCUMENT_ID)
+
+    def _full_orders(self) -> Tuple:
+        # Firestore breaks ties by document id, in the direction of the last ordering
+        if any(field_path == DOCUMENT_ID for field_path, _ in self._orders):
+            return self._orders
+        direction = self._orders[-1][1] if self._orders else self.ASCENDING
+        return self._orders + ((DOCUMENT_ID, direction),)
+
+    @staticmethod
+    def _order_value(doc_id: str, data: Dict[str, Any], field_path: str) -> Any:
+        if field_path == DOCUMENT_ID:
+            return doc_id
+        return get_field(data, field_path)[1]
+
+    def _cursor_values(self, orders: Tuple) -> List[Any]:
+        cursor = self._cursor
+        if isinstance(cursor, DocumentSnapshot):
+            return [self._order_value(cursor.id, cursor._data or {}, field_path) for field_path, _ in orders]
+        values = []
+        for field_path, _ in orders:
+            if field_path not in cursor:
+                break
+            value = cursor[field_path]
+            # Document id cursors may be given as references
+            values.append(getattr(value, 'id', value) if field_path == DOCUMENT_ID else value)
+        return values
+
+    def _after_cursor(self, doc_id: str, data: Dict[str, Any], orders: Tuple, cursor_values: List[Any]) -> bool:
+        for (field_path, direction), cursor_value in zip(orders, cursor_values):
+            left = sort_key(self._order_value(doc_id, data, field_path))
+            right = sort_key(cursor_value)
+            if left != right:
+                return (left < right) if direction == self.DESCENDING else (left > right)
+        # Equal on every cursor field: start_after excludes it
+        return False
+
+    def _run(self) -> List[DocumentSnapshot]:
+        self._db._simulate_latency()
+        rows = [
+            (doc_id, data, create_time, update_time)
+            for doc_id, data, create_time, update_time in self._db._scan(self._collection)
+            if self._matches(data)
+        ]
+
+        # Stable multi-key sort, last key first
+        orders = self._full_orders()
+        for field_path, direction in reversed(orders):
+            rows.sort(
+                key=lambda row: sort_key(self._order_value(row[0], row[1], field_path)),
+                reverse=direction == self.DESCENDING
+            )
+
+        if self._cursor is not None:
+            cursor_values = self._cursor_values(orders)
+            rows = [row for row in rows if self._after_cursor(row[0], row[1], orders, cursor_values)]
+
+        end = None if self._limit is None else self._offset + self._limit
+        collection = CollectionReference(self._db, self._collection)
+        return [
+            DocumentSnapshot(
+                collection.document(doc_id),
+                data if self._projection is None else _project(data, self._projection),
+                create_time, update_time
+            )
+            for doc_id, data, create_time, update_time in rows[self._offset:end]
+        ]
+
+    def stream(self, transaction: Optional["Transaction"] = None) -> Iterator[DocumentSnapshot]:
+        return iter(self._run())
+
+    def get(self, transaction: Optional["Transaction"] = None) -> List[DocumentSnapshot]:
+        return self._run()
+
+class CollectionReference(Query):
+    """Reference to a top-level collection"""
+
+    def __init__(self, db: "LocalDatabase", name: str):
+        super().__init__(db, name)
+
+    @property
+    def id(self) -> str:
+        return self._collection
+
+    def document(self, document_id: Optional[str] = None) -> "DocumentReference":
+        return DocumentReference(self._db, self._collection, document_id or _new_id())
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[datetime, "DocumentReference"]:
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return _now(), reference
+
+    def list_documents(self) -> List["DocumentReference"]:
+        return [self.document(doc_id) for doc_id, *_ in self._db._scan(self._collection)]
+
+class DocumentReference:
+    """Reference to a single document"""
+
+    def __init__(self, db: "LocalDatabase", collection: str, document_id: str):
+        self._db = db
+        self._collection = collection
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection}/{self.id}"
+
+    def get(self, field_paths: Optional[List[str]] = None, transaction: Optional["Transaction"] = None) -> DocumentSnapshot:
+        self._db._simulate_latency()
+        stored = self._db._read(self._collection, self.id)
+        if stored is None:
+            return DocumentSnapshot(self, None)
+        data, create_time, update_time = stored
+        return DocumentSnapshot(self, data, create_time, update_time)
+
+    def create(self, document_data: Dict[str, Any]):
+        self._db._apply([('create', self, document_data)])
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False):
+        self._db._apply([('merge' if merge else 'set', self, document_data)])
+
+    def update(self, field_updates: Dict[str, Any]):
+        self._db._apply([('update', self, field_updates)])
+
+    def delete(self):
+        self._db._apply([('delete', self, None)])
+
+class WriteBatch:
+    """Writes applied atomically on commit"""
+
+    def __init__(self, db: "LocalDatabase"):
+        self._db = db
+        self._writes: List[Tuple[str, DocumentReference, Optional[Dict[str, Any]]]] = []
+
+    def create(self, reference: DocumentReference, document_data: Dict[str, Any]):
+        self._writes.append(('create', reference, document_data))
+
+    def set(self, reference: DocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._writes.append(('merge' if merge else 'set', reference, document_data))
+
+    def update(self, reference: DocumentReference, field_updates: Dict[str, Any]):
+        self._writes.append(('update', reference, field_updates))
+
+    def delete(self, reference: DocumentReference):
+        self._writes.append(('delete', reference, None))
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        if writes:
+            self._db._apply(writes)
+
+class Transaction(WriteBatch):
+    """Reads and buffered writes run under the database lock"""
+
+    def get(self, reference):
+        if isinstance(reference, DocumentReference):
+            return reference.get()
+        return reference.stream()
+
+def transactional(func: Callable) -> Callable:
+    """Run func(transaction, ...) atomically, like firestore.transactional"""
+    @functools.wraps(func)
+    def wrapper(transaction: Transaction, *args, **kwargs):
+        with transaction._db._lock:
+            result = func(transaction, *args, **kwargs)
+            transaction.commit()
+        return result
+    return wrapper
+
+class LocalDatabase:
+    """Firestore-compatible client over a local document store"""
+
+    SERVER_TIMESTAMP = SERVER_TIMESTAMP
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self._lock = threading.RLock()
+
+    # Storage primitives implemented by each backend
+    def _read(self, collection: str, document_id: str) -> Optional[Tuple[Dict[str, Any], datetime, datetime]]:
+        raise NotImplementedError
+
+    def _scan(self, collection: str) -> List[Tuple[str, Dict[str, Any], datetime, datetime]]:
+        raise NotImplementedError
+
+    def _write_many(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]], datetime, datetime]]):
+        """Persist (collection, id, data or None to delete, create_time, update_time) atomically"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release backend resources"""
+
+    def _simulate_latency(self):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def collection(self, collection_path: str) -> CollectionReference:
+        return CollectionReference(self, collection_path)
+
+    def document(self, document_path: str) -> DocumentReference:
+        collection, document_id = document_path.split('/', 1)
+        return self.collection(collection).document(document_id)
+
+    def get_all(self, references: List[DocumentReference], transaction: Optional[Transaction] = None) -> Iterator[DocumentSnapshot]:
+        return iter([reference.get() for reference in references])
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self) -> Transaction:
+        return Transaction(self)
+
+    def _apply(self, writes: List[Tuple[str, DocumentReference, Optional[Dict[str, Any]]]]):
+        """Validate and apply a group of writes as one atomic unit"""
+        self._simulate_latency()
+        timestamp = _now()
+
+        with self._lock:
+            pending: Dict[Tuple[str, str], Optional[Tuple[Dict[str, Any], datetime]]] = {}
+            for kind, reference, data in writes:
+                key = (reference._collection, reference.id)
+                if key in pending:
+                    current = pending[key]
+                else:
+                    stored = self._read(*key)
+                    current = (stored[0], stored[1]) if stored is not None else None
+
+                if kind == 'delete':
+                    pending[key] = None
+                    continue
+
+                if kind == 'create' and current is not None:
+                    raise DocumentExistsError(f"Document already exists: {reference.path}")
+                if kind == 'update' and current is None:
+                    raise DocumentNotFoundError(f"No document to update: {reference.path}")
+
+                create_time = current[1] if current is not None else timestamp
+                if kind == 'merge' and current is not None:
+                    document = current[0]
+                    _merge(document, data, timestamp)
+                elif kind == 'update':
+                    document = current[0]
+                    for field_path, value in data.items():
+                        _set_field(document, field_path, value, timestamp)
+                else:
+                    document = {}
+                    _merge(document, data, timestamp)
+
+                pending[key] = (document, create_time)
+
+            self._write_many([
+                (collection, document_id, None, None, None) if value is None
+                else (collection, document_id, value[0], value[1], timestamp)
+                for (collection, document_id), value in pending.items()
+            ])
@@ -0,0 +1,30 @@
+"""
+Storage Backend Factory
+Shared local databases selected by STORAGE_BACKEND
+"""
+
+import threading
+from typing import Dict, Tuple
+
+from src.services.storage.base import LocalDatabase
+from src.services.storage.memory import InMemoryDatabase
+from src.services.storage.sqlite import SQLiteDatabase
+
+LOCAL_BACKENDS = ("memory", "sqlite")
+
+_databases: Dict[Tuple[str, str], LocalDatabase] = {}
+_lock = threading.Lock()
+
+def get_local_database(backend: str, sqlite_path: str = "local_firestore.db", latency_ms: float = 0.0) -> LocalDatabase:
+    """Shared local database for a backend, so every client in the process sees the same data"""
+    if backend not in LOCAL_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    key = (backend, sqlite_path if backend == "sqlite" else "")
+    with _lock:
+        if key not in _databases:
+            if backend == "sqlite":
+                _databases[key] = SQLiteDatabase(sqlite_path, latency_ms=latency_ms)
+            else:
+                _databases[key] = InMemoryDatabase(latency_ms=latency_ms)
+        return _databases[key]
@@ -0,0 +1,37 @@
+"""
+In-Memory Storage Backend
+Process-local Firestore stand-in for tests and load testing
+"""
+
+import copy
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.storage.base import LocalDatabase
+
+class InMemoryDatabase(LocalDatabase):
+    """Documents held in per-collection dicts"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self._collections: Dict[str, Dict[str, Tuple[Dict[str, Any], datetime, datetime]]] = {}
+
+    def _read(self, collection: str, document_id: str) -> Optional[Tuple[Dict[str, Any], datetime, datetime]]:
+        stored = self._collections.get(collection, {}).get(document_id)
+        if stored is None:
+            return None
+        return copy.deepcopy(stored[0]), stored[1], stored[2]
+
+    def _scan(self, collection: str) -> List[Tuple[str, Dict[str, Any], datetime, datetime]]:
+        with self._lock:
+            documents = list(self._collections.get(collection, {}).items())
+        # Stored documents are never mutated in place, so rows can share them
+        return [(doc_id, data, create_time, update_time) for doc_id, (data, create_time, update_time) in documents]
+
+    def _write_many(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]], datetime, datetime]]):
+        for collection, document_id, data, create_time, update_time in writes:
+            documents = self._collections.setdefault(collection, {})
+            if data is None:
+                documents.pop(document_id, None)
+            else:
+                documents[document_id] = (data, create_time, update_time)
@@ -0,0 +1,98 @@
+"""
+SQLite Storage Backend
+File-backed Firestore stand-in for reproducible offline load testing
+"""
+
+import base64
+import json
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.storage.base import LocalDatabase
+
+def _encode(value: Any) -> Any:
+    """JSON default hook for values JSON cannot represent natively"""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__bytes__' in obj:
+            return base64.b64decode(obj['__bytes__'])
+    return obj
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=_encode, separators=(',', ':'))
+
+def _loads(text: str) -> Dict[str, Any]:
+    return json.loads(text, object_hook=_decode)
+
+class SQLiteDatabase(LocalDatabase):
+    """Documents stored as JSON rows in one SQLite table"""
+
+    def __init__(self, path: str = "local_firestore.db", latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " collection TEXT NOT NULL,"
+            " document_id TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " create_time TEXT NOT NULL,"
+            " update_time TEXT NOT NULL,"
+            " PRIMARY KEY (collection, document_id))"
+        )
+
+    def _read(self, collection: str, document_id: str) -> Optional[Tuple[Dict[str, Any], datetime, datetime]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, create_time, update_time FROM documents WHERE collection = ? AND document_id = ?",
+                (collection, document_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return _loads(row[0]), datetime.fromisoformat(row[1]), datetime.fromisoformat(row[2])
+
+    def _scan(self, collection: str) -> List[Tuple[str, Dict[str, Any], datetime, datetime]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT document_id, data, create_time, update_time FROM documents WHERE collection = ?",
+                (collection,)
+            ).fetchall()
+        return [
+            (document_id, _loads(data), datetime.fromisoformat(create_time), datetime.fromisoformat(update_time))
+            for document_id, data, create_time, update_time in rows
+        ]
+
+    def _write_many(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]], datetime, datetime]]):
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                for collection, document_id, data, create_time, update_time in writes:
+                    if data is None:
+                        self._connection.execute(
+                            "DELETE FROM documents WHERE collection = ? AND document_id = ?",
+                            (collection, document_id)
+                        )
+                    else:
+                        self._connection.execute(
+                            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                            (collection, document_id, _dumps(data), create_time.isoformat(), update_time.isoformat())
+                        )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,272 @@
+"""
+Verified Token Cache
+Decoded Firebase ID tokens and Google signing keys cached across requests
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+class TokenCache:
+    """LRU cache of decoded tokens, each expiring no later than its exp claim"""
+
+    def __init__(self, max_size: int = 10000, max_ttl_seconds: float = 3600,
+                 revocation_check_interval: float = 0, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.max_ttl_seconds = max_ttl_seconds
+        self.revocation_check_interval = revocation_check_interval
+        self._clock = clock
+        # sha256(token) -> [claims, expires_at, revocation checked_at]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        # Raw bearer tokens are never held as keys
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Cached claims for token, or None if absent or expired"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry[1] <= self._clock():
+            del self._entries[key]
+            self._expired += 1
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[0]
+
+    def put(self, token: str, claims: Dict[str, Any], revocation_checked: bool = False):
+        """Cache verified claims until min(exp, now + max_ttl_seconds)"""
+        now = self._clock()
+        expires_at = min(float(claims.get('exp', now)), now + self.max_ttl_seconds)
+        if expires_at <= now:
+            return
+        key = self._key(token)
+        self._entries[key] = [claims, expires_at, now if revocation_checked else self._checked_at(key, now)]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _checked_at(self, key: str, now: float) -> float:
+        entry = self._entries.get(key)
+        return entry[2] if entry is not None else now
+
+    def revocation_due(self, token: str) -> bool:
+        """Whether the cached token should be re-checked against revocations"""
+        if self.revocation_check_interval <= 0:
+            return False
+        entry = self._entries.get(self._key(token))
+        return entry is not None and self._clock() - entry[2] >= self.revocation_check_interval
+
+    def invalidate(self, token: str):
+        self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self._hits + self._misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+            'expired': self._expired,
+            'evictions': self._evictions
+        }
+
+def _max_age(cache_control: str) -> Optional[float]:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return float(match.group(1)) if match else None
+
+async def fetch_google_certificates(url: str = GOOGLE_CERTS_URL) -> Tuple[Dict[str, str], Optional[float]]:
+    """Signing certificates by key id, and how long Google allows caching them"""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+    return response.json(), _max_age(response.headers.get("cache-control"))
+
+class PublicKeyCache:
+    """Google token-signing certificates, refreshed in the background before they expire"""
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, default_ttl_seconds: float = 3600,
+                 refresh_margin_seconds: float = 300, retry_seconds: float = 60,
+                 fetch: Callable = fetch_google_certificates, clock: Callable[[], float] = time.time):
+        self.url = url
+        self.default_ttl_seconds = default_ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_seconds = retry_seconds
+        self._fetch = fetch
+        self._clock = clock
+        self._keys: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refreshes = 0
+        self._refresh_errors = 0
+
+    def get(self, kid: str) -> Optional[str]:
+        """Certificate for key id, if it is cached and still valid"""
+        if self._clock() >= self._expires_at:
+            return None
+        return self._keys.get(kid)
+
+    async def refresh(self):
+        """Fetch the current certificates"""
+        keys, max_age = await self._fetch(self.url)
+        self._keys = keys
+        self._expires_at = self._clock() + (max_age or self.default_ttl_seconds)
+        self._refreshes += 1
+        logger.info("Token signing keys refreshed", keys=len(keys), ttl_seconds=max_age or self.default_ttl_seconds)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+                delay = max(self._expires_at - self._clock() - self.refresh_margin_seconds, self.retry_seconds)
+            except Exception as e:
+                self._refresh_errors += 1
+                logger.error("Token signing key refresh failed", error=str(e))
+                delay = self.retry_seconds
+            await asyncio.sleep(delay)
+
+    def start(self):
+        """Begin background refreshes"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def shutdown(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'keys': len(self._keys),
+            'valid_for_seconds': round(max(self._expires_at - self._clock(), 0.0), 1),
+            'refreshes': self._refreshes,
+            'refresh_errors': self._refresh_errors
+        }
+
+class TokenVerifier:
+    """Verify Firebase ID tokens, serving repeat tokens from cache
+
+    Cache misses are verified locally against the cached signing keys when
+    python-jose is available; otherwise, or when the key id is unknown, the
+    fallback verifier (firebase_admin's verify_id_token) is used. The fallback
+    also performs the periodic revocation checks.
+    """
+
+    def __init__(self, fallback_verify: Optional[Callable[..., Dict[str, Any]]] = None,
+                 project_id: Optional[str] = None, token_cache: Optional[TokenCache] = None,
+                 key_cache: Optional[PublicKeyCache] = None):
+        self.fallback_verify = fallback_verify
+        self.project_id = project_id
+        self.token_cache = token_cache or TokenCache()
+        self.key_cache = key_cache or PublicKeyCache()
+        self._local_verifications = 0
+        self._fallback_verifications = 0
+        self._revocation_checks = 0
+
+    def configure(self, fallback_verify: Optional[Callable[..., Dict[str, Any]]] = None,
+                  project_id: Optional[str] = None, max_size: Optional[int] = None,
+                  revocation_check_interval: Optional[float] = None):
+        """Apply verifier settings (called once per worker at startup)"""
+        self.fallback_verify = fallback_verify or self.fallback_verify
+        self.project_id = project_id or self.project_id
+        self.token_cache.max_size = max_size or self.token_cache.max_size
+        if revocation_check_interval is not None:
+            self.token_cache.revocation_check_interval = revocation_check_interval
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Decoded claims for a valid token; raises if it is invalid or revoked"""
+        claims = self.token_cache.get(token)
+        if claims is not None and not self.token_cache.revocation_due(token):
+            return claims
+
+        if claims is not None:
+            self._revocation_checks += 1
+            try:
+                claims = await asyncio.to_thread(self.fallback_verify, token, check_revoked=True)
+            except Exception:
+                self.token_cache.invalidate(token)
+                raise
+            self.token_cache.put(token, claims, revocation_checked=True)
+            return claims
+
+        claims = self._verify_locally(token)
+        if claims is None:
+            self._fallback_verifications += 1
+            check_revoked = self.token_cache.revocation_check_interval > 0
+            claims = await asyncio.to_thread(self.fallback_verify, token, check_revoked=check_revoked)
+            self.token_cache.put(token, claims, revocation_checked=check_revoked)
+        else:
+            self._local_verifications += 1
+            self.token_cache.put(token, claims)
+        return claims
+
+    def _verify_locally(self, token: str) -> Optional[Dict[str, Any]]:
+        """Signature and claim checks against cached keys, or None to defer to the fallback"""
+        if not self.project_id:
+            return None
+        try:
+            from jose import jwt
+        except ImportError:
+            return None
+
+        kid = jwt.get_unverified_header(token).get('kid')
+        certificate = self.key_cache.get(kid) if kid else None
+        if certificate is None:
+            return None
+
+        claims = jwt.decode(
+            token, certificate, algorithms=['RS256'], audience=self.project_id,
+            issuer=f"https://securetoken.google.com/{self.project_id}",
+            options={'verify_at_hash': False}
+        )
+        if not claims.get('sub'):
+            raise ValueError("Token has no subject")
+        claims['uid'] = claims['sub']
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and how cache misses were verified"""
+        return {
+            **self.token_cache.stats(),
+            'local_verifications': self._local_verifications,
+            'fallback_verifications': self._fallback_verifications,
+            'revocation_checks': self._revocation_checks,
+            'signing_keys': self.key_cache.stats()
+        }
+
+# Global token verifier instance
+token_verifier = TokenVerifier()
+
+def get_token_verifier() -> TokenVerifier:
+    """Get the token verifier instance"""
+    return token_verifier
@@ -0,0 +1,115 @@
+"""
+Unit tests for patient analytics rollups
+"""
+
+from datetime import datetime, timedelta, timezone
+from src.services.analytics_rollup import (
+    ROLLUP_COLLECTION, write_chart, load_rollup, rebuild_rollup, summarize_rollup
+)
+from src.services.storage.base import transactional
+from src.services.storage.memory import InMemoryDatabase
+
+NOW = datetime(2024, 6, 30, 12, 0, tzinfo=timezone.utc)
+
+def _chart(patient_id: str, compliance: float, days_ago: int, calories: float = 2000):
+    return {
+        'patient_id': patient_id,
+        'ayurvedic_compliance': compliance,
+        'total_nutrition': {'calories': calories, 'protein': 80},
+        'created_at': NOW - timedelta(days=days_ago)
+    }
+
+class TestAnalyticsRollup:
+    """Test incrementally maintained patient rollups"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.db = InMemoryDatabase()
+        self.get_document = lambda collection, document_id: self.db.collection(collection).document(document_id)
+    
+    def _write(self, chart_id, old_chart, new_chart, update_fields=None):
+        transactional(write_chart)(
+            self.db.transaction(), self.get_document, chart_id, old_chart, new_chart, NOW, update_fields
+        )
+    
+    def _rollup(self, patient_id):
+        return self.db.collection(ROLLUP_COLLECTION).document(patient_id).get().to_dict()
+    
+    def test_create_update_delete(self):
+        """Test that chart writes keep the rollup's counts and sums current"""
+        charts = {f"c{i}": _chart('p1', 0.4 + 0.1 * i, days_ago=10 - i) for i in range(4)}
+        for chart_id, chart in charts.items():
+            self._write(chart_id, None, chart)
+        
+        assert self.db.collection('diet_charts').document('c0').get().exists
+        assert self._rollup('p1')['total_charts'] == 4
+        
+        # Raise one chart's compliance, then soft-delete another
+        self._write('c0', charts['c0'], {**charts['c0'], 'ayurvedic_compliance': 0.9},
+                    update_fields={'ayurvedic_compliance': 0.9})
+        self._write('c1', charts['c1'], {**charts['c1'], 'deleted': True}, update_fields={'deleted': True})
+        
+        summary = summarize_rollup(self._rollup('p1'), days=30, now=NOW)
+        
+        assert summary['total_charts'] == 3
+        assert abs(summary['avg_compliance'] - (0.9 + 0.6 + 0.7) / 3) < 1e-9
+        assert summary['avg_nutrition']['calories'] == 2000
+        assert self.db.collection('diet_charts').document('c0').get().to_dict()['ayurvedic_compliance'] == 0.9
+    
+    def test_window_and_trend(self):
+        """Test that the summary matches a from-scratch computation over the window"""
+        charts = [_chart('p1', 0.3, days_ago=60)] + [
+            _chart('p1', score, days_ago=days_ago)
+            for score, days_ago in ((0.4, 20), (0.4, 15), (0.8, 5), (0.8, 3), (0.9, 1))
+        ]
+        for i, chart in enumerate(charts):
+            self._write(f"c{i}", None, chart)
+        
+        summary = summarize_rollup(self._rollup('p1'), days=30, now=NOW)
+        
+        assert summary['total_charts'] == 5
+        assert summary['recent_trends']['direction'] == 'improving'
+        assert abs(summary['recent_trends']['recent_avg'] - (0.8 + 0.8 + 0.9) / 3) < 1e-9
+        assert abs(summary['recent_trends']['earlier_avg'] - 0.4) < 1e-9
+        assert summarize_rollup(self._rollup('p1'), days=90, now=NOW)['total_charts'] == 6
+    
+    def test_rebuild_matches_incremental(self):
+        """Test that rebuilding from charts gives the incrementally kept totals"""
+        charts = [_chart('p1', 0.5 + 0.05 * i, days_ago=i * 7) for i in range(8)]
+        for i, chart in enumerate(charts):
+            self._write(f"c{i}", None, chart)
+        
+        rebuilt = rebuild_rollup('p1', [{**chart, 'chart_id': f"c{i}"} for i, chart in enumerate(charts)], NOW)
+        
+        for days in (7, 30, 90):
+            assert summarize_rollup(rebuilt, days, NOW) == summarize_rollup(self._rollup('p1'), days, NOW)
+    
+    def test_charts_before_rollup(self):
+        """Test that charts written before the rollup existed are still counted"""
+        for i in range(3):
+            self.db.collection('diet_charts').document(f"old{i}").set(_chart('p1', 0.5, days_ago=5 + i))
+        self._write('new', None, _chart('p1', 0.9, days_ago=1))
+        
+        assert not self._rollup('p1').get('complete')
+        
+        get_collection = lambda collection: self.db.collection(collection)
+        rollup = transactional(load_rollup)(self.db.transaction(), self.get_document, get_collection, 'p1', NOW)
+        
+        assert rollup['total_charts'] == 4
+        assert self._rollup('p1')['complete']
+        
+        # Later writes build on the complete rollup
+        self._write('newer', None, _chart('p1', 0.7, days_ago=0))
+        summary = summarize_rollup(self._rollup('p1'), days=30, now=NOW)
+        
+        assert summary['total_charts'] == 5
+        assert abs(summary['avg_compliance'] - (0.5 * 3 + 0.9 + 0.7) / 5) < 1e-9
+    
+    def test_no_charts(self):
+        """Test the summary for a patient without charts"""
+        summary = summarize_rollup(None, days=30, now=NOW)
+        
+        assert summary['total_charts'] == 0
+        assert summary['avg_compliance'] == 0.5
+        assert summary['recent_trends']['trend'] == 'no_data'
+        assert summary['avg_nutrition'] is None
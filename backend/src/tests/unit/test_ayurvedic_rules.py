@@ -91,6 +91,35 @@ class TestViruddhaAharaDetector:
         assert 'safe_to_eat' in result
         assert isinstance(result['safe_to_eat'], bool)
     
+    def test_food_categories_overlapping_keywords(self):
+        """Test that every keyword occurring in a food name is matched"""
+        detector = ViruddhaAharaDetector()
+        
+        # 'rice' also contains the 'ice' keyword
+        assert detector._get_food_categories('Rice') == {'cooked_foods', 'cold_foods'}
+        assert detector._get_food_categories('coconut milk') == {'milk'}
+        assert detector._get_food_categories('Ghee') == {'ghee'}
+    
+    def test_meal_incompatibilities_match_pairwise_checks(self):
+        """Test that the meal check agrees with pairwise checks"""
+        detector = ViruddhaAharaDetector()
+        
+        foods = ['milk', 'fish curry', 'honey', 'ghee', 'banana', 'rice', 'spicy dal']
+        result = detector.check_meal_incompatibilities(foods)
+        
+        expected_pairs = []
+        expected_conflicts = 0
+        for i in range(len(foods)):
+            for j in range(i + 1, len(foods)):
+                pair = detector.check_incompatibility(foods[i], foods[j])
+                if pair['incompatible']:
+                    expected_pairs.append((foods[i], foods[j]))
+                    expected_conflicts += len(pair['conflicts'])
+        
+        assert ('honey', 'ghee') in result['incompatible_pairs']
+        assert result['incompatible_pairs'] == expected_pairs
+        assert result['total_conflicts'] == expected_conflicts
+    
     def test_suggest_alternatives(self):
         """Test alternative suggestions"""
         detector = ViruddhaAharaDetector()
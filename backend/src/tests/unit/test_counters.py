@@ -0,0 +1,89 @@
+"""
+Unit tests for sharded counters
+"""
+
+from src.services.counters import COUNTER_SHARDS_COLLECTION, ShardedCounters, count_documents
+from src.services.storage.base import Increment, transactional
+from src.services.storage.memory import InMemoryDatabase
+
+class LocalClient:
+    """FirebaseClient surface used by the counters, over an in-memory database"""
+    
+    def __init__(self):
+        self.db = InMemoryDatabase()
+    
+    def get_collection(self, collection_name: str):
+        return self.db.collection(collection_name)
+    
+    def get_document(self, collection_name: str, document_id: str):
+        return self.db.collection(collection_name).document(document_id)
+    
+    def increment(self, value: float):
+        return Increment(value)
+    
+    def run_transaction(self, func, *args, **kwargs):
+        return transactional(func)(self.db.transaction(), *args, **kwargs)
+
+class TestShardedCounters:
+    """Test dashboard counters"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.client = LocalClient()
+        for i, role in enumerate(["doctor", "patient", "patient", "admin", None]):
+            self.client.get_document("users", f"u{i}").set({"role": role} if role else {})
+        for i in range(3):
+            self.client.get_document("patients", f"p{i}").set({"meals": []})
+    
+    def test_count_aggregation(self):
+        """Test count queries on the local backend"""
+        users = self.client.get_collection("users")
+        
+        assert count_documents(users) == 5
+        assert count_documents(users.where("role", "==", "patient")) == 2
+    
+    def test_seed_then_increment(self):
+        """Test that counters seed from counts and then track increments across shards"""
+        counters = ShardedCounters(self.client, num_shards=4)
+        
+        assert counters.read() is None
+        seeded = counters.snapshot()
+        assert seeded["totals"] == {"users": 5, "patients": 3, "diet_charts": 0}
+        assert seeded["roles"] == {"patient": 2, "doctor": 1, "admin": 1, "unknown": 1}
+        
+        for _ in range(20):
+            counters.increment("diet_charts")
+        counters.increment("users", role="doctor")
+        
+        totals = counters.read()
+        assert totals["totals"] == {"users": 6, "patients": 3, "diet_charts": 20}
+        assert totals["roles"]["doctor"] == 2
+    
+    def test_increments_before_seed_are_recounted(self):
+        """Test that increments made before seeding are not double counted"""
+        counters = ShardedCounters(self.client, num_shards=4)
+        self.client.get_document("patients", "p3").set({})
+        counters.increment("patients")
+        
+        assert counters.read() is None
+        assert counters.snapshot()["totals"]["patients"] == 4
+        assert counters.read()["totals"]["patients"] == 4
+        # Only the baseline is written; shards are never overwritten
+        assert len(self.client.get_collection(COUNTER_SHARDS_COLLECTION).get()) == 2
+    
+    def test_seed_keeps_increments_and_runs_once(self):
+        """Test that seeding twice and increments around the seed are all counted once"""
+        counters = ShardedCounters(self.client, num_shards=4)
+        for i in range(2):
+            self.client.get_document("diet_charts", f"c{i}").set({})
+        counters.increment("diet_charts", delta=2)
+        self.client.get_document("patients", "p3").set({})
+        
+        counters.seed()
+        self.client.get_document("patients", "p4").set({})
+        counters.increment("patients")
+        counters.seed()
+        
+        totals = counters.read()["totals"]
+        assert totals["diet_charts"] == 2
+        assert totals["patients"] == 5
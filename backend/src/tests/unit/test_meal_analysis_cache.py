@@ -0,0 +1,104 @@
+"""
+Unit tests for the meal analysis cache
+"""
+
+import asyncio
+from src.services.meal_analysis_cache import MealAnalysisCache, PersistentAnalysisTier, meal_cache_key
+from src.services.storage.memory import InMemoryDatabase
+
+DAL_RICE = [
+    {'name': 'Rice', 'quantity': 150, 'unit': 'grams', 'meal_type': 'lunch'},
+    {'name': 'dal', 'quantity': 100.0, 'unit': 'grams', 'meal_type': 'lunch'}
+]
+
+class FakeClock:
+    """Manually advanced clock"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class CountingAnalyzer:
+    """Stand-in for the analysis pipeline that records what it analyzed"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def __call__(self, meals):
+        self.calls.append(meals)
+        return [{'foods': sorted(food['name'].lower() for food in foods)} for foods in meals]
+
+class LocalClient:
+    """FirebaseClient surface used by the persistent tier, over an in-memory database"""
+    
+    def __init__(self):
+        self.db = InMemoryDatabase()
+    
+    def get_document(self, collection_name: str, document_id: str):
+        return self.db.collection(collection_name).document(document_id)
+
+class TestMealAnalysisCache:
+    """Test cached meal analysis"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.clock = FakeClock()
+        self.analyzer = CountingAnalyzer()
+        self.cache = MealAnalysisCache(max_size=2, ttl_seconds=60, clock=self.clock)
+    
+    def _analyze(self, cache, meals):
+        return asyncio.run(cache.analyze_meals(meals, self.analyzer))
+    
+    def test_key_follows_foods_as_sent(self):
+        """Test that food order, name case, quantities and versions all change the key"""
+        same = [dict(DAL_RICE[0], quantity=150.0, meal_type='dinner'), DAL_RICE[1]]
+        reordered = [DAL_RICE[1], DAL_RICE[0]]
+        recased = [DAL_RICE[0], dict(DAL_RICE[1], name='Dal')]
+        
+        assert meal_cache_key(DAL_RICE, "1") == meal_cache_key(same, "1")
+        assert meal_cache_key(DAL_RICE, "1") != meal_cache_key(reordered, "1")
+        assert meal_cache_key(DAL_RICE, "1") != meal_cache_key(recased, "1")
+        assert meal_cache_key(DAL_RICE, "1") != meal_cache_key(DAL_RICE, "2")
+        assert meal_cache_key(DAL_RICE, "1") != meal_cache_key([dict(DAL_RICE[0], quantity=200)], "1")
+    
+    def test_repeated_meals_hit(self):
+        """Test that only distinct uncached meals are analyzed"""
+        khichdi = [{'name': 'khichdi', 'quantity': 200, 'unit': 'grams'}]
+        
+        first = self._analyze(self.cache, [DAL_RICE, khichdi, DAL_RICE])
+        second = self._analyze(self.cache, [khichdi, DAL_RICE])
+        
+        assert first[0] == first[2] == second[1]
+        assert [len(meals) for meals in self.analyzer.calls] == [2]
+        assert self.cache.stats()['hits'] == 2
+        assert self.cache.stats()['hit_rate'] == 0.5
+    
+    def test_ttl_eviction_and_version(self):
+        """Test expiry, LRU eviction and model-version invalidation"""
+        meals = [[{'name': name, 'quantity': 1, 'unit': 'cup'}] for name in ('milk', 'ghee', 'curd')]
+        self._analyze(self.cache, meals)
+        
+        assert self.cache.stats()['size'] == 2
+        assert self.cache.stats()['evictions'] == 1
+        
+        self.clock.now += 61
+        self._analyze(self.cache, meals[2:])
+        assert self.cache.stats()['expired'] == 1
+        
+        self.cache.configure(max_size=2, ttl_seconds=60, model_version="2")
+        self._analyze(self.cache, meals[2:])
+        assert len(self.analyzer.calls) == 3
+    
+    def test_persistent_tier(self):
+        """Test that a second worker reuses analyses from the persistent tier"""
+        client = LocalClient()
+        worker_a = MealAnalysisCache(persistent=PersistentAnalysisTier(client))
+        worker_b = MealAnalysisCache(persistent=PersistentAnalysisTier(client))
+        
+        expected = self._analyze(worker_a, [DAL_RICE])
+        
+        assert self._analyze(worker_b, [DAL_RICE]) == expected
+        assert len(self.analyzer.calls) == 1
+        assert worker_b.stats()['persistent_hits'] == 1
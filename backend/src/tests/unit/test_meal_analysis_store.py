@@ -0,0 +1,66 @@
+"""
+Unit tests for the content-addressed meal analysis store
+"""
+
+from src.services.meal_analysis_store import (
+    ANALYSIS_COLLECTION, MealAnalysisStore, compact_meal, meal_analysis_summary
+)
+from src.services.storage.memory import InMemoryDatabase
+
+def _analysis(score: float):
+    return {
+        'compatibility_check': {'compatible': score > 0.5, 'score': score, 'issues': ['x'] * 20},
+        'rasa_analysis': {'balance_score': 0.7, 'rasas': {'sweet': 0.6}},
+        'guna_analysis': {'guna_scores': {'heavy': 0.4}},
+        'nutrition_analysis': {'calories': 450.0, 'protein': 12.0},
+        'incompatibility_check': {'incompatible_pairs': []},
+        'agni_impact': {'agni_impact': 'neutral'}
+    }
+
+class LocalClient:
+    """FirebaseClient surface used by the store, over an in-memory database"""
+    
+    def __init__(self):
+        self.db = InMemoryDatabase()
+    
+    def get_document(self, collection_name: str, document_id: str):
+        return self.db.collection(collection_name).document(document_id)
+
+class TestMealAnalysisStore:
+    """Test splitting meal analyses out of diet charts"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.client = LocalClient()
+        self.store = MealAnalysisStore(self.client)
+    
+    def test_save_deduplicates(self):
+        """Test that identical analyses share one document"""
+        refs = self.store.save([_analysis(0.8), _analysis(0.8), _analysis(0.3)])
+        
+        assert refs[0] == refs[1] != refs[2]
+        assert len(self.client.db.collection(ANALYSIS_COLLECTION).get()) == 2
+    
+    def test_compact_meal_and_attach(self):
+        """Test that meals keep a reference and summary and load the full analysis on demand"""
+        analysis = _analysis(0.8)
+        self.store.save([analysis])
+        meal = compact_meal({'meal_type': 'lunch', 'foods': []}, analysis)
+        
+        assert 'analysis' not in meal
+        assert meal['analysis_summary'] == {
+            'compatibility_check': {'compatible': True, 'score': 0.8},
+            'rasa_analysis': {'balance_score': 0.7}
+        }
+        
+        loaded = self.store.attach([meal, {'meal_type': 'snack', 'foods': []}])
+        
+        assert loaded[0]['analysis'] == analysis
+        assert 'analysis' not in loaded[1]
+    
+    def test_summary_of_legacy_meal(self):
+        """Test that meals with an embedded analysis summarize the same way"""
+        analysis = _analysis(0.3)
+        
+        assert meal_analysis_summary({'analysis': analysis}) == compact_meal({}, analysis)['analysis_summary']
+        assert meal_analysis_summary({}) == {}
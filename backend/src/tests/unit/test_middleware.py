@@ -0,0 +1,83 @@
+"""
+Unit tests for the ASGI middleware
+"""
+
+import asyncio
+import json
+from src.middleware.asgi import get_header
+from src.middleware.rate_limiter import RateLimiterMiddleware
+from src.services.rate_limit import SlidingWindowRateLimiter
+
+def _scope(path: str = "/patients/", uid: str = None):
+    scope = {
+        "type": "http", "method": "GET", "path": path,
+        "headers": [(b"authorization", b"Bearer token")],
+        "client": ("10.0.0.1", 5000)
+    }
+    if uid:
+        scope["state"] = {"uid": uid}
+    return scope
+
+async def _streaming_app(scope, receive, send):
+    """App that streams its response in chunks"""
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    for chunk in (b'{"n": 1}\n', b'{"n": 2}\n'):
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def _call(middleware, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages
+
+class TestRateLimiterMiddleware:
+    """Test pure-ASGI rate limiting"""
+    
+    def test_streaming_pass_through(self):
+        """Test that streamed response chunks reach the client unchanged"""
+        middleware = RateLimiterMiddleware(_streaming_app)
+        middleware.rate_limiter = SlidingWindowRateLimiter(limit=10)
+        
+        messages = _call(middleware, _scope())
+        
+        assert messages[0]["status"] == 200
+        assert [m["body"] for m in messages[1:]] == [b'{"n": 1}\n', b'{"n": 2}\n', b""]
+    
+    def test_early_rejection(self):
+        """Test that over-limit requests get a 429 without reaching the app"""
+        middleware = RateLimiterMiddleware(_streaming_app)
+        middleware.rate_limiter = SlidingWindowRateLimiter(limit=1)
+        
+        assert _call(middleware, _scope(uid="user_1"))[0]["status"] == 200
+        rejected = _call(middleware, _scope(uid="user_1"))
+        
+        assert len(rejected) == 2
+        assert rejected[0]["status"] == 429
+        assert get_header(rejected[0], b"retry-after") is not None
+        assert json.loads(rejected[1]["body"]) == {"detail": "Rate limit exceeded. Please try again later."}
+        assert _call(middleware, _scope(uid="user_2"))[0]["status"] == 200
+    
+    def test_per_client_ignores_uid(self):
+        """Test that the pre-auth limiter keys on the client address alone"""
+        middleware = RateLimiterMiddleware(_streaming_app, per_client=True)
+        middleware.rate_limiter = SlidingWindowRateLimiter(limit=2)
+        
+        statuses = [_call(middleware, _scope(uid=f"user_{i}"))[0]["status"] for i in range(3)]
+        
+        assert statuses == [200, 200, 429]
+    
+    def test_health_not_limited(self):
+        """Test that health checks bypass the limiter"""
+        middleware = RateLimiterMiddleware(_streaming_app)
+        middleware.rate_limiter = SlidingWindowRateLimiter(limit=1)
+        
+        statuses = [_call(middleware, _scope("/health"))[0]["status"] for _ in range(3)]
+        
+        assert statuses == [200, 200, 200]
@@ -2,13 +2,29 @@
 Unit tests for ML models
 """
 
+import asyncio
+import os
+import subprocess
+import sys
+import threading
 import pytest
 import numpy as np
 from src.services.ml.dosha_classifier import DoshaClassifier
 from src.services.ml.compat_gnn import CompatibilityGNN
+from src.services.ml.compat_matrix import build_compatibility_matrix
 from src.services.ml.rasa_recommender import RasaRecommender
 from src.services.ml.nutrient_calculator import NutrientCalculator
-from src.services.ml.agni_predictor import AgniPredictor
+from src.services.ml.agni_predictor import AgniPredictor, AGNI_FEATURES
+from src.services.ml.feature_encoding import FeatureEncoder
+from src.services.ml.model_registry import ModelRegistry
+from src.services.ml.inference import create_inference_backend, KerasPredictBackend
+from src.services.ml.frameworks import lazy_import, import_report
+from src.services.ayurvedic.guna_calculator import GunaCalculator
+from src.services.ayurvedic.viruddha_ahara import ViruddhaAharaDetector
+from src.services.meal_analysis import MealAnalysisPipeline
+from src.services.executor import AnalysisExecutor
+from src.services.micro_batcher import MicroBatcher
+from src.utils.exceptions import ServiceOverloadedError
 
 class TestDoshaClassifier:
     """Test Dosha Classifier"""
@@ -48,6 +64,73 @@ class TestDoshaClassifier:
         assert 'confidence' in result
         assert 'recommendations' in result
         assert result['primary_dosha'] in ['vata', 'pitta', 'kapha']
+    
+    def test_predict_dosha_batch(self):
+        """Test that a cohort is classified with a single predict_proba call"""
+        class BodyTypeModel:
+            def __init__(self):
+                self.calls = []
+            
+            def predict_proba(self, X):
+                self.calls.append(X.shape)
+                # thin -> vata, medium -> pitta, heavy -> kapha
+                return np.eye(3)[np.rint(X[:, 2] * 2).astype(int)] * 0.8 + 0.2 / 3
+        
+        classifier = DoshaClassifier()
+        classifier.model = BodyTypeModel()
+        classifier.feature_names = ['age', 'gender', 'body_type']
+        
+        patients = [{'age': 30, 'gender': 'female', 'body_type': body_type} for body_type in ['heavy', 'thin', 'medium']]
+        results = classifier.predict_dosha_batch(patients)
+        
+        assert classifier.model.calls == [(3, 3)]
+        assert [r['primary_dosha'] for r in results] == ['kapha', 'vata', 'pitta']
+        assert results[0]['confidence'] == pytest.approx(0.8 + 0.2 / 3)
+        assert all(isinstance(score, float) for r in results for score in r['dosha_scores'].values())
+        assert results[1] == classifier.predict_dosha(classifier.analyze_patient_features(patients[1]))
+        assert classifier.predict_dosha_batch([]) == []
+
+class TestFeatureEncoder:
+    """Test compiled feature encoders"""
+    
+    def test_encode_matches_single_records(self):
+        """Test that batch encoding matches encoding records one at a time"""
+        classifier = DoshaClassifier()
+        patients = [
+            {'age': 30, 'gender': 'Male', 'body_type': 'HEAVY', 'skin_type': 'dry'},
+            {'age': 140, 'gender': 'female', 'appetite': 'unknown', 'digestion': None},
+            {'age': 'thirty', 'gender': 3, 'sleep_pattern': 'deep'},
+            {}
+        ]
+        
+        matrix = classifier.encode_patient_features(patients)
+        
+        assert matrix.shape == (4, 12)
+        for row, patient in zip(matrix, patients):
+            assert tuple(row.tolist()) == classifier.analyze_patient_features(patient)
+        assert matrix[0, :4].tolist() == [0.3, 1.0, 1.0, 0.0]
+        assert matrix[1, [0, 1, 5, 6]].tolist() == [1.0, 0.0, 0.5, 0.5]
+        assert matrix[2, [0, 1, 7]].tolist() == [0.5, 0.5, 1.0]
+        assert matrix[3].tolist() == [0.5] * 12
+    
+    def test_numeric_and_flag_features(self):
+        """Test clip/scale of numeric metrics and unknown feature names"""
+        encoder = FeatureEncoder(['water_intake', 'weather_impact', 'meal_timing_consistency', 'mood'], AGNI_FEATURES)
+        records = [
+            {'water_intake': 6, 'weather_impact': -10, 'meal_timing_consistency': True, 'mood': 9},
+            {'water_intake': np.int64(1), 'weather_impact': 2.5, 'meal_timing_consistency': 0},
+            {'water_intake': float('nan'), 'weather_impact': '2'}
+        ]
+        
+        matrix = encoder.encode(records)
+        
+        np.testing.assert_allclose(matrix, [
+            [1.0, -0.5, 1.0, 0.5],
+            [1 / 3, 1.0, 0.0, 0.5],
+            [0.5, 0.5, 0.5, 0.5]
+        ])
+        for row, record in zip(matrix, records):
+            np.testing.assert_array_equal(row, encoder.encode_one(record))
 
 class TestCompatibilityGNN:
     """Test Compatibility GNN"""
@@ -77,6 +160,156 @@ class TestCompatibilityGNN:
         assert 'conflicts' in result
         assert 'recommendations' in result
         assert isinstance(result['compatible'], bool)
+    
+    def test_meal_compatibility_single_model_call(self):
+        """Test that all meal pairs are scored in one batched call"""
+        class PairModel:
+            calls = 0
+            
+            def predict(self, inputs, **kwargs):
+                PairModel.calls += 1
+                node_features, adjacency = inputs
+                return (node_features[:, 0, :1] * node_features[:, 1, :1]).reshape(-1, 1)
+        
+        gnn = CompatibilityGNN(model_path='missing_model.h5')
+        gnn.model = PairModel()
+        gnn.food_embeddings = np.array([[0.9], [0.8], [0.3], [0.95]])
+        gnn.food_to_index = {'rice': 0, 'dal': 1, 'fish': 2, 'ghee': 3}
+        
+        foods = ['rice', 'dal', 'fish', 'ghee', 'unknown']
+        result = gnn.check_meal_compatibility(foods)
+        
+        assert PairModel.calls == 1
+        
+        expected_conflicts = []
+        expected_total = 0
+        for i in range(len(foods)):
+            for j in range(i + 1, len(foods)):
+                pair = gnn.check_compatibility(foods[i], foods[j])
+                expected_total += pair['score']
+                if not pair['compatible']:
+                    expected_conflicts.append((foods[i], foods[j], pair['score']))
+        
+        assert [(c['food1'], c['food2'], c['score']) for c in result['conflicts']] == expected_conflicts
+        assert result['score'] == pytest.approx(expected_total / 10)
+        assert result['compatible'] is False
+    
+    def test_precomputed_matrix_lookup(self, tmp_path):
+        """Test that a built score table replaces the live model"""
+        import pickle
+        
+        class PairModel:
+            def predict(self, inputs, **kwargs):
+                node_features, adjacency = inputs
+                return (node_features[:, 0, :1] * node_features[:, 1, :1]).reshape(-1, 1)
+        
+        model_path = tmp_path / 'gnn.h5'
+        model_path.write_bytes(b'weights')
+        encoders_path = tmp_path / 'encoders.pkl'
+        with open(encoders_path, 'wb') as f:
+            pickle.dump({
+                'embeddings': np.array([[0.9], [0.8], [0.3], [0.95]]),
+                'food_to_index': {'rice': 0, 'dal': 1, 'fish': 2, 'ghee': 3}
+            }, f)
+        matrix_path = tmp_path / 'matrix.npy'
+        
+        live = CompatibilityGNN(str(model_path), str(encoders_path), str(matrix_path))
+        live.model = PairModel()
+        build_compatibility_matrix(live, str(matrix_path), chunk_size=3)
+        
+        served = CompatibilityGNN(str(model_path), str(encoders_path), str(matrix_path))
+        assert served.model is None
+        assert served.score_matrix is not None
+        
+        foods = ['rice', 'dal', 'fish', 'ghee']
+        expected = live.check_meal_compatibility(foods)
+        result = served.check_meal_compatibility(foods)
+        
+        assert result['score'] == pytest.approx(expected['score'], abs=1e-3)
+        assert [(c['food1'], c['food2']) for c in result['conflicts']] == \
+            [(c['food1'], c['food2']) for c in expected['conflicts']]
+        assert served.check_compatibility('ghee', 'rice')['score'] == pytest.approx(0.855, abs=1e-3)
+        
+        # A changed model invalidates the table
+        model_path.write_bytes(b'retrained weights')
+        stale = CompatibilityGNN(str(model_path), str(encoders_path), str(matrix_path))
+        assert stale.score_matrix is None
+
+class TestInferenceBackends:
+    """Test ML inference backends against Keras model.predict"""
+    
+    def _build_models(self):
+        """Small Keras models shaped like the Agni LSTM and the GNN (skips without TensorFlow)"""
+        tf = pytest.importorskip("tensorflow")
+        
+        tf.random.set_seed(7)
+        rng = np.random.default_rng(7)
+        
+        # Agni-shaped LSTM
+        self.sequence_model = tf.keras.Sequential([
+            tf.keras.Input(shape=(7, 10)),
+            tf.keras.layers.LSTM(4),
+            tf.keras.layers.Dense(1, activation='sigmoid')
+        ])
+        self.sequences = rng.random((5, 7, 10)).astype(np.float32)
+        
+        # GNN-shaped two input model
+        node_features = tf.keras.Input(shape=(2, 4))
+        adjacency = tf.keras.Input(shape=(2, 2))
+        merged = tf.keras.layers.Concatenate()([
+            tf.keras.layers.Flatten()(node_features),
+            tf.keras.layers.Flatten()(adjacency)
+        ])
+        self.pair_model = tf.keras.Model(
+            [node_features, adjacency],
+            tf.keras.layers.Dense(1, activation='sigmoid')(merged)
+        )
+        self.pairs = [rng.random((3, 2, 4)).astype(np.float32), rng.random((3, 2, 2)).astype(np.float32)]
+    
+    def test_tf_function_parity(self):
+        """Test that the compiled function matches model.predict for every batch size"""
+        self._build_models()
+        for model, inputs in [(self.sequence_model, self.sequences), (self.pair_model, self.pairs)]:
+            expected = create_inference_backend(model, 'keras')(inputs)
+            compiled = create_inference_backend(model, 'tf_function')
+            
+            assert compiled.name == 'tf_function'
+            np.testing.assert_allclose(compiled(inputs), expected, rtol=1e-5, atol=1e-6)
+        
+        single = self.sequences[:1]
+        np.testing.assert_allclose(
+            create_inference_backend(self.sequence_model, 'tf_function')(single),
+            self.sequence_model.predict(single, verbose=0),
+            rtol=1e-5, atol=1e-6
+        )
+    
+    def test_tflite_parity(self):
+        """Test that the TFLite interpreter matches model.predict"""
+        self._build_models()
+        expected = self.pair_model.predict(self.pairs, verbose=0)
+        backend = create_inference_backend(self.pair_model, 'tflite')
+        
+        assert backend.name == 'tflite'
+        np.testing.assert_allclose(backend(self.pairs), expected, rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(
+            backend([x[:1] for x in self.pairs]), expected[:1], rtol=1e-4, atol=1e-5
+        )
+    
+    def test_non_keras_model_uses_predict(self):
+        """Test that plain objects with predict() are wrapped as-is"""
+        class ConstantModel:
+            def predict(self, X, **kwargs):
+                return np.ones((len(X), 1))
+        
+        backend = create_inference_backend(ConstantModel(), 'tf_function')
+        
+        assert isinstance(backend, KerasPredictBackend)
+        assert backend(np.zeros((3, 7, 10))).shape == (3, 1)
+    
+    def test_unknown_backend(self):
+        """Test that unknown backends are rejected"""
+        with pytest.raises(ValueError):
+            create_inference_backend(object(), 'onnx')
 
 class TestRasaRecommender:
     """Test Rasa Recommender"""
@@ -132,6 +365,26 @@ class TestNutrientCalculator:
         assert 'fiber' in result
         assert all(isinstance(v, (int, float)) for v in result.values())
     
+    def test_calculate_chart_nutrition(self):
+        """Test that meal, day and chart totals agree and sum every food's micronutrients"""
+        calculator = NutrientCalculator()
+        
+        breakfast = [{'name': 'milk', 'quantity': 1, 'unit': 'cups'}]
+        lunch = [
+            {'name': 'rice', 'quantity': 100, 'unit': 'grams'},
+            {'name': 'dal', 'quantity': 50, 'unit': 'grams'}
+        ]
+        days = [[breakfast, lunch]] * 30
+        
+        result = calculator.calculate_chart_nutrition(days)
+        
+        assert len(result['meals']) == 30 and len(result['days']) == 30
+        assert result['meals'][0][1] == calculator.calculate_meal_nutrition(lunch)
+        assert result['meals'][0][1]['calories'] == 130 + 116 * 0.5
+        assert result['meals'][0][1]['minerals']['iron'] == 0.8 + 2.5 * 0.5
+        assert result['days'][0]['calories'] == 42 * 2.5 + 188
+        assert result['total']['calories'] == 30 * (42 * 2.5 + 188)
+    
     def test_analyze_diet_balance(self):
         """Test diet balance analysis"""
         calculator = NutrientCalculator()
@@ -185,6 +438,81 @@ class TestAgniPredictor:
         assert 0 <= result['agni_score'] <= 1
         assert result['trend_direction'] in ['improving', 'declining', 'stable']
     
+    def test_predict_agni_trends_batched(self):
+        """Test that many histories share one LSTM forward pass"""
+        class SequenceModel:
+            def __init__(self):
+                self.calls = []
+            
+            def predict(self, X, batch_size=None, verbose=0):
+                self.calls.append(X.shape)
+                return X.mean(axis=(1, 2)).reshape(-1, 1)
+        
+        predictor = AgniPredictor()
+        predictor.model = SequenceModel()
+        predictor.feature_names = [
+            'appetite_score', 'digestion_quality', 'bowel_movement_frequency',
+            'energy_level', 'sleep_quality', 'stress_level', 'meal_timing_consistency',
+            'water_intake', 'exercise_frequency', 'weather_impact'
+        ]
+        histories = [
+            [{'appetite_score': day + i, 'energy_level': 10 - day} for day in range(7)]
+            for i in range(4)
+        ] + [[{'appetite_score': 5}]]  # Too short to predict
+        
+        results = predictor.predict_agni_trends(histories)
+        
+        assert predictor.model.calls[0] == (4, 7, 10)
+        # Recent days and forecast days of every history are scored together
+        assert predictor.model.calls[1:] == [(4 * 10, 1, 10)]
+        assert len(results) == 5
+        assert results[4]['confidence'] == 0.3
+        for history, result in zip(histories[:4], results[:4]):
+            single = predictor.predict_agni_trend(history)
+            assert result['agni_score'] == pytest.approx(single['agni_score'])
+            assert result['trend_direction'] == single['trend_direction']
+    
+    def test_malformed_history_falls_back_alone(self):
+        """Test that one malformed history does not cost the rest of the batch their predictions"""
+        class SequenceModel:
+            def __init__(self):
+                self.calls = []
+            
+            def predict(self, X, batch_size=None, verbose=0):
+                self.calls.append(X.shape)
+                return X.mean(axis=(1, 2)).reshape(-1, 1)
+        
+        predictor = AgniPredictor()
+        predictor.model = SequenceModel()
+        good = [{'appetite_score': 6 + day % 2, 'energy_level': 8} for day in range(7)]
+        malformed = [None] * 7
+        
+        results = predictor.predict_agni_trends([good, malformed, good])
+        
+        assert predictor.model.calls[0][0] == 2
+        assert results[1]['confidence'] == 0.3
+        assert results[0]['agni_score'] == pytest.approx(predictor.predict_agni_trend(good)['agni_score'])
+        assert results[2] == {**results[0], 'prediction_date': results[2]['prediction_date']}
+    
+    def test_weekly_forecast_matches_per_day_scoring(self):
+        """Test that the batched forecast matches scoring each forecast day separately"""
+        class SequenceModel:
+            def predict(self, X, batch_size=None, verbose=0):
+                return X.mean(axis=(1, 2)).reshape(-1, 1)
+        
+        predictor = AgniPredictor()
+        predictor.model = SequenceModel()
+        history = [{'appetite_score': 4 + day % 3, 'sleep_quality': 9 - day} for day in range(9)]
+        
+        forecast = predictor.predict_agni_trend(history)['next_week_forecast']
+        
+        features = predictor._convert_daily_metrics_to_features(history[-1])
+        assert [entry['day'] for entry in forecast] == list(range(1, 8))
+        for day, entry in enumerate(forecast):
+            expected = predictor._calculate_agni_score_from_features(features * 0.95 ** day) * (0.95 + day * 0.01)
+            assert entry['agni_score'] == pytest.approx(expected)
+            assert entry['agni_level'] == predictor._classify_agni_level(entry['agni_score'])
+    
     def test_assess_daily_agni(self):
         """Test daily Agni assessment"""
         predictor = AgniPredictor()
@@ -238,3 +566,204 @@ class TestAgniPredictor:
         assert 0 <= result['impact_score'] <= 1
         assert 0 <= result['agni_change'] <= 1
         assert result['impact_level'] in ['high_positive', 'positive', 'neutral', 'negative', 'high_negative']
+
+class TestModelRegistry:
+    """Test ML Model Registry"""
+    
+    def test_model_loaded_once(self):
+        """Test that a registered model is built once and shared"""
+        registry = ModelRegistry()
+        registry.register('rasa_recommender', RasaRecommender)
+        
+        first = registry.get('rasa_recommender')
+        second = registry.get('rasa_recommender')
+        
+        assert first is second
+        assert registry.is_loaded('rasa_recommender')
+    
+    def test_load_all_reports_stats(self):
+        """Test load time and memory reporting"""
+        registry = ModelRegistry()
+        registry.register('rasa_recommender', RasaRecommender)
+        registry.register('nutrient_calculator', NutrientCalculator)
+        
+        stats = registry.load_all()
+        
+        assert set(stats) == {'rasa_recommender', 'nutrient_calculator'}
+        for model_stats in stats.values():
+            assert model_stats['loaded'] is True
+            assert model_stats['load_time_ms'] >= 0
+            assert model_stats['memory_mb'] >= 0
+    
+    def test_unregistered_model(self):
+        """Test that unknown models raise KeyError"""
+        registry = ModelRegistry()
+        
+        with pytest.raises(KeyError):
+            registry.get('unknown_model')
+
+class TestMealAnalysisPipeline:
+    """Test batched meal analysis"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.pipeline = MealAnalysisPipeline(
+            CompatibilityGNN(), RasaRecommender(), GunaCalculator(),
+            NutrientCalculator(), ViruddhaAharaDetector()
+        )
+    
+    def test_batch_matches_single_meal(self):
+        """Test that batch results match analyzing each meal on its own"""
+        meals = [
+            [{'name': 'Rice', 'quantity': 100}, {'name': 'Milk', 'quantity': 200}],
+            [{'name': 'Banana', 'quantity': 120}, {'name': 'Milk', 'quantity': 200}],
+            [{'name': 'Ghee', 'quantity': 10}],
+            []
+        ]
+        
+        results = self.pipeline.analyze_meals(meals)
+        
+        assert len(results) == len(meals)
+        for foods, result in zip(meals, results):
+            assert result == self.pipeline.analyze_meal(foods)
+            assert set(result) == {
+                'compatibility_check', 'rasa_analysis', 'guna_analysis',
+                'nutrition_analysis', 'incompatibility_check', 'agni_impact'
+            }
+    
+    def test_empty_batch(self):
+        """Test analyzing no meals"""
+        assert self.pipeline.analyze_meals([]) == []
+
+class BlockingModel:
+    """Model whose predictions wait until released"""
+    
+    def __init__(self):
+        self.release = threading.Event()
+    
+    def predict(self, value):
+        self.release.wait(timeout=5)
+        return value * 2
+
+class TestAnalysisExecutor:
+    """Test Analysis Executor"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.model = BlockingModel()
+        self.registry = ModelRegistry()
+        self.registry.register('blocking_model', lambda: self.model)
+        self.executor = AnalysisExecutor(max_workers=1, max_queue=1, registry=self.registry)
+    
+    def teardown_method(self):
+        """Stop the worker pool"""
+        self.model.release.set()
+        self.executor.shutdown()
+    
+    def test_call_records_timing(self):
+        """Test that offloaded calls return results and record timing"""
+        self.model.release.set()
+        
+        result = asyncio.run(self.executor.call('blocking_model', 'predict', 21))
+        
+        assert result == 42
+        stats = self.executor.stats()
+        assert stats['in_flight'] == 0
+        assert stats['calls']['blocking_model.predict']['calls'] == 1
+        assert stats['calls']['blocking_model.predict']['avg_ms'] >= 0
+    
+    def test_rejects_when_queue_full(self):
+        """Test that calls beyond the worker and queue limits are rejected"""
+        async def run():
+            running = [asyncio.ensure_future(self.executor.call('blocking_model', 'predict', i)) for i in range(2)]
+            await asyncio.sleep(0)
+            
+            with pytest.raises(ServiceOverloadedError):
+                await self.executor.call('blocking_model', 'predict', 3)
+            
+            self.model.release.set()
+            return await asyncio.gather(*running)
+        
+        assert asyncio.run(run()) == [0, 2]
+        assert self.executor.stats()['rejected'] == 1
+    
+    def test_event_loop_stays_responsive(self):
+        """Test that the event loop keeps running while a call is blocked"""
+        async def run():
+            call = asyncio.ensure_future(self.executor.call('blocking_model', 'predict', 1))
+            ticks = 0
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            self.model.release.set()
+            return ticks, await call
+        
+        assert asyncio.run(run()) == (5, 2)
+
+class TestMicroBatcher:
+    """Test request micro-batching"""
+    
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that requests within the window are served by one call"""
+        batches = []
+        
+        async def process(items):
+            batches.append(list(items))
+            return [item * 2 for item in items]
+        
+        async def run():
+            batcher = MicroBatcher(process, max_batch_size=3, window_ms=20)
+            results = await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+            return results, batcher.stats()
+        
+        results, stats = asyncio.run(run())
+        
+        assert results == [0, 2, 4, 6, 8]
+        assert batches == [[0, 1, 2], [3, 4]]
+        assert stats['batches'] == 2
+        assert stats['largest_batch'] == 3
+    
+    def test_batch_failure_reaches_every_caller(self):
+        """Test that a failed batch raises for each waiting request"""
+        async def process(items):
+            raise ValueError("model failed")
+        
+        async def run():
+            batcher = MicroBatcher(process, window_ms=1)
+            return await asyncio.gather(
+                *[batcher.submit(i) for i in range(2)], return_exceptions=True
+            )
+        
+        results = asyncio.run(run())
+        
+        assert all(isinstance(result, ValueError) for result in results)
+
+class TestFrameworkImports:
+    """Test deferred ML framework imports"""
+    
+    def test_services_do_not_import_tensorflow(self):
+        """Test that importing the ML services leaves TensorFlow unloaded"""
+        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        code = (
+            "import sys\n"
+            "import src.services.ml.model_registry, src.services.micro_batcher\n"
+            "assert 'tensorflow' not in sys.modules\n"
+        )
+        
+        result = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, capture_output=True, text=True)
+        
+        assert result.returncode == 0, result.stderr
+    
+    def test_lazy_import_records_time(self, tmp_path, monkeypatch):
+        """Test that deferred imports are timed and optional ones may be missing"""
+        (tmp_path / 'deferred_framework.py').write_text("VALUE = 1\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        
+        assert lazy_import("deferred_framework").VALUE == 1
+        assert lazy_import("not_an_installed_framework", optional=True) is None
+        with pytest.raises(ImportError):
+            lazy_import("not_an_installed_framework")
+        
+        report = import_report()
+        assert report['framework_import_time_ms']['deferred_framework'] >= 0
+        assert 'tensorflow' in report['frameworks_loaded']
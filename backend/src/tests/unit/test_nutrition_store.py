@@ -0,0 +1,64 @@
+"""
+Unit tests for the food nutrition store
+"""
+
+import numpy as np
+from src.services.ml.nutrition_store import NutritionStore, build_nutrition_store
+from src.services.ml.nutrient_calculator import NutrientCalculator, FOOD_ALIASES
+
+FOODS = {
+    'rice': {'calories': 130, 'protein': 2.7, 'vitamins': {'B1': 0.07}, 'minerals': {'iron': 0.8}},
+    'brown rice': {'calories': 111, 'protein': 2.6, 'vitamins': {}, 'minerals': {'magnesium': 43}},
+    'moong dal': {'calories': 105, 'protein': 7.0, 'vitamins': {'B9': 0.16}, 'minerals': {}},
+    'toor dal': {'calories': 118, 'protein': 6.8, 'vitamins': {}, 'minerals': {'iron': 1.2}},
+    'ghee': {'calories': 900, 'fat': 100, 'vitamins': {'A': 3069}, 'minerals': {}}
+}
+
+class TestNutritionStore:
+    """Test indexed food lookup"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.store = NutritionStore.from_records(FOODS, {'chawal': 'rice', 'arhar dal': 'toor dal'})
+    
+    def _name(self, food_name):
+        row = self.store.match(food_name)
+        return None if row is None else self.store.names[row]
+    
+    def test_exact_and_alias(self):
+        """Test exact names, normalization and aliases"""
+        assert self._name('Brown  Rice') == 'brown rice'
+        assert self._name('chawal') == 'rice'
+        assert self._name('Arhar-Dal') == 'toor dal'
+    
+    def test_fuzzy_match(self):
+        """Test token and trigram matches with deterministic tie-breaks"""
+        assert self._name('steamed rice') == 'rice'
+        # Equal word overlap: the shorter name wins
+        assert self._name('dal tadka') == 'toor dal'
+        assert self._name('toor dal fry') == 'toor dal'
+        assert self._name('gheee') == 'ghee'
+        assert self._name('paneer') is None
+    
+    def test_records_round_trip(self, tmp_path):
+        """Test that records survive the columnar file unchanged"""
+        path = str(tmp_path / 'nutrition_db.npz')
+        self.store.save(path)
+        loaded = NutritionStore.load(path)
+        
+        assert loaded.values.dtype == np.float32
+        for name, nutrition in FOODS.items():
+            assert loaded.lookup(name) == nutrition
+        assert loaded.lookup('arhar dal') == FOODS['toor dal']
+    
+    def test_calculator_uses_store_file(self, tmp_path):
+        """Test that NutrientCalculator loads a built store, with the built-in foods as fallback"""
+        source = tmp_path / 'foods.json'
+        source.write_text('{"foods": {"paneer": {"calories": 265, "protein": 18.3}}}')
+        path = str(tmp_path / 'nutrition_db.npz')
+        build_nutrition_store(str(source), path)
+        
+        assert NutrientCalculator(store_path=path)._get_food_nutrition('paneer')['calories'] == 265
+        builtin = NutrientCalculator(store_path=None)
+        assert builtin._get_food_nutrition('basmati rice') == builtin.nutritional_database['rice']
+        assert builtin._get_food_nutrition(next(iter(FOOD_ALIASES))) == builtin.nutritional_database['rice']
@@ -0,0 +1,67 @@
+"""
+Unit tests for cursor pagination
+"""
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.services.pagination import encode_page_token, decode_page_token, fetch_page
+from src.services.storage.aio import AsyncLocalDatabase
+from src.services.storage.memory import InMemoryDatabase
+from src.utils.exceptions import ValidationError
+
+START = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+class TestPagination:
+    """Test opaque page tokens and cursor-based pages"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        db = InMemoryDatabase()
+        for i in range(7):
+            db.collection('diet_charts').document(f'c{i}').set({
+                'patient_id': 'p1',
+                # Two charts share each timestamp to exercise id tie-breaks
+                'created_at': START + timedelta(days=i // 2),
+                'meals': [{'analysis': {'rasa': 'sweet'}}]
+            })
+        self.async_db = AsyncLocalDatabase(db)
+    
+    def _pages(self, limit):
+        collection = self.async_db.collection('diet_charts')
+        query = collection.where('patient_id', '==', 'p1')
+        
+        async def scenario():
+            pages, token = [], None
+            while True:
+                docs, token = await fetch_page(
+                    collection, query, [('created_at', 'DESCENDING')], limit,
+                    page_token=token, field_paths=['patient_id']
+                )
+                pages.append(docs)
+                if token is None:
+                    return pages
+        
+        return asyncio.run(scenario())
+    
+    def test_token_round_trip(self):
+        """Test that tokens preserve timestamps and document ids"""
+        token = encode_page_token([START, 3], 'c1')
+        
+        assert decode_page_token(token) == ([START, 3], 'c1')
+        with pytest.raises(ValidationError):
+            decode_page_token('not-a-token')
+    
+    def test_pages_cover_every_document_once(self):
+        """Test that walking the pages returns each document once, newest first"""
+        pages = self._pages(limit=3)
+        ids = [doc.id for page in pages for doc in page]
+        
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert ids == ['c6', 'c5', 'c4', 'c3', 'c2', 'c1', 'c0']
+    
+    def test_projection(self):
+        """Test that pages carry only the selected and order-by fields"""
+        first = self._pages(limit=7)[0][0].to_dict()
+        
+        assert set(first) == {'patient_id', 'created_at'}
@@ -0,0 +1,83 @@
+"""
+Unit tests for the sliding-window rate limiter
+"""
+
+import asyncio
+import time
+from src.services.rate_limit import SlidingWindowRateLimiter, LocalCounterStore
+
+class FakeClock:
+    """Controllable wall clock"""
+    
+    def __init__(self, now: float = 600.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+class TestSlidingWindowRateLimiter:
+    """Test sliding-window rate limiting"""
+    
+    def test_limit_within_window(self):
+        """Test that requests over the limit are rejected per key"""
+        limiter = SlidingWindowRateLimiter(limit=3, window_seconds=60, clock=FakeClock())
+        
+        assert [limiter.hit('user_1') for _ in range(4)] == [True, True, True, False]
+        assert limiter.hit('user_2')
+        assert limiter.stats()['rejected'] == 1
+    
+    def test_previous_window_weighted(self):
+        """Test that the previous window's count decays across the next window"""
+        clock = FakeClock(600.0)
+        limiter = SlidingWindowRateLimiter(limit=4, window_seconds=60, clock=clock)
+        for _ in range(4):
+            assert limiter.hit('user_1')
+        
+        # Half way into the next window, half of the previous requests still count
+        clock.now = 690.0
+        assert [limiter.hit('user_1') for _ in range(3)] == [True, True, False]
+        
+        # Two windows later the old requests no longer count
+        clock.now = 780.0
+        assert all(limiter.hit('user_1') for _ in range(4))
+    
+    def test_shared_store_sync(self):
+        """Test that workers see each other's requests after a sync"""
+        store = LocalCounterStore()
+        clock = FakeClock()
+        workers = [
+            SlidingWindowRateLimiter(limit=4, window_seconds=60, shared_store=store, clock=clock)
+            for _ in range(2)
+        ]
+        
+        async def scenario():
+            for _ in range(2):
+                workers[0].hit('user_1')
+                workers[1].hit('user_1')
+            await workers[0].sync()
+            await workers[1].sync()
+            
+            # The second worker has already seen all four requests
+            rejected_after_sync = not workers[1].hit('user_1')
+            
+            # The first worker learns the shared total with its next flush
+            workers[0].hit('user_1')
+            await workers[0].sync()
+            return rejected_after_sync
+        
+        assert asyncio.run(scenario())
+        assert not workers[0].hit('user_1')
+        assert workers[0].stats()['syncs'] == 2
+        assert workers[0].stats()['pending_increments'] == 0
+    
+    def test_hit_overhead(self):
+        """Test that a decision costs well under 50 microseconds"""
+        limiter = SlidingWindowRateLimiter(limit=1_000_000, window_seconds=60, shared_store=LocalCounterStore())
+        keys = [f"user_{i}" for i in range(1000)]
+        
+        start = time.perf_counter()
+        for i in range(20000):
+            limiter.hit(keys[i % 1000])
+        per_hit_us = (time.perf_counter() - start) / 20000 * 1e6
+        
+        assert per_hit_us < 50
@@ -0,0 +1,176 @@
+"""
+Unit tests for local storage backends
+"""
+
+import asyncio
+import time
+import pytest
+from datetime import datetime
+from src.services.storage.base import (
+    Query, SERVER_TIMESTAMP, Increment, transactional, DocumentNotFoundError
+)
+from src.services.storage.aio import AsyncLocalDatabase
+from src.services.storage.memory import InMemoryDatabase
+from src.services.storage.sqlite import SQLiteDatabase
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def db(request, tmp_path):
+    """Each local backend"""
+    if request.param == 'sqlite':
+        database = SQLiteDatabase(str(tmp_path / 'firestore.db'))
+    else:
+        database = InMemoryDatabase()
+    yield database
+    database.close()
+
+class TestLocalStorage:
+    """Test Firestore-compatible local storage"""
+    
+    def test_add_get_update(self, db):
+        """Test document round trip with server timestamps and increments"""
+        _, ref = db.collection('patients').add({
+            'full_name': 'Asha', 'visits': 1, 'profile': {'age': 30},
+            'created_at': SERVER_TIMESTAMP
+        })
+        
+        ref.update({'visits': Increment(2), 'profile.age': 31})
+        snapshot = ref.get()
+        data = snapshot.to_dict()
+        
+        assert snapshot.exists
+        assert snapshot.id == ref.id
+        assert data['visits'] == 3
+        assert data['profile'] == {'age': 31}
+        assert isinstance(data['created_at'], datetime)
+        assert not db.collection('patients').document('missing').get().exists
+    
+    def test_update_missing_document(self, db):
+        """Test that updating a missing document fails like Firestore"""
+        with pytest.raises(DocumentNotFoundError):
+            db.collection('patients').document('missing').update({'age': 1})
+    
+    def test_query(self, db):
+        """Test where, order_by, offset and limit"""
+        charts = db.collection('diet_charts')
+        for i in range(6):
+            charts.document(f'chart{i}').set({
+                'patient_id': 'p1' if i % 2 == 0 else 'p2',
+                'score': i
+            })
+        charts.document('unscored').set({'patient_id': 'p1'})
+        
+        docs = list(
+            charts.where('patient_id', '==', 'p1')
+            .offset(1).limit(5)
+            .order_by('score', direction=Query.DESCENDING)
+            .stream()
+        )
+        
+        assert [doc.id for doc in docs] == ['chart2', 'chart0']
+        assert [doc.id for doc in charts.where('score', '>=', 4).get()] == ['chart4', 'chart5']
+        assert len(charts.where('patient_id', 'in', ['p2']).get()) == 3
+    
+    def test_select_and_start_after(self, db):
+        """Test field projection and cursors with document id tie-breaks"""
+        charts = db.collection('diet_charts')
+        for i in range(5):
+            charts.document(f'chart{i}').set({'score': i // 2, 'meals': [{'analysis': 'x' * 100}]})
+        
+        query = charts.order_by('score', direction=Query.DESCENDING).select(['score'])
+        first = query.limit(2).get()
+        rest = query.start_after(first[-1]).get()
+        by_values = query.start_after({'score': 1, '__name__': charts.document('chart3')}).get()
+        
+        assert [doc.id for doc in first] == ['chart4', 'chart3']
+        assert [doc.id for doc in rest] == ['chart2', 'chart1', 'chart0']
+        assert [doc.id for doc in by_values] == ['chart2', 'chart1', 'chart0']
+        assert first[0].to_dict() == {'score': 2}
+    
+    def test_transaction(self, db):
+        """Test transactional read-modify-write and rollback on error"""
+        ref = db.collection('rate_limits').document('user1')
+        ref.set({'count': 0})
+        
+        @transactional
+        def increment(transaction, reference):
+            count = transaction.get(reference).to_dict()['count']
+            transaction.update(reference, {'count': count + 1})
+            return count + 1
+        
+        @transactional
+        def fail(transaction, reference):
+            transaction.update(reference, {'count': 100})
+            raise ValueError("abort")
+        
+        assert increment(db.transaction(), ref) == 1
+        with pytest.raises(ValueError):
+            fail(db.transaction(), ref)
+        
+        assert ref.get().to_dict()['count'] == 1
+    
+    def test_batch(self, db):
+        """Test that batched writes are applied together"""
+        batch = db.batch()
+        for i in range(3):
+            batch.set(db.collection('users').document(f'u{i}'), {'role': 'doctor'})
+        batch.delete(db.collection('users').document('u0'))
+        batch.commit()
+        
+        assert sorted(doc.id for doc in db.collection('users').stream()) == ['u1', 'u2']
+
+class TestSQLiteStorage:
+    """Test SQLite storage backend"""
+    
+    def test_persists_across_connections(self, tmp_path):
+        """Test that documents survive reopening the database"""
+        path = str(tmp_path / 'firestore.db')
+        first = SQLiteDatabase(path)
+        first.collection('users').document('u1').set({'joined': datetime(2024, 1, 1), 'tags': ['a']})
+        first.close()
+        
+        second = SQLiteDatabase(path)
+        data = second.collection('users').document('u1').get().to_dict()
+        second.close()
+        
+        assert data == {'joined': datetime(2024, 1, 1), 'tags': ['a']}
+
+class TestAsyncLocalStorage:
+    """Test AsyncClient-compatible local storage"""
+    
+    def test_async_round_trip(self, db):
+        """Test awaited writes, reads, queries and batches"""
+        async_db = AsyncLocalDatabase(db)
+        
+        async def scenario():
+            ref = async_db.collection('patients').document('p1')
+            await ref.set({'full_name': 'Asha', 'age': 30, 'created_at': async_db.SERVER_TIMESTAMP})
+            await ref.update({'age': 31})
+            _, added = await async_db.collection('patients').add({'full_name': 'Ravi', 'age': 40})
+            
+            batch = async_db.batch()
+            batch.set(async_db.collection('patients').document('p3'), {'full_name': 'Meera', 'age': 25})
+            await batch.commit()
+            
+            names = [doc.to_dict()['full_name'] async for doc in
+                     async_db.collection('patients').where('age', '>', 26).order_by('age').stream()]
+            return (await ref.get()).to_dict(), added.id, names
+        
+        data, added_id, names = asyncio.run(scenario())
+        
+        assert data['age'] == 31
+        assert isinstance(data['created_at'], datetime)
+        assert db.collection('patients').document(added_id).get().exists
+        assert names == ['Asha', 'Ravi']
+    
+    def test_concurrent_reads_overlap(self):
+        """Test that concurrent reads do not serialize on the event loop"""
+        async_db = AsyncLocalDatabase(InMemoryDatabase(latency_ms=50))
+        
+        async def scenario():
+            ref = async_db.collection('users').document('u1')
+            await ref.set({'role': 'doctor'})
+            start = time.perf_counter()
+            await asyncio.gather(*(ref.get() for _ in range(4)))
+            return time.perf_counter() - start
+        
+        assert asyncio.run(scenario()) < 0.15
@@ -0,0 +1,126 @@
+"""
+Unit tests for the verified token cache
+"""
+
+import asyncio
+import pytest
+from src.services.token_cache import TokenCache, PublicKeyCache, TokenVerifier
+
+class FakeClock:
+    """Controllable wall clock"""
+    
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+class RevokedTokenError(Exception):
+    """Stand-in for firebase_auth.RevokedIdTokenError"""
+
+class CountingVerifier:
+    """Fallback verifier that records calls"""
+    
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.calls = []
+        self.revoked = set()
+    
+    def __call__(self, token: str, check_revoked: bool = False):
+        self.calls.append((token, check_revoked))
+        if check_revoked and token in self.revoked:
+            raise RevokedTokenError(token)
+        return {'uid': token, 'exp': self.clock.now + 3600}
+
+class TestTokenCache:
+    """Test LRU+TTL token caching"""
+    
+    def test_expires_with_token(self):
+        """Test that entries never outlive the token's exp claim"""
+        clock = FakeClock()
+        cache = TokenCache(max_ttl_seconds=3600, clock=clock)
+        cache.put('token', {'uid': 'u1', 'exp': clock.now + 60})
+        
+        assert cache.get('token') == {'uid': 'u1', 'exp': clock.now + 60}
+        clock.now += 61
+        assert cache.get('token') is None
+        assert cache.stats()['expired'] == 1
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used token is evicted"""
+        clock = FakeClock()
+        cache = TokenCache(max_size=2, clock=clock)
+        for token in ('a', 'b'):
+            cache.put(token, {'exp': clock.now + 600})
+        cache.get('a')
+        cache.put('c', {'exp': clock.now + 600})
+        
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.stats()['evictions'] == 1
+    
+    def test_keys_are_hashed(self):
+        """Test that raw tokens are not kept in the cache"""
+        cache = TokenCache()
+        cache.put('secret-token', {'exp': 9_999_999_999})
+        
+        assert 'secret-token' not in cache._entries
+        assert len(cache._entries) == 1
+
+class TestTokenVerifier:
+    """Test token verification through the cache"""
+    
+    def test_repeat_tokens_served_from_cache(self):
+        """Test that a token is verified once and then hit in cache"""
+        clock = FakeClock()
+        fallback = CountingVerifier(clock)
+        verifier = TokenVerifier(fallback, token_cache=TokenCache(clock=clock))
+        
+        async def scenario():
+            return [await verifier.verify('token') for _ in range(5)]
+        
+        results = asyncio.run(scenario())
+        
+        assert all(result['uid'] == 'token' for result in results)
+        assert len(fallback.calls) == 1
+        assert verifier.stats()['hits'] == 4
+        assert verifier.stats()['misses'] == 1
+    
+    def test_revocation_check_interval(self):
+        """Test that cached tokens are re-checked and dropped once revoked"""
+        clock = FakeClock()
+        fallback = CountingVerifier(clock)
+        verifier = TokenVerifier(fallback, token_cache=TokenCache(revocation_check_interval=300, clock=clock))
+        
+        asyncio.run(verifier.verify('token'))
+        clock.now += 100
+        asyncio.run(verifier.verify('token'))
+        assert fallback.calls == [('token', True)]
+        
+        fallback.revoked.add('token')
+        clock.now += 300
+        with pytest.raises(RevokedTokenError):
+            asyncio.run(verifier.verify('token'))
+        
+        assert verifier.stats()['revocation_checks'] == 1
+        assert verifier.stats()['size'] == 0
+
+class TestPublicKeyCache:
+    """Test signing key caching"""
+    
+    def test_refresh_honours_max_age(self):
+        """Test that keys are served until the fetched max-age runs out"""
+        clock = FakeClock()
+        
+        async def fetch(url):
+            return {'kid-1': 'CERT'}, 600.0
+        
+        keys = PublicKeyCache(fetch=fetch, clock=clock)
+        assert keys.get('kid-1') is None
+        
+        asyncio.run(keys.refresh())
+        assert keys.get('kid-1') == 'CERT'
+        
+        clock.now += 601
+        assert keys.get('kid-1') is None
+        assert keys.stats()['refreshes'] == 1
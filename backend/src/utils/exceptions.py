@@ -48,6 +48,11 @@ class MLModelError(CustomException):
     def __init__(self, message: str = "ML model error", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, 500, details)
 
+class ServiceOverloadedError(CustomException):
+    """Service overloaded error"""
+    def __init__(self, message: str = "Service overloaded, try again later", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, 503, details)
+
 class DatabaseError(CustomException):
     """Database error"""
     def __init__(self, message: str = "Database error", details: Optional[Dict[str, Any]] = None):